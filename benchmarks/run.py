@@ -0,0 +1,182 @@
+"""Benchmarks da geração de relatórios, sem interface gráfica.
+
+Uso (a partir da raiz do projeto)::
+
+    python -m benchmarks.run --linhas 1000 10000 100000 --saida resultados.json
+
+Para cada tamanho de planilha sintética são medidas separadamente as fases
+de carregamento (``load_excel``), agrupamento (``group_patients``),
+montagem do documento (python-docx), gravação (``doc.save``) e o motor XML
+(montagem e gravação). A montagem e a gravação são medidas em uma amostra de
+``--amostra`` pacientes. Também é medido o tempo de importação da interface
+gráfica em um processo novo (inicialização do programa). O resultado é
+gravado em JSON; com ``--comparar`` cada fase é comparada com um resultado
+anterior.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Sequence
+
+from gerador_relatorios import data_loader, reports, xml_renderer
+from gerador_relatorios.metrics import distribution
+
+from .synthetic import cached_workbook
+
+RESULTS_VERSION = 1
+DEFAULT_ROWS = (1000, 10000, 100000)
+DEFAULT_SAMPLE = 200
+STARTUP_MODULE = "gerador_relatorios.gui"
+STARTUP_RUNS = 3
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _stats(samples: list[float]) -> dict[str, float]:
+    return {"n": len(samples), **distribution(samples)}
+
+
+def _timed(func: Callable[[], Any]) -> tuple[Any, float]:
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def measure_startup(module: str = STARTUP_MODULE, runs: int = STARTUP_RUNS) -> float:
+    """Menor tempo, em segundos, para importar ``module`` em um processo novo."""
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - start)"
+    )
+    times = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        times.append(float(output.strip().splitlines()[-1]))
+    return min(times)
+
+
+def run_case(rows: int, report_type: str, sample: int, data_dir: str, seed: int = 0) -> dict[str, Any]:
+    """Executa todas as fases para uma planilha sintética de ``rows`` linhas."""
+    path = cached_workbook(data_dir, rows, report_type, seed)
+    data, load_time = _timed(lambda: data_loader.load_excel(path))
+    patients, group_time = _timed(lambda: data_loader.group_patients(data))
+    selected = list(patients.values())[:sample]
+
+    build_times: list[float] = []
+    save_times: list[float] = []
+    xml_times: list[float] = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        for patient_data in selected:
+            doc, elapsed = _timed(lambda: reports.build_document(patient_data, report_type))
+            build_times.append(elapsed)
+            filepath = os.path.join(output_dir, reports.report_filename(patient_data, report_type))
+            save_times.append(_timed(lambda: doc.save(filepath))[1])
+        renderer = xml_renderer.XmlReportRenderer()
+        for patient_data in selected:
+            xml_times.append(_timed(lambda: renderer.write(patient_data, output_dir, report_type))[1])
+
+    return {
+        "linhas": len(data),
+        "pacientes": len(patients),
+        "fases": {
+            "carregar": load_time,
+            "agrupar": group_time,
+            "montar_docx": _stats(build_times),
+            "salvar_docx": _stats(save_times),
+            "motor_xml": _stats(xml_times),
+        },
+    }
+
+
+def run(rows: Sequence[int], report_type: str, sample: int, data_dir: str, seed: int = 0) -> dict[str, Any]:
+    return {
+        "versao": RESULTS_VERSION,
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "tipo": report_type,
+        "amostra": sample,
+        "inicializacao_s": measure_startup(),
+        "resultados": [run_case(n, report_type, sample, data_dir, seed) for n in rows],
+    }
+
+
+def _phase_seconds(value: Any) -> float:
+    return value["media"] if isinstance(value, dict) else value
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any]) -> list[str]:
+    """Linhas com a variação de cada fase em relação a um resultado anterior."""
+    previous = {case["linhas"]: case for case in baseline.get("resultados", [])}
+    lines = []
+    if "inicializacao_s" in baseline:
+        before, after = baseline["inicializacao_s"], current["inicializacao_s"]
+        change = (after / before - 1) * 100 if before else 0.0
+        lines.append(f"{'inicialização':<27} {before:9.4f}s -> {after:9.4f}s ({change:+.1f}%)")
+    for case in current["resultados"]:
+        old = previous.get(case["linhas"])
+        if old is None:
+            continue
+        for phase, value in case["fases"].items():
+            if phase not in old["fases"]:
+                continue
+            before, after = _phase_seconds(old["fases"][phase]), _phase_seconds(value)
+            change = (after / before - 1) * 100 if before else 0.0
+            lines.append(f"{case['linhas']:>7} linhas  {phase:<12} {before:9.4f}s -> {after:9.4f}s ({change:+.1f}%)")
+    return lines
+
+
+def format_case(case: dict[str, Any]) -> str:
+    fases = case["fases"]
+    return (
+        f"{case['linhas']:>7} linhas, {case['pacientes']:>6} pacientes | "
+        f"carregar {fases['carregar']:.3f}s | agrupar {fases['agrupar']:.3f}s | "
+        f"montar {fases['montar_docx']['media'] * 1000:.1f}ms | "
+        f"salvar {fases['salvar_docx']['media'] * 1000:.1f}ms | "
+        f"xml {fases['motor_xml']['media'] * 1000:.2f}ms (média por relatório)"
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="benchmarks.run", description="Mede o desempenho de cada fase da geração.")
+    parser.add_argument("--linhas", type=int, nargs="+", default=list(DEFAULT_ROWS), help="tamanhos das planilhas sintéticas")
+    parser.add_argument("-t", "--tipo", choices=("PNE", "TIPICO"), default="PNE", type=str.upper)
+    parser.add_argument("--amostra", type=int, default=DEFAULT_SAMPLE, help="pacientes renderizados por tamanho")
+    parser.add_argument(
+        "--dados",
+        default=os.path.join(tempfile.gettempdir(), "gerador_relatorios_bench"),
+        help="pasta onde as planilhas sintéticas são guardadas entre execuções",
+    )
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("-o", "--saida", default="benchmark.json", help="arquivo JSON com os resultados")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparação")
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    results = run(args.linhas, args.tipo, args.amostra, args.dados, args.semente)
+    print(f"inicialização da interface: {results['inicializacao_s'] * 1000:.0f}ms")
+    for case in results["resultados"]:
+        print(format_case(case))
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=1)
+    print(f"Resultados gravados em {args.saida}")
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            for line in compare(results, json.load(f)):
+                print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Gerador de planilhas FUSEX sintéticas para os benchmarks.
+
+As planilhas têm as cinco colunas obrigatórias, pacientes repetidos em
+várias linhas (uma por especialidade, fora de ordem), grafias variadas das
+especialidades e valores ausentes, como nas planilhas reais.
+"""
+from __future__ import annotations
+
+import os
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from gerador_relatorios.data_loader import REQUIRED_COLUMNS
+
+# (grafia na planilha, peso) - várias grafias para a mesma especialidade.
+SPECIALTY_MIX = [
+    ("PSICOTERAPIA", 20),
+    ("Psicoterapia", 8),
+    ("Terapia ABA", 18),
+    ("ABA", 6),
+    ("FONOAUDIOLOGIA", 14),
+    ("Fonoaudiologia", 6),
+    ("TERAPIA OCUPACIONAL", 10),
+    ("Terapia Ocupacional", 4),
+    ("PSICOMOTRICIDADE", 6),
+    ("PSICOPEDAGOGIA", 6),
+    ("NUTRIÇÃO", 5),
+    ("Nutricao", 2),
+    ("FISIOTERAPIA", 5),
+]
+# Especialidades que o relatório Típico não aceita.
+PNE_ONLY = ("NUTRI", "Nutri", "FISIO")
+
+FIRST_NAMES = [
+    "Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Heitor",
+    "Isabela", "João", "Larissa", "Miguel", "Natália", "Otávio", "Paula", "Rafael",
+    "Sofia", "Thiago", "Valentina", "Yuri",
+]
+LAST_NAMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Lima", "Pereira", "Costa", "Rodrigues",
+    "Almeida", "Nascimento", "Araújo", "Barbosa", "Ribeiro", "Martins", "Carvalho",
+]
+MONTHS = ["Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho"]
+
+# Frações de valores ausentes por coluna.
+MISSING_RATES = {
+    "DATA DE NASCIMENTO": 0.02,
+    "RESPONSÁVEL": 0.05,
+    "ESPECIALIDADE": 0.01,
+    "MÊS DE REFERÊNCIA": 0.01,
+}
+
+
+def synthetic_rows(rows: int, report_type: str = "PNE", seed: int = 0) -> pd.DataFrame:
+    """Monta um DataFrame com ``rows`` linhas no formato da planilha FUSEX."""
+    rng = random.Random(seed)
+    mix = [(esp, w) for esp, w in SPECIALTY_MIX if report_type == "PNE" or not esp.startswith(PNE_ONLY)]
+    specialties = [esp for esp, _ in mix]
+    weights = [w for _, w in mix]
+    month = f"{rng.choice(MONTHS)}/2025"
+
+    records: list[dict[str, object]] = []
+    patient = 0
+    while len(records) < rows:
+        patient += 1
+        nome = (
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} "
+            f"{rng.choice(LAST_NAMES)} {patient}"
+        )
+        birth = datetime(2005, 1, 1) + timedelta(days=rng.randrange(6000))
+        # Datas ora como data do Excel, ora como texto.
+        data_nascimento = birth if rng.random() < 0.5 else birth.strftime("%d/%m/%Y")
+        responsavel = f"{rng.choice(FIRST_NAMES)} {nome.split()[1]}"
+        count = min(rng.choice((1, 2, 2, 3, 3, 3, 4, 5)), rows - len(records))
+        for especialidade in rng.choices(specialties, weights, k=count):
+            records.append({
+                "NOME": nome,
+                "DATA DE NASCIMENTO": data_nascimento,
+                "RESPONSÁVEL": responsavel,
+                "ESPECIALIDADE": especialidade,
+                "MÊS DE REFERÊNCIA": month,
+            })
+
+    for record in records:
+        for column, rate in MISSING_RATES.items():
+            if rng.random() < rate:
+                record[column] = None
+    # Linhas do mesmo paciente ficam próximas, mas não contíguas.
+    for i in range(len(records) - 1):
+        if rng.random() < 0.3:
+            j = min(len(records) - 1, i + rng.randrange(1, 20))
+            records[i], records[j] = records[j], records[i]
+    return pd.DataFrame(records, columns=REQUIRED_COLUMNS)
+
+
+def write_workbook(path: str, rows: int, report_type: str = "PNE", seed: int = 0) -> str:
+    synthetic_rows(rows, report_type, seed).to_excel(path, index=False)
+    return path
+
+
+def cached_workbook(directory: str, rows: int, report_type: str = "PNE", seed: int = 0) -> str:
+    """Caminho da planilha sintética em ``directory``, gerando-a se ainda não existir."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"fusex_sintetico_{report_type}_{rows}_{seed}.xlsx")
+    if not os.path.exists(path):
+        write_workbook(path, rows, report_type, seed)
+    return path
@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from multiprocessing.connection import wait
+from typing import Any, Iterable, Iterator, Mapping, Tuple
+
+from .metrics import timing
+from .models import PatientData
+from .reports import document_bytes, generate_report, report_filename
+from .template_cache import get_template_cache
+from .utils import peak_memory_mb
+from .xml_renderer import render_report, write_report
+
+# "xml" usa os esqueletos compilados de `xml_renderer`; "docx" monta cada
+# documento com o python-docx. Os dois produzem o mesmo arquivo.
+ENGINES = ("xml", "docx")
+DEFAULT_ENGINE = "xml"
+
+DEFAULT_MAX_TASKS_PER_CHILD = 200
+DEFAULT_MAX_WORKER_MEMORY_MB = 512.0
+# Tarefas enviadas a cada worker antes da resposta da anterior, para que ele
+# não fique parado esperando a próxima.
+TASKS_IN_FLIGHT_PER_WORKER = 2
+# Quantas tarefas (por worker) podem estar à frente do primeiro resultado
+# ainda não devolvido; limita a memória quando um relatório demora.
+TASKS_AHEAD_PER_WORKER = 16
+# Tempo para um worker encerrar sozinho antes de ser terminado.
+WORKER_STOP_TIMEOUT = 5.0
+WORKER_CRASHED = "O processo de geração foi encerrado inesperadamente."
+
+Task = Tuple[str, PatientData, str, "str | None", str]
+
+
+@dataclass
+class ReportResult:
+    """Resultado da geração do relatório de um paciente."""
+
+    nome: str
+    ok: bool
+    path: str | None
+    elapsed: float
+    error: str | None = None
+    worker_memory_mb: float = 0.0
+    # Preenchidos quando o lote é gerado em memória (``output_dir=None``).
+    filename: str | None = None
+    data: bytes | None = None
+    # Duração de cada fase do relatório (ver ``metrics``).
+    phases: dict[str, float] = field(default_factory=dict)
+
+
+def default_workers() -> int:
+    return max(1, os.cpu_count() or 1)
+
+
+def init_worker() -> None:
+    """Carrega o papel timbrado no processo atual (inicializador de workers)."""
+    get_template_cache().warm()
+
+
+def render_task(task: Task) -> ReportResult:
+    """Gera o relatório de uma tarefa ``(nome, patient_data, report_type, output_dir, engine)``.
+
+    Erros da geração voltam em ``ReportResult.error``; com ``output_dir=None``
+    o documento vem em ``data``. Pode ser enviada a qualquer pool de processos.
+    """
+    nome, patient_data, report_type, output_dir, engine = task
+    start = time.perf_counter()
+    path = data = filename = None
+    with timing() as timer:
+        try:
+            if output_dir is None:
+                filename = report_filename(patient_data, report_type)
+                if engine == "xml":
+                    data = render_report(patient_data, report_type)
+                else:
+                    data = document_bytes(patient_data, report_type)
+            elif engine == "xml":
+                path = write_report(patient_data, output_dir, report_type)
+            else:
+                path = generate_report(patient_data, output_dir, report_type)
+        except Exception as e:
+            return ReportResult(
+                nome, False, None, time.perf_counter() - start, str(e), peak_memory_mb(),
+                filename, phases=timer.phases,
+            )
+    return ReportResult(
+        nome, True, path, time.perf_counter() - start, None, peak_memory_mb(),
+        filename, data, timer.phases,
+    )
+
+
+def _worker_main(conn: Any, max_tasks: int | None, max_memory_mb: float | None) -> None:
+    """Laço de um worker: recebe ``(índice, tarefa)`` e responde ``(índice, resultado, aposentar)``.
+
+    Depois de ``max_tasks`` relatórios, ou quando o próprio pico de memória
+    passa de ``max_memory_mb``, o worker avisa na resposta e encerra; só ele
+    é substituído, os demais continuam com o papel timbrado já carregado.
+    """
+    init_worker()
+    done = 0
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        index, task = message
+        result = render_task(task)
+        done += 1
+        retire = (max_tasks is not None and done >= max_tasks) or (
+            max_memory_mb is not None and result.worker_memory_mb > max_memory_mb
+        )
+        conn.send((index, result, retire))
+        if retire:
+            return
+
+
+class _Worker:
+    """Processo de geração com um canal próprio e as tarefas enviadas a ele."""
+
+    def __init__(self, ctx: Any, max_tasks: int | None, max_memory_mb: float | None) -> None:
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child, max_tasks, max_memory_mb), daemon=True)
+        self.process.start()
+        child.close()
+        self.pending: deque[int] = deque()
+
+    def send(self, index: int, task: Task) -> None:
+        self.conn.send((index, task))
+        self.pending.append(index)
+
+    def stop(self, terminate: bool = False) -> None:
+        if not terminate:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+            self.process.join(WORKER_STOP_TIMEOUT)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.conn.close()
+
+
+class ReportPool:
+    """Pool de processos que gera relatórios em paralelo.
+
+    Cada worker carrega o papel timbrado uma única vez. Os resultados são
+    devolvidos na mesma ordem das tarefas, à medida que ficam prontos. Um
+    worker é substituído sozinho após ``max_tasks_per_child`` relatórios ou
+    quando o seu pico de memória passa de ``max_worker_memory_mb``
+    (``recycles`` conta as substituições); se ele morrer no meio de um
+    relatório, esse relatório volta como erro e os seguintes vão para o
+    substituto. Com ``workers=1`` tudo roda no processo atual.
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        max_tasks_per_child: int | None = DEFAULT_MAX_TASKS_PER_CHILD,
+        max_worker_memory_mb: float | None = DEFAULT_MAX_WORKER_MEMORY_MB,
+    ) -> None:
+        self.workers = workers if workers is not None else default_workers()
+        if self.workers < 1:
+            raise ValueError("O número de workers deve ser pelo menos 1.")
+        self.max_tasks_per_child = max_tasks_per_child
+        self.max_worker_memory_mb = max_worker_memory_mb
+        self.recycles = 0
+        self._ctx = multiprocessing.get_context("spawn")
+        self._workers: list[_Worker] = []
+
+    def __enter__(self) -> "ReportPool":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _start_worker(self) -> _Worker:
+        return _Worker(self._ctx, self.max_tasks_per_child, self.max_worker_memory_mb)
+
+    def _ensure_workers(self) -> list[_Worker]:
+        while len(self._workers) < self.workers:
+            self._workers.append(self._start_worker())
+        return self._workers
+
+    def close(self) -> None:
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop(terminate=bool(worker.pending))
+
+    def imap(self, tasks: Iterable[Task]) -> Iterator[ReportResult]:
+        """Executa as tarefas ``(nome, patient_data, report_type, output_dir, engine)``."""
+        if self.workers == 1:
+            get_template_cache().warm()
+            for task in tasks:
+                yield render_task(task)
+            return
+
+        tasks = iter(tasks)
+        workers = self._ensure_workers()
+        sent: dict[int, Task] = {}
+        results: dict[int, ReportResult] = {}
+        next_index = next_result = 0
+        exhausted = False
+        max_ahead = self.workers * TASKS_AHEAD_PER_WORKER
+        try:
+            while True:
+                for worker in workers:
+                    while (
+                        not exhausted
+                        and len(worker.pending) < TASKS_IN_FLIGHT_PER_WORKER
+                        and next_index - next_result < max_ahead
+                    ):
+                        task = next(tasks, None)
+                        if task is None:
+                            exhausted = True
+                            break
+                        sent[next_index] = task
+                        worker.send(next_index, task)
+                        next_index += 1
+                while next_result in results:
+                    yield results.pop(next_result)
+                    next_result += 1
+                if exhausted and next_result == next_index:
+                    return
+                ready = wait([w.conn for w in workers] + [w.process.sentinel for w in workers])
+                for i, worker in enumerate(workers):
+                    if worker.conn not in ready and worker.process.sentinel not in ready:
+                        continue
+                    replace = crashed = False
+                    try:
+                        while worker.conn.poll():
+                            index, result, retire = worker.conn.recv()
+                            worker.pending.popleft()
+                            del sent[index]
+                            results[index] = result
+                            if retire:
+                                replace = True
+                                break
+                    except (EOFError, OSError):
+                        crashed = True
+                    if not replace and (crashed or not worker.process.is_alive()):
+                        replace = crashed = True
+                    if not replace:
+                        continue
+                    if crashed and worker.pending:
+                        index = worker.pending.popleft()
+                        results[index] = ReportResult(sent.pop(index)[0], False, None, 0.0, WORKER_CRASHED)
+                    # As tarefas que ficaram no canal vão para o substituto.
+                    worker.stop(terminate=crashed)
+                    workers[i] = self._start_worker()
+                    for index in worker.pending:
+                        workers[i].send(index, sent[index])
+                    self.recycles += 1
+        finally:
+            # Um imap abandonado no meio não pode deixar respostas para o próximo.
+            busy = [w for w in workers if w.pending]
+            for worker in busy:
+                worker.stop(terminate=True)
+            self._workers = [w for w in workers if not w.pending]
+
+
+def generate_batch(
+    patients: Mapping[str, PatientData],
+    report_type: str,
+    output_dir: str | None,
+    workers: int | None = None,
+    max_tasks_per_child: int | None = DEFAULT_MAX_TASKS_PER_CHILD,
+    max_worker_memory_mb: float | None = DEFAULT_MAX_WORKER_MEMORY_MB,
+    engine: str = DEFAULT_ENGINE,
+) -> Iterator[ReportResult]:
+    """Gera os relatórios de todos os pacientes, devolvendo um resultado por paciente em ordem.
+
+    Com ``output_dir=None`` nada é gravado em disco: cada resultado traz o
+    conteúdo do .docx em ``data`` e o nome do arquivo em ``filename``.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Motor de geração desconhecido: {engine}")
+    tasks = ((str(nome), pdata, report_type, output_dir, engine) for nome, pdata in patients.items())
+    with ReportPool(workers, max_tasks_per_child, max_worker_memory_mb) as pool:
+        yield from pool.imap(tasks)
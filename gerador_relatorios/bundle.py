@@ -0,0 +1,95 @@
+"""Gravação de todos os relatórios de um lote em um único arquivo .zip.
+
+Em pastas de rede, criar milhares de arquivos pequenos custa mais do que
+gerar os relatórios. Aqui cada relatório é acrescentado ao pacote assim que
+fica pronto (gravação sequencial, sem manter o lote em memória) e, ao final,
+é incluído um índice com a situação de cada paciente.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import os
+import zipfile
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .batch import ReportResult
+
+INDEX_FILE = "indice.csv"
+INDEX_COLUMNS = ("nome", "arquivo", "status", "tamanho", "erro")
+
+
+def bundle_filename(report_type: str = "PNE") -> str:
+    return "Relatórios_PNE.zip" if report_type == "PNE" else "Relatórios_Típico.zip"
+
+
+class BundleWriter:
+    """Acrescenta os relatórios gerados a um arquivo .zip.
+
+    Os .docx já são comprimidos, então entram no pacote sem nova compressão.
+    O arquivo é montado em ``<path>.tmp`` e só substitui ``path`` em
+    ``close``; se o bloco ``with`` terminar com exceção, o temporário é
+    apagado.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._tmp_path = path + ".tmp"
+        self._zip = zipfile.ZipFile(self._tmp_path, "w", compression=zipfile.ZIP_STORED)
+        self._names: set[str] = set()
+        self._index: list[tuple[str, str, str, int, str]] = []
+        self.written = 0
+        self.failed = 0
+
+    def __enter__(self) -> "BundleWriter":
+        return self
+
+    def __exit__(self, exc_type: object, *exc: object) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _unique_name(self, filename: str) -> str:
+        name, ext = os.path.splitext(filename)
+        candidate, n = filename, 1
+        while candidate.lower() in self._names:
+            n += 1
+            candidate = f"{name}_{n}{ext}"
+        self._names.add(candidate.lower())
+        return candidate
+
+    def add(self, result: ReportResult) -> None:
+        """Grava o relatório do resultado (gerado com ``output_dir=None``) e o registra no índice."""
+        if result.ok and result.data is not None:
+            arcname = self._unique_name(result.filename or f"{result.nome}.docx")
+            self._zip.writestr(arcname, result.data)
+            self._index.append((result.nome, arcname, "OK", len(result.data), ""))
+            self.written += 1
+        else:
+            self._index.append((result.nome, "", "ERRO", 0, result.error or ""))
+            self.failed += 1
+
+    def _index_bytes(self) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=";", lineterminator="\n")
+        writer.writerow(INDEX_COLUMNS)
+        writer.writerows(self._index)
+        # BOM para o Excel reconhecer a acentuação.
+        return buffer.getvalue().encode("utf-8-sig")
+
+    def close(self) -> None:
+        if self._zip.fp is None:
+            return
+        self._zip.writestr(INDEX_FILE, self._index_bytes(), compress_type=zipfile.ZIP_DEFLATED)
+        self._zip.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self) -> None:
+        if self._zip.fp is not None:
+            self._zip.close()
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
@@ -0,0 +1,315 @@
+"""Geração de relatórios em lote pela linha de comando (sem interface gráfica).
+
+Uso::
+
+    python -m gerador_relatorios planilha.xlsx --tipo PNE --saida relatorios/ --workers 4
+    python -m gerador_relatorios unidade1.xlsx unidade2.xlsx --todas-abas --saida relatorios/
+
+Códigos de saída:
+
+* ``0`` - todos os relatórios foram gerados;
+* ``1`` - um ou mais relatórios, ou alguma das planilhas, falharam (os demais foram gerados);
+* ``2`` - entrada inválida (argumentos, nenhuma planilha com as colunas obrigatórias ou
+  lote com erros de validação - ver ``validation``).
+
+Um paciente com erro não interrompe o lote. Gerando na pasta (sem ``--zip``),
+cada relatório concluído é anotado em um diário (``journal``): se o lote for
+interrompido, rodar o mesmo comando de novo gera só o que faltou.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import os
+import sys
+import time
+from typing import Sequence, TextIO
+
+from . import data_loader
+from .batch import DEFAULT_ENGINE, ENGINES, ReportResult, default_workers, generate_batch
+from .bundle import BundleWriter, bundle_filename
+from .data_loader import SourceError
+from .journal import BatchJournal
+from .manifest import IncrementalPlan
+from .metrics import GROUP, LOAD, BatchMetrics, Capture
+from .models import PatientRecord
+from .pipeline import directory_sink, iter_patients, stream_reports
+from .sheet_cache import SheetCache
+from .validation import format_issues, has_errors, validate_batch
+
+EXIT_OK = 0
+EXIT_PARTIAL_FAILURE = 1
+EXIT_INVALID_INPUT = 2
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="gerador_relatorios",
+        description="Gera os relatórios FUSEX a partir de uma planilha, sem abrir a interface gráfica.",
+    )
+    parser.add_argument(
+        "planilhas",
+        nargs="+",
+        metavar="planilha",
+        help="arquivo(s) Excel (.xlsx/.xls) com as colunas obrigatórias; vários arquivos viram um único lote",
+    )
+    parser.add_argument(
+        "--todas-abas",
+        action="store_true",
+        help="lê todas as abas de cada arquivo (por padrão só a primeira)",
+    )
+    parser.add_argument(
+        "-t", "--tipo",
+        choices=("PNE", "TIPICO"),
+        default="PNE",
+        type=str.upper,
+        help="tipo de relatório (padrão: PNE)",
+    )
+    parser.add_argument("-o", "--saida", required=True, help="pasta onde os relatórios serão salvos")
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=default_workers(),
+        help="número de processos em paralelo (padrão: número de CPUs)",
+    )
+    parser.add_argument(
+        "--motor",
+        choices=ENGINES,
+        default=DEFAULT_ENGINE,
+        help="xml: esqueletos pré-compilados (rápido); docx: python-docx por relatório (padrão: xml)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="gera apenas os relatórios de pacientes novos ou alterados desde a última execução na mesma pasta",
+    )
+    parser.add_argument(
+        "--zip",
+        action="store_true",
+        help="grava todos os relatórios em um único arquivo .zip na pasta de saída, com um índice (indice.csv)",
+    )
+    parser.add_argument(
+        "--fluxo",
+        action="store_true",
+        help="lê, agrupa, gera e grava em fluxo contínuo, com memória limitada (para planilhas muito grandes)",
+    )
+    parser.add_argument(
+        "--ordenada",
+        action="store_true",
+        help="com --fluxo: a planilha já está ordenada por paciente (dispensa o arquivo temporário de agrupamento)",
+    )
+    parser.add_argument(
+        "--recomecar",
+        action="store_true",
+        help="ignora o diário de um lote interrompido na mesma pasta e gera tudo de novo",
+    )
+    parser.add_argument(
+        "--sem-cache",
+        action="store_true",
+        help="não usa o cache em disco de planilhas já carregadas",
+    )
+    parser.add_argument(
+        "--sem-validacao",
+        action="store_true",
+        help="não confere o lote antes de gerar (pacientes com problema falham um a um)",
+    )
+    parser.add_argument(
+        "--metricas",
+        metavar="ARQUIVO",
+        help="grava um resumo de desempenho em JSON (p50/p95 por relatório e por fase, rel/s, pico de memória)",
+    )
+    parser.add_argument(
+        "--perfil",
+        action="store_true",
+        help="executa com cProfile e tracemalloc em um único processo e grava o perfil em <saida>/perfil.prof",
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="não exibe o progresso por relatório")
+    return parser
+
+
+def format_progress(result: ReportResult, done: int, total: int | None, started: float) -> str:
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    status = "OK  " if result.ok else "ERRO"
+    counter = f"{done:>{len(str(total))}}/{total}" if total is not None else str(done)
+    line = (
+        f"[{counter}] {status} {result.nome} "
+        f"({result.elapsed:.2f}s, {done / elapsed:.1f} rel/s)"
+    )
+    if not result.ok:
+        line += f": {result.error}"
+    return line
+
+
+def run(args: argparse.Namespace, out: TextIO | None = None) -> int:
+    out = out or sys.stdout
+    if args.workers < 1:
+        print("Erro: --workers deve ser pelo menos 1.", file=sys.stderr)
+        return EXIT_INVALID_INPUT
+    if args.incremental and (args.zip or args.fluxo):
+        option = "--zip" if args.zip else "--fluxo"
+        print(f"Erro: {option} não pode ser usado com --incremental.", file=sys.stderr)
+        return EXIT_INVALID_INPUT
+    if args.ordenada and not args.fluxo:
+        print("Erro: --ordenada só vale junto com --fluxo.", file=sys.stderr)
+        return EXIT_INVALID_INPUT
+    if args.fluxo and (len(args.planilhas) > 1 or args.todas_abas):
+        print("Erro: --fluxo aceita uma única planilha (sem --todas-abas).", file=sys.stderr)
+        return EXIT_INVALID_INPUT
+
+    metrics = BatchMetrics()
+    capture = None
+    workers = args.workers
+    if args.perfil:
+        # O cProfile só enxerga o processo atual.
+        capture = metrics.capture = Capture()
+        workers = 1
+
+    plan = None
+    source_errors: list[SourceError] = []
+    patient_data: dict[str, PatientRecord] = {}
+    total: int | None = None
+    if args.fluxo:
+        try:
+            patients = iter_patients(args.planilhas[0], presorted=args.ordenada)
+        except Exception as e:
+            print(f"Erro ao carregar arquivo: {e}", file=sys.stderr)
+            return EXIT_INVALID_INPUT
+        print("🌊 Modo em fluxo - os relatórios são gerados enquanto a planilha é lida", file=out)
+    else:
+        started = time.perf_counter()
+        try:
+            cache = None if args.sem_cache else SheetCache()
+            with metrics.phase(LOAD):
+                data, source_errors = data_loader.load_many(
+                    args.planilhas, args.todas_abas, workers=workers, cache=cache
+                )
+        except Exception as e:
+            print(f"Erro ao carregar arquivo: {e}", file=sys.stderr)
+            return EXIT_INVALID_INPUT
+        for error in source_errors:
+            print(f"⚠️ {error.source} não foi carregada: {error.error}", file=sys.stderr)
+        with metrics.phase(GROUP):
+            patient_data = data_loader.group_patients(data)
+        total = len(patient_data)
+        print(
+            f"📊 {len(data)} registros, {total} pacientes carregados em "
+            f"{time.perf_counter() - started:.2f}s",
+            file=out,
+        )
+        if not args.sem_validacao:
+            issues = validate_batch(patient_data, args.tipo)
+            if issues:
+                print(format_issues(issues), file=sys.stderr)
+            if has_errors(issues):
+                print(
+                    "Erro: a planilha tem problemas; nenhum relatório foi gerado "
+                    "(use --sem-validacao para gerar os demais mesmo assim).",
+                    file=sys.stderr,
+                )
+                return EXIT_INVALID_INPUT
+
+    os.makedirs(args.saida, exist_ok=True)
+    if args.incremental:
+        plan = IncrementalPlan(patient_data, args.tipo, args.saida)
+        patient_data = plan.to_render
+        total = len(patient_data)
+        print(f"♻️ Modo incremental - {plan.summary()}", file=out)
+
+    bundle = None
+    journal = None
+    if args.zip:
+        bundle = BundleWriter(os.path.join(args.saida, bundle_filename(args.tipo)))
+    elif plan is None:
+        # O modo incremental já retoma pelo manifesto.
+        journal = BatchJournal(args.saida, args.tipo, resume=not args.recomecar)
+        if args.fluxo:
+            patients = journal.iter_pending(patients)
+        else:
+            patient_data = journal.pending(patient_data)
+            total = len(patient_data)
+            if journal.resumed:
+                print(f"♻️ Retomando lote interrompido - {journal.resumed} relatório(s) já gerado(s)", file=out)
+
+    if args.fluxo:
+        sink = bundle.add if bundle is not None else directory_sink(args.saida)
+        results = stream_reports(patients, args.tipo, sink, workers=workers, engine=args.motor)
+    else:
+        results = generate_batch(
+            patient_data,
+            args.tipo,
+            None if bundle is not None else args.saida,
+            workers=workers,
+            engine=args.motor,
+        )
+
+    started = time.perf_counter()
+    metrics.start()
+    failures = 0
+    done = 0
+    try:
+        with capture if capture is not None else contextlib.nullcontext():
+            for result in results:
+                done += 1
+                metrics.add(result)
+                if not result.ok:
+                    failures += 1
+                if bundle is not None and not args.fluxo:
+                    bundle.add(result)
+                if plan is not None:
+                    plan.record(result)
+                if journal is not None:
+                    journal.record(result)
+                if not args.quiet or not result.ok:
+                    print(format_progress(result, done, total, started), file=out, flush=True)
+    except ValueError as e:
+        # No modo em fluxo a planilha é lida durante a geração.
+        if bundle is not None:
+            bundle.abort()
+        if not args.fluxo:
+            raise
+        print(f"Erro ao carregar arquivo: {e}", file=sys.stderr)
+        return EXIT_INVALID_INPUT
+    except BaseException:
+        if bundle is not None:
+            bundle.abort()
+        raise
+    finally:
+        if plan is not None:
+            plan.save()
+        if journal is not None:
+            journal.close()
+    if journal is not None and not failures:
+        journal.finish()
+    if bundle is not None:
+        bundle.close()
+        print(f"📦 Pacote: {bundle.path}", file=out)
+
+    elapsed = time.perf_counter() - started
+    rate = done / elapsed if elapsed > 0 else 0.0
+    if args.fluxo and journal is not None and journal.resumed:
+        print(f"♻️ Retomado: {journal.resumed} relatório(s) já gerado(s) foram pulados", file=out)
+    print(
+        f"{'✅' if not failures else '⚠️'} {done - failures}/{total if total is not None else done} "
+        f"relatórios gerados em {elapsed:.2f}s ({rate:.1f} rel/s)",
+        file=out,
+    )
+    if done:
+        print(metrics.format_summary(), file=out)
+    if args.metricas:
+        metrics.write(args.metricas)
+        print(f"📈 Métricas: {args.metricas}", file=out)
+    if capture is not None:
+        profile_path = os.path.join(args.saida, "perfil.prof")
+        capture.dump(profile_path)
+        print(capture.top(), file=out)
+        print(f"🔬 Perfil: {profile_path}", file=out)
+    return EXIT_PARTIAL_FAILURE if failures or source_errors else EXIT_OK
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
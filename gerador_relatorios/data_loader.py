@@ -1,7 +1,18 @@
 from __future__ import annotations
 
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Sequence
+
 import pandas as pd
 
+from .models import PatientRecord
+
+if TYPE_CHECKING:
+    from .sheet_cache import SheetCache
+
 REQUIRED_COLUMNS = [
     "NOME",
     "DATA DE NASCIMENTO",
@@ -10,13 +21,343 @@ REQUIRED_COLUMNS = [
     "MÊS DE REFERÊNCIA",
 ]
 
+# Incrementar sempre que o resultado de `load_excel` mudar de formato, para
+# invalidar as planilhas guardadas no cache em disco.
+LOADER_VERSION = 1
+
+# Coluna acrescentada por `load_many` com a planilha (e aba) de cada linha.
+SOURCE_COLUMN = "ORIGEM"
+
+MISSING_NAME = "Nome não informado"
+MISSING_BIRTH_DATE = "Data não informada"
+NOT_INFORMED = "Não informado"
+
+
+# Quantidade de linhas lidas da planilha por bloco.
+CHUNK_SIZE = 5000
+# Tipos explícitos das colunas lidas; a conversão para texto acontece em
+# `normalize_columns`, já que as células podem conter datas, números e textos.
+COLUMN_DTYPES = {column: object for column in REQUIRED_COLUMNS}
+_OPENPYXL_EXTENSIONS = (".xlsx", ".xlsm", ".xltx", ".xltm")
+
 
-def load_excel(path: str) -> pd.DataFrame:
-    """Carrega um arquivo Excel e valida as colunas obrigatórias."""
-    data = pd.read_excel(path)
-    missing = [c for c in REQUIRED_COLUMNS if c not in data.columns]
+def _check_columns(header: Iterable[Any]) -> None:
+    header = list(header)
+    missing = [c for c in REQUIRED_COLUMNS if c not in header]
     if missing:
         raise ValueError(
             f"Colunas obrigatórias não encontradas: {', '.join(missing)}"
         )
+
+
+def _iter_openpyxl_chunks(path: str, chunk_size: int, sheet: str | None) -> Iterator[pd.DataFrame]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet is not None else workbook.worksheets[0]
+        header = next(worksheet.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        _check_columns(header)
+
+        header = list(header)
+        indexes = [header.index(c) for c in REQUIRED_COLUMNS]
+        width = max(indexes) + 1
+        rows: list[tuple[Any, ...]] = []
+        for values in worksheet.iter_rows(min_row=2, max_col=width, values_only=True):
+            if len(values) < width:
+                values = values + (None,) * (width - len(values))
+            row = tuple(values[i] for i in indexes)
+            if all(v is None for v in row):
+                continue
+            rows.append(row)
+            if len(rows) >= chunk_size:
+                yield pd.DataFrame(rows, columns=REQUIRED_COLUMNS).astype(COLUMN_DTYPES)
+                rows = []
+        if rows:
+            yield pd.DataFrame(rows, columns=REQUIRED_COLUMNS).astype(COLUMN_DTYPES)
+    finally:
+        workbook.close()
+
+
+def iter_excel_chunks(
+    path: str, chunk_size: int = CHUNK_SIZE, sheet: str | None = None
+) -> Iterator[pd.DataFrame]:
+    """Lê apenas as colunas obrigatórias da planilha, em blocos de ``chunk_size`` linhas.
+
+    O cabeçalho é lido primeiro: se faltar alguma coluna obrigatória o erro é
+    gerado antes de qualquer linha de dados ser processada. Arquivos ``.xlsx``
+    são percorridos em modo somente leitura; outros formatos (``.xls``) são
+    lidos pelo pandas com ``usecols``.
+    """
+    if str(path).lower().endswith(_OPENPYXL_EXTENSIONS):
+        yield from _iter_openpyxl_chunks(path, chunk_size, sheet)
+        return
+
+    sheet_name = sheet if sheet is not None else 0
+    _check_columns(pd.read_excel(path, sheet_name=sheet_name, nrows=0).columns)
+    data = pd.read_excel(path, sheet_name=sheet_name, usecols=REQUIRED_COLUMNS, dtype=COLUMN_DTYPES)
+    data = data[REQUIRED_COLUMNS]
+    for start in range(0, len(data), chunk_size):
+        yield data.iloc[start:start + chunk_size].reset_index(drop=True)
+
+
+def load_excel(
+    path: str,
+    progress: Callable[[int], None] | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    sheet: str | None = None,
+    cache: SheetCache | None = None,
+) -> pd.DataFrame:
+    """Carrega um arquivo Excel, valida as colunas obrigatórias e normaliza os dados.
+
+    Apenas as colunas obrigatórias são mantidas. ``progress``, se informado,
+    recebe o número de linhas lidas até o momento a cada bloco. Com ``cache``,
+    uma planilha já carregada antes (mesmo conteúdo) é lida do disco.
+    """
+    key = None
+    if cache is not None:
+        key = cache.key_for(path, sheet)
+        cached = cache.get(key)
+        if cached is not None:
+            if progress is not None:
+                progress(len(cached))
+            return cached
+
+    data = _read_excel(path, progress, chunk_size, sheet)
+    if cache is not None and key is not None:
+        cache.put(key, data)
     return data
+
+
+def _read_excel(
+    path: str,
+    progress: Callable[[int], None] | None,
+    chunk_size: int,
+    sheet: str | None,
+) -> pd.DataFrame:
+    chunks = []
+    rows = 0
+    for chunk in iter_excel_chunks(path, chunk_size, sheet):
+        chunks.append(normalize_columns(chunk))
+        rows += len(chunk)
+        if progress is not None:
+            progress(rows)
+    if not chunks:
+        return normalize_columns(pd.DataFrame(columns=REQUIRED_COLUMNS).astype(COLUMN_DTYPES))
+    return pd.concat(chunks, ignore_index=True)
+
+
+@dataclass(frozen=True)
+class Source:
+    """Uma planilha, ou uma aba dela, a ser carregada por ``load_many``."""
+
+    path: str
+    sheet: str | None = None
+
+    @property
+    def label(self) -> str:
+        name = os.path.basename(self.path)
+        return f"{name} [{self.sheet}]" if self.sheet is not None else name
+
+
+@dataclass
+class SourceError:
+    """Planilha (ou aba) que não pôde ser carregada."""
+
+    source: str
+    error: str
+
+
+def sheet_names(path: str) -> list[str]:
+    """Nomes das abas da planilha, na ordem do arquivo."""
+    if str(path).lower().endswith(_OPENPYXL_EXTENSIONS):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True)
+        try:
+            return list(workbook.sheetnames)
+        finally:
+            workbook.close()
+    with pd.ExcelFile(path) as workbook:
+        return [str(name) for name in workbook.sheet_names]
+
+
+def list_sources(paths: Iterable[str], all_sheets: bool = False) -> tuple[list[Source], list[SourceError]]:
+    """Fontes a carregar: a primeira aba de cada arquivo ou, com ``all_sheets``, todas."""
+    sources: list[Source] = []
+    errors: list[SourceError] = []
+    for path in paths:
+        if not all_sheets:
+            sources.append(Source(path))
+            continue
+        try:
+            names = sheet_names(path)
+        except Exception as e:
+            errors.append(SourceError(os.path.basename(path), str(e)))
+            continue
+        sources.extend(Source(path, name) for name in names)
+    return sources, errors
+
+
+def _load_source(source: Source, cache: SheetCache | None) -> pd.DataFrame:
+    return load_excel(source.path, sheet=source.sheet, cache=cache)
+
+
+def load_many(
+    paths: Sequence[str],
+    all_sheets: bool = False,
+    workers: int | None = None,
+    progress: Callable[[int], None] | None = None,
+    cache: SheetCache | None = None,
+) -> tuple[pd.DataFrame, list[SourceError]]:
+    """Carrega várias planilhas (e/ou todas as abas) em um único lote.
+
+    Cada fonte é lida e validada separadamente, em paralelo em até
+    ``workers`` processos, e recebe a coluna ``ORIGEM`` com o nome do
+    arquivo (e da aba). As linhas são concatenadas na ordem das fontes; uma
+    fonte com erro (arquivo inválido, colunas faltando...) vai para a lista
+    de erros em vez de interromper as demais. Só é gerado ``ValueError``
+    quando nenhuma fonte pôde ser carregada. ``progress`` recebe o total de
+    linhas carregadas a cada fonte concluída.
+    """
+    sources, errors = list_sources(paths, all_sheets)
+    workers = min(workers if workers is not None else os.cpu_count() or 1, len(sources))
+    frames: list[pd.DataFrame | None] = [None] * len(sources)
+    failures: list[str | None] = [None] * len(sources)
+    rows = 0
+
+    if workers <= 1:
+        for i, source in enumerate(sources):
+            try:
+                frames[i] = load_excel(
+                    source.path,
+                    progress=None if progress is None else lambda n: progress(rows + n),
+                    sheet=source.sheet,
+                    cache=cache,
+                )
+                rows += len(frames[i])
+            except Exception as e:
+                failures[i] = str(e)
+    else:
+        executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+        futures: dict[Future[pd.DataFrame], int] = {}
+        try:
+            for i, source in enumerate(sources):
+                futures[executor.submit(_load_source, source, cache)] = i
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    frames[i] = future.result()
+                    rows += len(frames[i])
+                except Exception as e:
+                    failures[i] = str(e)
+                if progress is not None:
+                    progress(rows)
+        finally:
+            # `shutdown(cancel_futures=True)` só existe a partir do Python 3.9.
+            for future in futures:
+                future.cancel()
+            executor.shutdown()
+
+    errors += [SourceError(s.label, e) for s, e in zip(sources, failures) if e is not None]
+    loaded = [f.assign(**{SOURCE_COLUMN: s.label}) for s, f in zip(sources, frames) if f is not None]
+    if not loaded:
+        if not errors:
+            raise ValueError("Nenhuma planilha informada.")
+        raise ValueError(
+            "Nenhuma planilha pôde ser carregada:\n"
+            + "\n".join(f"{e.source}: {e.error}" for e in errors)
+        )
+    return pd.concat(loaded, ignore_index=True), errors
+
+
+def _as_text(column: pd.Series, default: str) -> pd.Series:
+    return column.map(str, na_action="ignore").where(column.notna(), default).astype(str)
+
+
+def format_birth_dates(column: pd.Series) -> pd.Series:
+    """Converte a coluna DATA DE NASCIMENTO em texto para exibição (DD/MM/AAAA).
+
+    Datas viram ``DD/MM/AAAA``; textos com "/" perdem a parte do horário;
+    valores ausentes viram ``"Data não informada"``.
+    """
+    missing = column.isna()
+    if pd.api.types.is_datetime64_any_dtype(column):
+        formatted = column.dt.strftime("%d/%m/%Y")
+    else:
+        text = column.map(str, na_action="ignore")
+        formatted = text.where(
+            ~text.str.contains("/", regex=False, na=False),
+            text.str.split(" ", n=1).str[0],
+        )
+        types = column.map(type)
+        date_types = [t for t in types.unique() if hasattr(t, "strftime")]
+        if date_types:
+            is_date = types.isin(date_types) & ~missing
+            dates = pd.to_datetime(column[is_date], errors="coerce")
+            as_date = dates.dt.strftime("%d/%m/%Y")
+            formatted = formatted.astype(object)
+            formatted[is_date] = as_date.where(dates.notna(), text[is_date])
+    return formatted.where(~missing, MISSING_BIRTH_DATE).astype(str)
+
+
+def normalize_columns(data: pd.DataFrame) -> pd.DataFrame:
+    """Prepara as colunas obrigatórias para exibição e geração.
+
+    Executada uma única vez no carregamento: formata a data de nascimento e
+    preenche NOME, RESPONSÁVEL e MÊS DE REFERÊNCIA ausentes, de forma que a
+    pré-visualização e o agrupamento apenas leiam as colunas prontas.
+    ESPECIALIDADE é convertida para texto mas continua ausente quando vazia
+    (linhas sem especialidade são ignoradas no agrupamento).
+    """
+    data = data.copy()
+    data["NOME"] = _as_text(data["NOME"], MISSING_NAME)
+    data["DATA DE NASCIMENTO"] = format_birth_dates(data["DATA DE NASCIMENTO"])
+    data["RESPONSÁVEL"] = _as_text(data["RESPONSÁVEL"], NOT_INFORMED)
+    data["MÊS DE REFERÊNCIA"] = _as_text(data["MÊS DE REFERÊNCIA"], NOT_INFORMED)
+    data["ESPECIALIDADE"] = data["ESPECIALIDADE"].map(str, na_action="ignore").infer_objects()
+    return data
+
+
+def group_patients(data: pd.DataFrame) -> dict[str, PatientRecord]:
+    """Agrupa as linhas (já normalizadas) da planilha por paciente.
+
+    Retorna ``{nome: PatientRecord}`` (ver ``models``), com as especialidades
+    sem repetição e na ordem em que aparecem na planilha, e ``categorias``
+    com as especialidades canônicas já classificadas (ver ``specialties``).
+    Os dados do paciente vêm da primeira linha em que o nome aparece.
+    """
+    codes = data.groupby("NOME", sort=False, dropna=False).ngroup().to_numpy()
+    first = data.loc[~pd.Series(codes).duplicated().to_numpy()]
+
+    especialidades = data["ESPECIALIDADE"]
+    has_esp = especialidades.notna().to_numpy()
+    esp = pd.DataFrame({
+        "code": codes[has_esp],
+        "esp": especialidades[has_esp].map(str).to_numpy(),
+    }).drop_duplicates()
+    esp_lists = esp.groupby("code", sort=False)["esp"].agg(list).to_dict()
+
+    infos = zip(
+        first["NOME"].tolist(),
+        first["DATA DE NASCIMENTO"].tolist(),
+        first["RESPONSÁVEL"].tolist(),
+        first["MÊS DE REFERÊNCIA"].tolist(),
+    )
+    patient_data: dict[str, PatientRecord] = {}
+    for code, (nome, data_nascimento, responsavel, mes_referencia) in enumerate(infos):
+        patient_data[nome] = make_patient(
+            nome, data_nascimento, responsavel, mes_referencia, esp_lists.get(code, [])
+        )
+    return patient_data
+
+
+def make_patient(
+    nome: str,
+    data_nascimento: str,
+    responsavel: str,
+    mes_referencia: str,
+    especialidades: Iterable[str],
+) -> PatientRecord:
+    """Monta o registro agrupado de um paciente (formato de ``group_patients``)."""
+    return PatientRecord(nome, data_nascimento, responsavel, mes_referencia, especialidades)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import io
+import struct
+import time
+import zlib
+from typing import BinaryIO, Iterable, Mapping, Sequence
+
+DOCUMENT_PART = "word/document.xml"
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END_OF_CENTRAL_DIR = struct.Struct("<IHHHHIIH")
+_ZIP_VERSION = 20
+_DEFLATED = 8
+_UTF8_FLAG = 0x800
+_EXTERNAL_ATTR = 0o600 << 16
+
+
+def _dos_datetime(timestamp: float) -> tuple[int, int]:
+    t = time.localtime(timestamp)
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = ((max(t.tm_year, 1980) - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dos_time, dos_date
+
+
+def _deflate(data: bytes, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
+
+
+class _Member:
+    __slots__ = ("name", "flags", "crc", "compressed", "size")
+
+    def __init__(self, name: str, data: bytes, level: int) -> None:
+        try:
+            self.name = name.encode("ascii")
+            self.flags = 0
+        except UnicodeEncodeError:
+            self.name = name.encode("utf-8")
+            self.flags = _UTF8_FLAG
+        self.crc = zlib.crc32(data) & 0xFFFFFFFF
+        self.compressed = _deflate(data, level)
+        self.size = len(data)
+
+
+class PackageWriter:
+    """Grava pacotes .docx reaproveitando as partes fixas já comprimidas.
+
+    As partes de ``entries`` que não estão em ``dynamic`` (estilos,
+    numeração, cabeçalhos, imagens do papel timbrado...) são comprimidas uma
+    única vez na criação do writer; a cada pacote apenas as partes dinâmicas
+    (por padrão, ``word/document.xml``) são comprimidas, e o arquivo ZIP é
+    montado copiando os bytes prontos.
+    """
+
+    def __init__(
+        self,
+        entries: Sequence[tuple[str, bytes]],
+        dynamic: Iterable[str] = (DOCUMENT_PART,),
+        level: int = zlib.Z_DEFAULT_COMPRESSION,
+    ) -> None:
+        self.level = level
+        self.dynamic = frozenset(dynamic)
+        self._order = [name for name, _ in entries]
+        self._static = {
+            name: _Member(name, data, level) for name, data in entries if name not in self.dynamic
+        }
+        self._dos_time, self._dos_date = _dos_datetime(time.time())
+
+    def write(self, stream: BinaryIO, parts: Mapping[str, bytes]) -> None:
+        """Grava o pacote em ``stream``; ``parts`` contém o conteúdo das partes dinâmicas."""
+        missing = self.dynamic.difference(parts)
+        if missing:
+            raise ValueError(f"Partes não informadas: {', '.join(sorted(missing))}")
+
+        offset = 0
+        central = []
+        for name in self._order:
+            member = self._static.get(name)
+            if member is None:
+                member = _Member(name, parts[name], self.level)
+            header = _LOCAL_HEADER.pack(
+                0x04034B50, _ZIP_VERSION, member.flags, _DEFLATED,
+                self._dos_time, self._dos_date, member.crc,
+                len(member.compressed), member.size, len(member.name), 0,
+            )
+            stream.write(header)
+            stream.write(member.name)
+            stream.write(member.compressed)
+            central.append(_CENTRAL_HEADER.pack(
+                0x02014B50, _ZIP_VERSION, _ZIP_VERSION, member.flags, _DEFLATED,
+                self._dos_time, self._dos_date, member.crc,
+                len(member.compressed), member.size, len(member.name),
+                0, 0, 0, 0, _EXTERNAL_ATTR, offset,
+            ) + member.name)
+            offset += len(header) + len(member.name) + len(member.compressed)
+
+        directory = b"".join(central)
+        stream.write(directory)
+        stream.write(_END_OF_CENTRAL_DIR.pack(
+            0x06054B50, 0, 0, len(central), len(central), len(directory), offset, 0,
+        ))
+
+    def to_bytes(self, parts: Mapping[str, bytes]) -> bytes:
+        buffer = io.BytesIO()
+        self.write(buffer, parts)
+        return buffer.getvalue()
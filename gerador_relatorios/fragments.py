@@ -0,0 +1,88 @@
+"""Cache de tabelas pré-montadas que se repetem em todos os relatórios.
+
+A moldura do cabeçalho (bordas e rótulos em negrito) e a grade de
+assinaturas de cada combinação de especialidades são iguais em todos os
+relatórios de um lote. Elas são montadas pelo python-docx uma única vez e
+guardadas como XML; os relatórios seguintes recebem uma cópia do elemento.
+Só a API pública do python-docx e do lxml é usada, para não depender de
+detalhes internos que mudam entre versões.
+"""
+from __future__ import annotations
+
+import copy
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from docx.document import Document as DocumentObject
+from docx.oxml.ns import qn
+from docx.shared import Emu
+from docx.table import Table
+
+MAX_FRAGMENTS = 128
+
+
+def usable_width(doc: DocumentObject) -> Emu:
+    """Largura útil (entre as margens) da última seção do documento."""
+    section = doc.sections[-1]
+    return Emu(section.page_width - section.left_margin - section.right_margin)
+
+
+def _append_table(doc: DocumentObject, tbl: Any) -> None:
+    # Como em ``Document.add_table``: a tabela entra antes do ``w:sectPr``
+    # final, que precisa continuar sendo o último filho do corpo.
+    body = doc.element.body
+    sect_pr = body.find(qn("w:sectPr"))
+    if sect_pr is not None:
+        sect_pr.addprevious(tbl)
+    else:
+        body.append(tbl)
+
+
+class FragmentCache:
+    """LRU de elementos ``<w:tbl>`` indexados por uma chave qualquer."""
+
+    def __init__(self, max_fragments: int = MAX_FRAGMENTS) -> None:
+        self.max_fragments = max_fragments
+        self._lock = threading.Lock()
+        self._tables: OrderedDict[Hashable, Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def table(self, doc: DocumentObject, key: Hashable, build: Callable[[], Table]) -> Table:
+        """Insere no fim de ``doc`` a tabela de ``key``.
+
+        Na primeira vez ``build()`` monta a tabela diretamente no documento e
+        uma cópia é guardada; nas seguintes a cópia é reaproveitada. A largura
+        útil da página faz parte da chave, pois define as colunas da tabela.
+        """
+        key = (key, usable_width(doc))
+        with self._lock:
+            tbl = self._tables.get(key)
+            if tbl is not None:
+                self._tables.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if tbl is None:
+            table = build()
+            # ``build`` acabou de inserir a tabela: é o último ``w:tbl`` do corpo.
+            tbl = doc.element.body.findall(qn("w:tbl"))[-1]
+            with self._lock:
+                self._tables[key] = copy.deepcopy(tbl)
+                while len(self._tables) > self.max_fragments:
+                    self._tables.popitem(last=False)
+            return table
+        _append_table(doc, copy.deepcopy(tbl))
+        return doc.tables[-1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tables.clear()
+
+
+_default_cache = FragmentCache()
+
+
+def get_fragment_cache() -> FragmentCache:
+    return _default_cache
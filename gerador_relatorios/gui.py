@@ -2,14 +2,25 @@ from __future__ import annotations
 
 import os
 import tkinter as tk
-from typing import Any
 from tkinter import ttk, filedialog, messagebox
-from collections import defaultdict
-import pandas as pd
+from contextlib import closing
+from typing import TYPE_CHECKING
 
-from . import data_loader
-from .reports import generate_pne_report, generate_tipico_report
+from .bundle import BundleWriter, bundle_filename
+from .loading import BackgroundLoad, MultiLoad
+from .metrics import GROUP, BatchMetrics
+from .preview import VirtualTreeview
 from .utils import resource_path
+from .warmup import start_warmup
+
+# pandas, python-docx e openpyxl só são importados quando necessários (ou
+# pela thread de `start_warmup`), para a janela abrir rápido.
+if TYPE_CHECKING:
+    import pandas as pd
+
+LOAD_POLL_MS = 100
+# Problemas de validação exibidos de uma vez na caixa de mensagem.
+VALIDATION_LIMIT = 15
 
 
 class MedicalReportGenerator:
@@ -25,9 +36,15 @@ class MedicalReportGenerator:
 
         self.excel_file: str | None = None
         self.report_type = tk.StringVar(value="PNE")
+        self.incremental = tk.BooleanVar(value=False)
+        self.bundle_output = tk.BooleanVar(value=False)
+        self.all_sheets = tk.BooleanVar(value=False)
         self.data: pd.DataFrame | None = None
+        self.loading: BackgroundLoad | None = None
 
         self.setup_ui()
+        # Depois que a janela for desenhada.
+        self.root.after(200, start_warmup)
 
     def setup_ui(self) -> None:
         main_frame = ttk.Frame(self.root, padding="15")
@@ -44,6 +61,16 @@ class MedicalReportGenerator:
         type_frame.grid(row=1, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 15))
         ttk.Radiobutton(type_frame, text="🧩 PNE (Portador de Necessidades Especiais)", variable=self.report_type, value="PNE").pack(anchor=tk.W, pady=5)
         ttk.Radiobutton(type_frame, text="👤 Típico", variable=self.report_type, value="TIPICO").pack(anchor=tk.W, pady=5)
+        ttk.Checkbutton(
+            type_frame,
+            text="♻️ Gerar apenas pacientes novos ou alterados desde a última geração na pasta",
+            variable=self.incremental,
+        ).pack(anchor=tk.W, pady=(10, 0))
+        ttk.Checkbutton(
+            type_frame,
+            text="📦 Salvar todos os relatórios em um único arquivo .zip",
+            variable=self.bundle_output,
+        ).pack(anchor=tk.W, pady=(5, 0))
 
         file_frame = ttk.LabelFrame(main_frame, text="📁 Arquivo Excel", padding="15")
         file_frame.grid(row=2, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 15))
@@ -57,7 +84,14 @@ class MedicalReportGenerator:
         btn_frame = ttk.Frame(file_inner_frame)
         btn_frame.pack(side=tk.RIGHT)
         ttk.Button(btn_frame, text="📁 Selecionar Arquivo", command=self.select_file).pack(side=tk.LEFT, padx=(0, 10))
-        ttk.Button(btn_frame, text="📄 Usar Exemplo", command=self.load_example).pack(side=tk.LEFT)
+        ttk.Button(btn_frame, text="📄 Usar Exemplo", command=self.load_example).pack(side=tk.LEFT, padx=(0, 10))
+        self.cancel_button = ttk.Button(btn_frame, text="⛔ Cancelar", command=self.cancel_load, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT)
+        ttk.Checkbutton(
+            file_frame,
+            text="📑 Ler todas as abas (é possível selecionar vários arquivos)",
+            variable=self.all_sheets,
+        ).pack(anchor=tk.W, pady=(10, 0))
 
         preview_frame = ttk.LabelFrame(main_frame, text="👁️ Preview dos Dados", padding="15")
         preview_frame.grid(row=3, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 15))
@@ -68,13 +102,20 @@ class MedicalReportGenerator:
             self.tree.heading(col, text=col)
             self.tree.column(col, width=150)
 
-        scrollbar_v = ttk.Scrollbar(preview_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        scrollbar_v = ttk.Scrollbar(preview_frame, orient=tk.VERTICAL)
         scrollbar_h = ttk.Scrollbar(preview_frame, orient=tk.HORIZONTAL, command=self.tree.xview)
-        self.tree.configure(yscrollcommand=scrollbar_v.set, xscrollcommand=scrollbar_h.set)
+        self.tree.configure(xscrollcommand=scrollbar_h.set)
+        self.preview_total_var = tk.StringVar(value="")
+        self.preview = VirtualTreeview(
+            self.tree,
+            scrollbar_v,
+            on_total=lambda total: self.preview_total_var.set(f"Total: {total} registros" if total else ""),
+        )
 
         self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         scrollbar_v.grid(row=0, column=1, sticky=(tk.N, tk.S))
         scrollbar_h.grid(row=1, column=0, sticky=(tk.W, tk.E))
+        ttk.Label(preview_frame, textvariable=self.preview_total_var, foreground="gray").grid(row=2, column=0, sticky=tk.W, pady=(5, 0))
 
         preview_frame.grid_rowconfigure(0, weight=1)
         preview_frame.grid_columnconfigure(0, weight=1)
@@ -95,18 +136,73 @@ class MedicalReportGenerator:
         main_frame.rowconfigure(3, weight=1)
 
     def load_example(self) -> None:
-        try:
-            example_file = resource_path("fusex_tipico.xlsx")
-            if os.path.exists(example_file):
-                self.excel_file = example_file
-                self.data = data_loader.load_excel(example_file)
-                self.file_label.config(text="📄 fusex_tipico.xlsx (exemplo)", foreground="blue")
-                self.load_preview()
-                self.status_var.set(f"📄 Exemplo carregado: {len(self.data)} registros")
-            else:
-                messagebox.showerror("Erro", "Arquivo de exemplo não encontrado!")
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao carregar exemplo: {str(e)}")
+        example_file = resource_path("fusex_tipico.xlsx")
+        if os.path.exists(example_file):
+            self.start_load(
+                example_file,
+                label=("📄 fusex_tipico.xlsx (exemplo)", "blue"),
+                done_message="📄 Exemplo carregado",
+                error_message="Erro ao carregar exemplo",
+            )
+        else:
+            messagebox.showerror("Erro", "Arquivo de exemplo não encontrado!")
+
+    def start_load(
+        self,
+        path: str,
+        label: tuple[str, str],
+        done_message: str,
+        error_message: str,
+        multi: MultiLoad | None = None,
+    ) -> None:
+        """Inicia o carregamento da planilha sem bloquear a janela."""
+        if self.loading is not None:
+            self.loading.cancel()
+        self.loading = (BackgroundLoad(path, multi) if multi is not None else BackgroundLoad(path)).start()
+        self.cancel_button.config(state=tk.NORMAL)
+        self.root.after(LOAD_POLL_MS, self.poll_load, self.loading, label, done_message, error_message, multi)
+
+    def poll_load(
+        self,
+        task: BackgroundLoad,
+        label: tuple[str, str],
+        done_message: str,
+        error_message: str,
+        multi: MultiLoad | None = None,
+    ) -> None:
+        if task is not self.loading:
+            return
+        if not task.done:
+            rows = f", {task.rows} registros lidos" if task.rows else ""
+            name = os.path.basename(task.path) if multi is None else f"{len(multi.paths)} arquivo(s)"
+            self.status_var.set(f"⏳ Carregando {name}... {task.elapsed:.1f}s{rows}")
+            self.root.after(LOAD_POLL_MS, self.poll_load, task, label, done_message, error_message, multi)
+            return
+
+        self.loading = None
+        self.cancel_button.config(state=tk.DISABLED)
+        if task.error is not None:
+            self.status_var.set("❌ Erro ao carregar arquivo")
+            messagebox.showerror("Erro", f"{error_message}: {str(task.error)}")
+            return
+        self.excel_file = task.path
+        self.data = task.result
+        self.file_label.config(text=label[0], foreground=label[1])
+        self.load_preview()
+        self.status_var.set(f"{done_message}: {len(self.data)} registros em {task.elapsed:.1f}s")
+        if multi is not None and multi.errors:
+            messagebox.showwarning(
+                "Aviso",
+                "Algumas planilhas não foram carregadas:\n\n"
+                + "\n".join(f"• {e.source}: {e.error}" for e in multi.errors),
+            )
+
+    def cancel_load(self) -> None:
+        if self.loading is not None:
+            task, self.loading = self.loading, None
+            task.cancel()
+            self.cancel_button.config(state=tk.DISABLED)
+            self.status_var.set("⛔ Carregamento cancelado")
 
     def show_help(self) -> None:
         help_window = tk.Toplevel(self.root)
@@ -159,54 +255,35 @@ class MedicalReportGenerator:
         ttk.Button(help_window, text="✅ Entendi", command=help_window.destroy).pack(pady=10)
 
     def select_file(self) -> None:
-        file_path = filedialog.askopenfilename(title="Selecionar arquivo Excel", filetypes=[("Excel files", "*.xlsx *.xls")])
-        if file_path:
-            try:
-                self.excel_file = file_path
-                self.data = data_loader.load_excel(file_path)
-                self.file_label.config(text=f"📁 {os.path.basename(file_path)}", foreground="green")
-                self.load_preview()
-                self.status_var.set(f"📊 Arquivo carregado: {len(self.data)} registros")
-            except Exception as e:
-                messagebox.showerror("Erro", f"Erro ao carregar arquivo: {str(e)}")
+        paths = filedialog.askopenfilenames(title="Selecionar arquivo(s) Excel", filetypes=[("Excel files", "*.xlsx *.xls")])
+        if not paths:
+            return
+        if len(paths) == 1 and not self.all_sheets.get():
+            self.start_load(
+                paths[0],
+                label=(f"📁 {os.path.basename(paths[0])}", "green"),
+                done_message="📊 Arquivo carregado",
+                error_message="Erro ao carregar arquivo",
+            )
+            return
+        name = os.path.basename(paths[0]) if len(paths) == 1 else f"{len(paths)} arquivos"
+        self.start_load(
+            paths[0],
+            label=(f"📁 {name}" + (" (todas as abas)" if self.all_sheets.get() else ""), "green"),
+            done_message="📊 Arquivos carregados",
+            error_message="Erro ao carregar arquivos",
+            multi=MultiLoad(paths, self.all_sheets.get()),
+        )
 
     def load_preview(self) -> None:
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        for _, row in self.data.iterrows():
-            data_nasc = row["DATA DE NASCIMENTO"]
-            try:
-                if pd.notna(data_nasc):
-                    if hasattr(data_nasc, "strftime"):
-                        data_nasc = data_nasc.strftime("%d/%m/%Y")
-                    else:
-                        data_nasc = str(data_nasc)
-                        if "/" in data_nasc:
-                            data_nasc = data_nasc.split(" ")[0]
-                else:
-                    data_nasc = "Data não informada"
-            except Exception:
-                data_nasc = str(data_nasc) if pd.notna(data_nasc) else "Data não informada"
-
-            self.tree.insert(
-                "",
-                tk.END,
-                values=(
-                    str(row["NOME"]) if pd.notna(row["NOME"]) else "Nome não informado",
-                    data_nasc,
-                    str(row["RESPONSÁVEL"]) if pd.notna(row["RESPONSÁVEL"]) else "Não informado",
-                    str(row["ESPECIALIDADE"]) if pd.notna(row["ESPECIALIDADE"]) else "Não informado",
-                    str(row["MÊS DE REFERÊNCIA"]) if pd.notna(row["MÊS DE REFERÊNCIA"]) else "Não informado",
-                ),
-            )
+        self.preview.set_data(self.data)
 
     def clear_data(self) -> None:
+        self.cancel_load()
         self.excel_file = None
         self.data = None
         self.file_label.config(text="Nenhum arquivo selecionado", foreground="gray")
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.preview.clear()
         self.status_var.set("✅ Pronto para uso")
 
     def generate_reports(self) -> None:
@@ -217,55 +294,124 @@ class MedicalReportGenerator:
             )
             return
 
-        patient_data: dict[str, dict[str, Any]] = defaultdict(lambda: {"info": {}, "especialidades": []})
-        for _, row in self.data.iterrows():
-            nome = row["NOME"]
-            if not patient_data[nome]["info"]:
-                data_nasc = row["DATA DE NASCIMENTO"]
-                try:
-                    if pd.notna(data_nasc):
-                        if hasattr(data_nasc, "strftime"):
-                            data_nasc = data_nasc.strftime("%d/%m/%Y")
-                        else:
-                            data_nasc = str(data_nasc)
-                            if "/" in data_nasc:
-                                data_nasc = data_nasc.split(" ")[0]
-                    else:
-                        data_nasc = "Data não informada"
-                except Exception:
-                    data_nasc = str(data_nasc) if pd.notna(data_nasc) else "Data não informada"
-                patient_data[nome]["info"] = {
-                    "nome": str(row["NOME"]),
-                    "data_nascimento": data_nasc,
-                    "responsavel": str(row["RESPONSÁVEL"]) if pd.notna(row["RESPONSÁVEL"]) else "Não informado",
-                    "mes_referencia": str(row["MÊS DE REFERÊNCIA"]) if pd.notna(row["MÊS DE REFERÊNCIA"]) else "Não informado",
-                }
-            if pd.notna(row["ESPECIALIDADE"]):
-                especialidade = str(row["ESPECIALIDADE"])
-                if especialidade not in patient_data[nome]["especialidades"]:
-                    patient_data[nome]["especialidades"].append(especialidade)
+        from . import data_loader
+        from .batch import generate_batch
+        from .journal import BatchJournal
+        from .manifest import IncrementalPlan
+        from .validation import format_issues, has_errors, validate_batch
+
+        metrics = BatchMetrics()
+        with metrics.phase(GROUP):
+            patient_data = data_loader.group_patients(self.data)
+
+        issues = validate_batch(patient_data, self.report_type.get())
+        if has_errors(issues):
+            self.status_var.set("❌ A planilha tem problemas")
+            messagebox.showerror(
+                "Erro",
+                "Nenhum relatório foi gerado. Corrija a planilha:\n\n" + format_issues(issues, VALIDATION_LIMIT),
+            )
+            return
+        if issues and not messagebox.askyesno(
+            "Aviso",
+            format_issues(issues, VALIDATION_LIMIT) + "\n\nGerar os relatórios mesmo assim?",
+        ):
+            return
+
+        if self.bundle_output.get() and self.incremental.get():
+            messagebox.showerror(
+                "Erro",
+                "A geração incremental não pode ser usada junto com o arquivo .zip único.",
+            )
+            return
 
         output_dir = filedialog.askdirectory(title="Selecionar pasta para salvar relatórios")
         if not output_dir:
             return
 
+        plan = None
+        journal = None
+        summary = ""
         try:
+            if self.incremental.get():
+                plan = IncrementalPlan(patient_data, self.report_type.get(), output_dir)
+                patient_data = plan.to_render
+                summary = f"\n♻️ {plan.summary()}"
+            bundle = None
+            if self.bundle_output.get():
+                bundle = BundleWriter(os.path.join(output_dir, bundle_filename(self.report_type.get())))
+                summary += f"\n📦 Arquivo: {os.path.basename(bundle.path)}"
+            elif plan is None:
+                # Retoma um lote interrompido na mesma pasta.
+                journal = BatchJournal(output_dir, self.report_type.get())
+                patient_data = journal.pending(patient_data)
+                if journal.resumed:
+                    summary += f"\n♻️ Retomado: {journal.resumed} já gerados antes"
             self.status_var.set("🔄 Gerando relatórios...")
             self.root.update()
             report_count = 0
-            for nome, pdata in patient_data.items():
-                if self.report_type.get() == "PNE":
-                    generate_pne_report(pdata, output_dir)
+            failed: list[str] = []
+            target_dir = None if bundle is not None else output_dir
+            metrics.start()
+            with closing(generate_batch(patient_data, self.report_type.get(), target_dir)) as results:
+                try:
+                    for result in results:
+                        metrics.add(result)
+                        if plan is not None:
+                            plan.record(result)
+                        if journal is not None:
+                            journal.record(result)
+                        if bundle is not None:
+                            bundle.add(result)
+                        if result.ok:
+                            report_count += 1
+                        else:
+                            failed.append(f"{result.nome}: {result.error}")
+                        self.status_var.set(
+                            f"🔄 Gerando... {report_count + len(failed)}/{len(patient_data)}"
+                        )
+                        self.root.update()
+                except BaseException:
+                    if bundle is not None:
+                        bundle.abort()
+                    raise
+            if bundle is not None:
+                bundle.close()
+            if journal is not None:
+                if failed:
+                    journal.close()
                 else:
-                    generate_tipico_report(pdata, output_dir)
-                report_count += 1
-                self.status_var.set(f"🔄 Gerando... {report_count}/{len(patient_data)}")
-                self.root.update()
+                    journal.finish()
+            if failed:
+                self.status_var.set(f"⚠️ {report_count} relatórios gerados, {len(failed)} com erro")
+                shown = "\n".join(failed[:VALIDATION_LIMIT])
+                if len(failed) > VALIDATION_LIMIT:
+                    shown += f"\n... e mais {len(failed) - VALIDATION_LIMIT}."
+                messagebox.showwarning(
+                    "Concluído com erros",
+                    f"✅ {report_count} relatórios gerados, ❌ {len(failed)} com erro:\n\n{shown}"
+                    f"{summary}\n\n📁 Pasta: {output_dir}"
+                    + ("" if bundle is not None else "\n\nGere de novo na mesma pasta para tentar só os que faltaram.")
+                    + f"\n\n{metrics.format_summary()}",
+                )
+                return
             self.status_var.set(f"✅ {report_count} relatórios gerados com sucesso!")
             messagebox.showinfo(
                 "Sucesso! 🎉",
-                f"✅ {report_count} relatórios gerados com sucesso!\n\n📁 Pasta: {output_dir}",
+                f"✅ {report_count} relatórios gerados com sucesso!{summary}\n\n📁 Pasta: {output_dir}"
+                f"\n\n{metrics.format_summary()}",
             )
         except Exception as e:
             self.status_var.set("❌ Erro ao gerar relatórios")
             messagebox.showerror("Erro", f"Erro ao gerar relatórios: {str(e)}")
+        finally:
+            if plan is not None:
+                try:
+                    plan.save()
+                except OSError:
+                    pass
+            if journal is not None:
+                try:
+                    journal.close()
+                except OSError:
+                    pass
@@ -0,0 +1,173 @@
+"""Diário de progresso de um lote, para retomar a geração após uma interrupção.
+
+Cada relatório gravado com sucesso é acrescentado como uma linha JSON em
+``.relatorios_journal.jsonl`` na pasta de saída. Se o lote for interrompido
+(erro, computador desligado ou suspenso, Ctrl+C), a próxima geração na mesma
+pasta pula os pacientes que já constam no diário, desde que os dados do
+paciente, o tipo de relatório e o papel timbrado sejam os mesmos (o hash do
+manifesto, ``manifest.record_hash``) e o arquivo continue lá com o mesmo
+tamanho. Quando o lote termina sem falhas o diário é apagado.
+
+Cada linha é gravada assim que o relatório termina; o ``fsync`` é feito no
+máximo a cada ``sync_interval`` segundos, de modo que uma queda de energia
+custa no pior caso refazer os últimos relatórios desse intervalo.
+"""
+from __future__ import annotations
+
+import io
+import json
+import os
+import time
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Mapping, Tuple
+
+from .manifest import record_hash, template_fingerprint
+from .models import PatientData
+from .utils import TEMP_SUFFIX
+
+if TYPE_CHECKING:
+    from .batch import ReportResult
+
+JOURNAL_FILE = ".relatorios_journal.jsonl"
+DEFAULT_SYNC_INTERVAL = 1.0
+
+
+def load_journal(path: str) -> dict[str, dict[str, Any]]:
+    """Entradas do diário por paciente (a última vale; linhas incompletas são ignoradas)."""
+    entries: dict[str, dict[str, Any]] = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    entries[entry["nome"]] = entry
+                except (ValueError, KeyError, TypeError):
+                    # Última linha cortada por uma interrupção.
+                    continue
+    except OSError:
+        pass
+    return entries
+
+
+def remove_stale_temp_files(output_dir: str) -> int:
+    """Apaga os temporários de relatórios deixados por uma gravação interrompida."""
+    removed = 0
+    try:
+        names = os.listdir(output_dir)
+    except OSError:
+        return 0
+    for name in names:
+        if name.startswith(".") and ".docx." in name and name.endswith(TEMP_SUFFIX):
+            try:
+                os.remove(os.path.join(output_dir, name))
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+class BatchJournal:
+    """Registra o progresso do lote em ``output_dir`` e filtra o que já foi gerado.
+
+    ``pending``/``iter_pending`` devolvem só os pacientes que ainda precisam
+    ser gerados (``resumed`` conta os pulados); ``record`` acrescenta cada
+    resultado bem-sucedido; ``finish`` apaga o diário ao fim de um lote sem
+    falhas. Com ``resume=False`` um diário anterior é descartado.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        report_type: str,
+        resume: bool = True,
+        sync_interval: float = DEFAULT_SYNC_INTERVAL,
+    ) -> None:
+        self.output_dir = output_dir
+        self.report_type = report_type
+        self.path = os.path.join(output_dir, JOURNAL_FILE)
+        self.sync_interval = sync_interval
+        self.template = template_fingerprint()
+        self.done = load_journal(self.path) if resume else {}
+        if not resume and os.path.exists(self.path):
+            os.remove(self.path)
+        remove_stale_temp_files(output_dir)
+        self.resumed = 0
+        self._hashes: dict[str, str] = {}
+        self._file: Any = None
+        self._synced = time.monotonic()
+
+    def __enter__(self) -> "BatchJournal":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _is_done(self, nome: str, digest: str) -> bool:
+        entry = self.done.get(nome)
+        if entry is None or entry.get("hash") != digest:
+            return False
+        try:
+            return os.path.getsize(os.path.join(self.output_dir, entry["arquivo"])) == entry["tamanho"]
+        except (OSError, KeyError, TypeError):
+            return False
+
+    def iter_pending(self, patients: Iterable[Tuple[str, PatientData]]) -> Iterator[Tuple[str, PatientData]]:
+        for nome, pdata in patients:
+            nome = str(nome)
+            digest = record_hash(pdata, self.report_type, self.template)
+            if self._is_done(nome, digest):
+                self.resumed += 1
+                continue
+            self._hashes[nome] = digest
+            yield nome, pdata
+
+    def pending(self, patients: Mapping[str, PatientData]) -> dict[str, PatientData]:
+        return dict(self.iter_pending(patients.items()))
+
+    def record(self, result: ReportResult) -> None:
+        digest = self._hashes.pop(result.nome, None)
+        if not result.ok or not result.path or digest is None:
+            return
+        if self._file is None:
+            self._file = self._open()
+        entry = {
+            "nome": result.nome,
+            "hash": digest,
+            "arquivo": os.path.basename(result.path),
+            "tamanho": os.path.getsize(result.path),
+        }
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        if time.monotonic() - self._synced >= self.sync_interval:
+            self._sync()
+
+    def _open(self) -> Any:
+        file = open(self.path, "a+b")
+        # Uma interrupção pode ter deixado a última linha pela metade; sem a
+        # quebra de linha, a primeira entrada nova seria colada nela e
+        # descartada junto na próxima leitura.
+        if file.seek(0, os.SEEK_END) > 0:
+            file.seek(-1, os.SEEK_END)
+            if file.read(1) != b"\n":
+                file.write(b"\n")
+        return io.TextIOWrapper(file, encoding="utf-8")
+
+    def _sync(self) -> None:
+        os.fsync(self._file.fileno())
+        self._synced = time.monotonic()
+
+    def close(self) -> None:
+        file, self._file = self._file, None
+        if file is not None:
+            try:
+                file.flush()
+                os.fsync(file.fileno())
+            finally:
+                file.close()
+
+    def finish(self) -> None:
+        """Lote concluído sem falhas: o diário não é mais necessário."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
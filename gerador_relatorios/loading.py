@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Sequence
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from .data_loader import SourceError
+
+
+class LoadCancelled(BaseException):
+    """Interrompe um carregamento cancelado pelo usuário.
+
+    Deriva de ``BaseException`` para não ser tratado como erro de uma
+    planilha por quem captura ``Exception`` (ver ``data_loader.load_many``).
+    """
+
+
+def _default_loader(path: str, progress: Callable[[int], None]) -> pd.DataFrame:
+    from . import data_loader
+    from .sheet_cache import SheetCache
+
+    return data_loader.load_excel(path, progress=progress, cache=SheetCache())
+
+
+class MultiLoad:
+    """Carregador de várias planilhas (ou abas) para ``BackgroundLoad``.
+
+    Usa ``data_loader.load_many``; os erros de cada fonte ficam em
+    ``errors`` ao final do carregamento.
+    """
+
+    def __init__(self, paths: Sequence[str], all_sheets: bool = False) -> None:
+        self.paths = list(paths)
+        self.all_sheets = all_sheets
+        self.errors: list[SourceError] = []
+
+    def __call__(self, path: str, progress: Callable[[int], None]) -> pd.DataFrame:
+        from . import data_loader
+        from .sheet_cache import SheetCache
+
+        data, self.errors = data_loader.load_many(
+            self.paths, self.all_sheets, progress=progress, cache=SheetCache()
+        )
+        return data
+
+
+class BackgroundLoad:
+    """Carrega uma planilha em uma thread separada.
+
+    A interface consulta ``done``, ``rows`` e ``elapsed`` periodicamente (via
+    ``root.after``) e lê ``result`` ou ``error`` ao final. ``cancel()``
+    descarta o resultado; se o carregador informar progresso, a leitura é
+    interrompida no próximo bloco de linhas.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        loader: Callable[[str, Callable[[int], None]], Any] = _default_loader,
+    ) -> None:
+        self.path = path
+        self.rows = 0
+        self.result: Any = None
+        self.error: Exception | None = None
+        self._loader = loader
+        self._started = 0.0
+        self._finished: float | None = None
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="carregar-planilha", daemon=True)
+
+    def start(self) -> "BackgroundLoad":
+        self._started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def elapsed(self) -> float:
+        end = self._finished if self._finished is not None else time.perf_counter()
+        return end - self._started
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._done.wait(timeout)
+
+    def _progress(self, rows: int) -> None:
+        if self._cancelled.is_set():
+            raise LoadCancelled()
+        self.rows = rows
+
+    def _run(self) -> None:
+        try:
+            result = self._loader(self.path, self._progress)
+            if not self._cancelled.is_set():
+                self.result = result
+                self.rows = len(result)
+        except LoadCancelled:
+            pass
+        except Exception as e:
+            if not self._cancelled.is_set():
+                self.error = e
+        finally:
+            self._finished = time.perf_counter()
+            self._done.set()
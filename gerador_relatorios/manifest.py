@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import TYPE_CHECKING, Any, Mapping
+
+from .models import PatientData, PatientRecord
+from .template_cache import get_template_cache
+
+if TYPE_CHECKING:
+    from .batch import ReportResult
+
+MANIFEST_FILE = ".relatorios_manifest.json"
+MANIFEST_VERSION = 1
+
+# Incrementar sempre que o conteúdo dos relatórios gerados mudar (textos,
+# tabelas, assinaturas), para que a geração incremental refaça os arquivos
+# já existentes em vez de considerá-los inalterados.
+RENDER_VERSION = 2
+
+
+def template_fingerprint() -> str:
+    """Identifica a versão do papel timbrado usada na geração."""
+    fingerprint = get_template_cache().fingerprint()
+    if fingerprint is None:
+        return "padrao"
+    _, mtime_ns, size = fingerprint
+    return f"{mtime_ns}:{size}"
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    return str(value)
+
+
+def record_hash(patient_data: PatientData, report_type: str, template: str) -> str:
+    """Hash do registro agrupado do paciente, do tipo de relatório, do papel timbrado
+    e da versão dos relatórios (``RENDER_VERSION``)."""
+    if isinstance(patient_data, PatientRecord):
+        # Mesmo hash do formato de dicionário antigo: manifestos existentes continuam valendo.
+        patient_data = patient_data.as_dict()
+    payload = json.dumps(
+        {"paciente": patient_data, "tipo": report_type, "modelo": template, "versao": RENDER_VERSION},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=_json_default,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_manifest(output_dir: str) -> dict[str, dict[str, str]]:
+    """Lê o manifesto da pasta de saída (vazio se não existir ou estiver corrompido)."""
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("versao") != MANIFEST_VERSION:
+        return {}
+    return manifest.get("pacientes", {})
+
+
+def save_manifest(output_dir: str, entries: Mapping[str, Mapping[str, str]]) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=output_dir, prefix=".manifesto", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"versao": MANIFEST_VERSION, "pacientes": entries}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, os.path.join(output_dir, MANIFEST_FILE))
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class IncrementalPlan:
+    """Compara os pacientes atuais com o manifesto da pasta de saída.
+
+    ``to_render`` contém apenas os pacientes novos ou alterados (ou cujo
+    arquivo sumiu da pasta). Após a geração, ``record`` atualiza o manifesto
+    com cada resultado e ``save`` o grava.
+    """
+
+    def __init__(self, patients: Mapping[str, PatientData], report_type: str, output_dir: str) -> None:
+        self.output_dir = output_dir
+        self.report_type = report_type
+        previous = load_manifest(output_dir)
+        template = template_fingerprint()
+
+        self.hashes = {str(nome): record_hash(pdata, report_type, template) for nome, pdata in patients.items()}
+        self.added: list[str] = []
+        self.changed: list[str] = []
+        self.unchanged: list[str] = []
+        self.removed = [nome for nome in previous if nome not in self.hashes]
+        self.entries: dict[str, dict[str, str]] = {}
+        self.to_render: dict[str, PatientData] = {}
+
+        for nome, pdata in patients.items():
+            nome = str(nome)
+            entry = previous.get(nome)
+            if entry is None:
+                self.added.append(nome)
+            elif entry.get("hash") != self.hashes[nome] or not os.path.exists(
+                os.path.join(output_dir, entry.get("arquivo", ""))
+            ):
+                self.changed.append(nome)
+            else:
+                self.unchanged.append(nome)
+                self.entries[nome] = dict(entry)
+                continue
+            self.to_render[nome] = pdata
+
+    def record(self, result: ReportResult) -> None:
+        if result.ok and result.path:
+            self.entries[result.nome] = {
+                "hash": self.hashes[result.nome],
+                "arquivo": os.path.basename(result.path),
+            }
+        else:
+            self.entries.pop(result.nome, None)
+
+    def save(self) -> None:
+        save_manifest(self.output_dir, self.entries)
+
+    def summary(self) -> str:
+        return (
+            f"novos: {len(self.added)}, alterados: {len(self.changed)}, "
+            f"inalterados: {len(self.unchanged)}, removidos: {len(self.removed)}"
+        )
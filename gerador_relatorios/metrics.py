@@ -0,0 +1,216 @@
+"""Medição do tempo de cada fase da geração de relatórios.
+
+As funções de geração marcam suas fases com ``phase("nome")``. Isso só custa
+algo quando há um ``PhaseTimer`` ativo (ver ``timing``): o lote ativa um
+por relatório e devolve os tempos em ``ReportResult.phases``. Fases
+aninhadas são contadas de forma exclusiva: o tempo de "modelo" dentro de
+"montar" não é contado duas vezes.
+
+``BatchMetrics`` junta os resultados de um lote em um resumo (JSON) com
+p50/p95 por relatório, relatórios por segundo e pico de memória, e
+``Capture`` liga opcionalmente o cProfile e o tracemalloc.
+"""
+from __future__ import annotations
+
+import contextlib
+import cProfile
+import io
+import json
+import pstats
+import time
+import tracemalloc
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Iterator
+
+from .utils import peak_memory_mb
+
+if TYPE_CHECKING:
+    from .batch import ReportResult
+
+# Fases por relatório.
+TEMPLATE = "modelo"
+BUILD = "montar"
+SAVE = "salvar"
+# Gravação em disco feita à parte (``pipeline.WriteBehind``).
+WRITE = "gravar"
+# Fases do lote.
+LOAD = "carregar"
+GROUP = "agrupar"
+
+
+class PhaseTimer:
+    """Acumula a duração (exclusiva) de cada fase."""
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+        self._children: list[float] = []
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        self._children.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._children.pop()
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed - children
+            if self._children:
+                self._children[-1] += elapsed
+
+
+_current: ContextVar[PhaseTimer | None] = ContextVar("gerador_relatorios_phase_timer", default=None)
+
+
+@contextlib.contextmanager
+def timing() -> Iterator[PhaseTimer]:
+    """Ativa um ``PhaseTimer`` para as fases executadas dentro do bloco."""
+    timer = PhaseTimer()
+    token = _current.set(timer)
+    try:
+        yield timer
+    finally:
+        _current.reset(token)
+
+
+def phase(name: str) -> contextlib.AbstractContextManager[None]:
+    """Marca uma fase; sem ``timing`` ativo não mede nada."""
+    timer = _current.get()
+    if timer is None:
+        return contextlib.nullcontext()
+    return timer.phase(name)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def distribution(values: list[float]) -> dict[str, float]:
+    """Total, média e percentis p50/p95 de uma lista de durações."""
+    return {
+        "total": sum(values),
+        "media": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 0.5),
+        "p95": percentile(values, 0.95),
+    }
+
+
+class BatchMetrics:
+    """Resumo de desempenho de um lote."""
+
+    def __init__(self) -> None:
+        self.timer = PhaseTimer()
+        self.elapsed: list[float] = []
+        self.phases: dict[str, list[float]] = {}
+        self.failures = 0
+        self.worker_memory_mb = 0.0
+        self.capture: Capture | None = None
+        self._started: float | None = None
+        self._finished: float | None = None
+
+    def phase(self, name: str) -> contextlib.AbstractContextManager[None]:
+        """Marca uma fase do lote (carregamento, agrupamento...)."""
+        return self.timer.phase(name)
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+
+    def add(self, result: ReportResult) -> None:
+        if self._started is None:
+            self.start()
+        self._finished = time.perf_counter()
+        self.elapsed.append(result.elapsed)
+        if not result.ok:
+            self.failures += 1
+        for name, seconds in result.phases.items():
+            self.phases.setdefault(name, []).append(seconds)
+        self.worker_memory_mb = max(self.worker_memory_mb, result.worker_memory_mb)
+
+    @property
+    def wall_time(self) -> float:
+        if self._started is None or self._finished is None:
+            return 0.0
+        return self._finished - self._started
+
+    def summary(self) -> dict[str, Any]:
+        wall = self.wall_time
+        summary: dict[str, Any] = {
+            "relatorios": len(self.elapsed),
+            "falhas": self.failures,
+            "duracao_s": wall,
+            "relatorios_por_segundo": len(self.elapsed) / wall if wall > 0 else 0.0,
+            "por_relatorio_s": distribution(self.elapsed),
+            "fases_por_relatorio_s": {name: distribution(v) for name, v in self.phases.items()},
+            "fases_do_lote_s": dict(self.timer.phases),
+            "memoria_pico_mb": {
+                "processo": peak_memory_mb(),
+                "workers": self.worker_memory_mb,
+            },
+        }
+        if self.capture is not None:
+            summary["captura"] = self.capture.as_dict()
+        return summary
+
+    def format_summary(self) -> str:
+        """Resumo curto para exibir ao usuário."""
+        s = self.summary()
+        per_report = s["por_relatorio_s"]
+        memory = max(s["memoria_pico_mb"].values())
+        slowest = max(s["fases_por_relatorio_s"].items(), key=lambda item: item[1]["total"], default=None)
+        text = (
+            f"⏱️ {s['relatorios']} relatórios em {s['duracao_s']:.2f}s "
+            f"({s['relatorios_por_segundo']:.1f} rel/s)\n"
+            f"Por relatório: p50 {per_report['p50'] * 1000:.0f} ms, p95 {per_report['p95'] * 1000:.0f} ms"
+        )
+        if slowest is not None:
+            text += f" - fase mais lenta: {slowest[0]}"
+        return text + f"\nPico de memória: {memory:.0f} MB"
+
+    def write(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=1)
+
+
+class Capture:
+    """Captura opcional com cProfile e/ou tracemalloc no processo atual."""
+
+    def __init__(self, profile: bool = True, trace_memory: bool = True) -> None:
+        self.profiler = cProfile.Profile() if profile else None
+        self.trace_memory = trace_memory
+        self.traced_peak_mb = 0.0
+
+    def __enter__(self) -> "Capture":
+        if self.trace_memory:
+            tracemalloc.start()
+        if self.profiler is not None:
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        if self.profiler is not None:
+            self.profiler.disable()
+        if self.trace_memory:
+            self.traced_peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.stop()
+
+    def top(self, limit: int = 15) -> str:
+        """Funções com maior tempo acumulado."""
+        if self.profiler is None:
+            return ""
+        out = io.StringIO()
+        pstats.Stats(self.profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+    def dump(self, path: str) -> None:
+        """Grava o perfil no formato do ``pstats`` (abre com snakeviz, gprof2dot...)."""
+        if self.profiler is not None:
+            self.profiler.dump_stats(path)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "cprofile": self.profiler is not None,
+            "tracemalloc_pico_mb": self.traced_peak_mb if self.trace_memory else None,
+        }
@@ -0,0 +1,169 @@
+"""Registro compacto de um paciente agrupado.
+
+``data_loader.group_patients`` devolve um ``PatientRecord`` por paciente em
+vez do antigo dicionário ``{"info": {...}, "especialidades": [...]}``. O
+registro é imutável, usa ``__slots__`` e compartilha os valores que se
+repetem entre pacientes (responsável, mês de referência, data ausente,
+listas de especialidades e conjuntos de categorias), de modo que um lote
+grande ocupa bem menos memória e fica menor ao ser enviado aos workers.
+
+Os geradores aceitam tanto o registro quanto o dicionário antigo (ver
+``as_record``), e o registro também responde ao acesso no formato antigo
+(``record["info"]["nome"]``, ``record.get("categorias")``).
+"""
+from __future__ import annotations
+
+import sys
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Iterable, Iterator, Mapping, Tuple, Union
+
+from .specialties import classify_all
+
+INFO_FIELDS = ("nome", "data_nascimento", "responsavel", "mes_referencia")
+_LEGACY_KEYS = ("info", "especialidades", "categorias")
+
+
+def intern_text(value: Any) -> str:
+    """Texto compartilhado: valores iguais passam a ser o mesmo objeto."""
+    return sys.intern(str(value))
+
+
+@lru_cache(maxsize=4096)
+def _shared(value: Any) -> Any:
+    # Devolve o primeiro objeto igual a ``value`` já visto (tuplas e frozensets).
+    return value
+
+
+class PatientRecord:
+    """Paciente agrupado: dados da primeira linha, especialidades e categorias."""
+
+    __slots__ = INFO_FIELDS + ("especialidades", "categorias")
+
+    nome: str
+    data_nascimento: str
+    responsavel: str
+    mes_referencia: str
+    especialidades: Tuple[str, ...]
+    categorias: frozenset
+
+    def __init__(
+        self,
+        nome: str,
+        data_nascimento: str,
+        responsavel: str,
+        mes_referencia: str,
+        especialidades: Iterable[str] = (),
+        categorias: Iterable[str] | None = None,
+    ) -> None:
+        especialidades = _shared(tuple(intern_text(esp) for esp in especialidades))
+        categorias = classify_all(especialidades) if categorias is None else frozenset(categorias)
+        values = (
+            str(nome),
+            intern_text(data_nascimento),
+            intern_text(responsavel),
+            intern_text(mes_referencia),
+            especialidades,
+            _shared(categorias),
+        )
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("PatientRecord é imutável")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("PatientRecord é imutável")
+
+    def _values(self) -> tuple[Any, ...]:
+        return _VALUES(self)
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # Tupla posicional: menor que o estado dos slots (sem os nomes dos campos).
+        return (_restore, _VALUES(self))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PatientRecord):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __hash__(self) -> int:
+        return hash(self._values())
+
+    def __repr__(self) -> str:
+        return f"PatientRecord(nome={self.nome!r}, especialidades={list(self.especialidades)!r})"
+
+    @property
+    def info(self) -> dict[str, str]:
+        return {name: getattr(self, name) for name in INFO_FIELDS}
+
+    # Compatibilidade com o formato de dicionário antigo (somente leitura).
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "info":
+            return self.info
+        if key == "especialidades":
+            return list(self.especialidades)
+        if key == "categorias":
+            return self.categorias
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: object) -> bool:
+        return key in _LEGACY_KEYS
+
+    def keys(self) -> tuple[str, ...]:
+        return _LEGACY_KEYS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(_LEGACY_KEYS)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Registro no formato de dicionário antigo."""
+        return {key: self[key] for key in _LEGACY_KEYS}
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "PatientRecord":
+        info = data["info"]
+        return cls(
+            info["nome"],
+            info["data_nascimento"],
+            info["responsavel"],
+            info["mes_referencia"],
+            data.get("especialidades", ()),
+            data.get("categorias"),
+        )
+
+
+_VALUES = attrgetter(*PatientRecord.__slots__)
+
+
+def _restore(*values: Any) -> PatientRecord:
+    # Valores já normalizados: só compartilha os textos repetidos no processo atual.
+    record = object.__new__(PatientRecord)
+    nome, data_nascimento, responsavel, mes_referencia, especialidades, categorias = values
+    for name, value in zip(PatientRecord.__slots__, (
+        nome,
+        intern_text(data_nascimento),
+        intern_text(responsavel),
+        intern_text(mes_referencia),
+        _shared(tuple(map(sys.intern, especialidades))),
+        _shared(categorias),
+    )):
+        object.__setattr__(record, name, value)
+    return record
+
+
+PatientData = Union[PatientRecord, Mapping[str, Any]]
+
+
+def as_record(patient_data: PatientData) -> PatientRecord:
+    """Aceita o registro ou o dicionário antigo e devolve sempre um ``PatientRecord``."""
+    if isinstance(patient_data, PatientRecord):
+        return patient_data
+    return PatientRecord.from_dict(patient_data)
@@ -0,0 +1,236 @@
+"""Geração em fluxo contínuo, da planilha aos arquivos, com memória limitada.
+
+Em vez de carregar a planilha inteira, agrupar todos os pacientes e só então
+gerar os relatórios, cada etapa consome a anterior aos poucos:
+
+1. as linhas são lidas em blocos (``data_loader.iter_excel_chunks``);
+2. os pacientes são agrupados incrementalmente (``iter_patients``): com a
+   planilha já ordenada por paciente, cada um é emitido assim que o nome
+   muda; senão as linhas passam por um arquivo SQLite temporário e os
+   pacientes saem na ordem em que aparecem na planilha;
+3. os relatórios são gerados em memória pelo ``ReportPool``;
+4. uma thread de gravação (``WriteBehind``) grava os arquivos enquanto os
+   próximos são gerados, atrás de uma fila limitada.
+
+Assim a memória usada não depende do tamanho da planilha.
+"""
+from __future__ import annotations
+
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Iterator, Tuple
+
+from . import data_loader
+from .batch import DEFAULT_ENGINE, ENGINES, ReportPool, ReportResult
+from .metrics import WRITE
+from .models import PatientRecord
+from .utils import atomic_open
+
+DEFAULT_MAX_PENDING = 64
+
+Patient = Tuple[str, PatientRecord]
+
+
+def _normalized_chunks(path: str, chunk_size: int, sheet: str | None) -> Iterator[Any]:
+    for chunk in data_loader.iter_excel_chunks(path, chunk_size, sheet):
+        yield data_loader.normalize_columns(chunk)
+
+
+def _chunk_rows(chunk: Any) -> Iterator[tuple[Any, ...]]:
+    return zip(
+        chunk["NOME"].tolist(),
+        chunk["DATA DE NASCIMENTO"].tolist(),
+        chunk["RESPONSÁVEL"].tolist(),
+        chunk["MÊS DE REFERÊNCIA"].tolist(),
+        chunk["ESPECIALIDADE"].map(str, na_action="ignore").tolist(),
+    )
+
+
+def _add_specialty(especialidades: list[str], esp: Any) -> None:
+    if isinstance(esp, str) and esp not in especialidades:
+        especialidades.append(esp)
+
+
+def _group_presorted(chunks: Iterator[Any]) -> Iterator[Patient]:
+    current: list[Any] | None = None
+    seen: set[str] = set()
+    for chunk in chunks:
+        for nome, data_nascimento, responsavel, mes_referencia, esp in _chunk_rows(chunk):
+            if current is None or nome != current[0]:
+                if nome in seen:
+                    raise ValueError(
+                        f"A planilha não está ordenada por paciente: '{nome}' aparece em "
+                        "linhas separadas. Gere sem a opção de planilha ordenada."
+                    )
+                seen.add(nome)
+                if current is not None:
+                    yield current[0], data_loader.make_patient(*current)
+                current = [nome, data_nascimento, responsavel, mes_referencia, []]
+            _add_specialty(current[4], esp)
+    if current is not None:
+        yield current[0], data_loader.make_patient(*current)
+
+
+def _group_spilled(chunks: Iterator[Any], spill_dir: str | None) -> Iterator[Patient]:
+    with tempfile.TemporaryDirectory(dir=spill_dir, prefix="gerador_relatorios_") as tmp:
+        db = sqlite3.connect(os.path.join(tmp, "linhas.sqlite"))
+        try:
+            db.execute("PRAGMA journal_mode=OFF")
+            db.execute("PRAGMA synchronous=OFF")
+            # rowid de `pacientes` = ordem da primeira aparição; os dados do
+            # paciente vêm dessa primeira linha (INSERT OR IGNORE).
+            db.execute(
+                "CREATE TABLE pacientes (nome TEXT PRIMARY KEY, data_nascimento TEXT, "
+                "responsavel TEXT, mes_referencia TEXT)"
+            )
+            db.execute("CREATE TABLE especialidades (seq INTEGER PRIMARY KEY, nome TEXT, esp TEXT)")
+            for chunk in chunks:
+                rows = list(_chunk_rows(chunk))
+                db.executemany(
+                    "INSERT OR IGNORE INTO pacientes VALUES (?, ?, ?, ?)", (row[:4] for row in rows)
+                )
+                db.executemany(
+                    "INSERT INTO especialidades (nome, esp) VALUES (?, ?)",
+                    ((row[0], row[4]) for row in rows if isinstance(row[4], str)),
+                )
+                db.commit()
+            db.execute("CREATE INDEX especialidades_nome ON especialidades (nome, seq)")
+
+            cursor = db.execute(
+                "SELECT p.rowid, p.nome, p.data_nascimento, p.responsavel, p.mes_referencia, e.esp "
+                "FROM pacientes p LEFT JOIN especialidades e ON e.nome = p.nome "
+                "ORDER BY p.rowid, e.seq"
+            )
+            current: list[Any] | None = None
+            current_id = None
+            for row_id, nome, data_nascimento, responsavel, mes_referencia, esp in cursor:
+                if row_id != current_id:
+                    if current is not None:
+                        yield current[0], data_loader.make_patient(*current)
+                    current_id = row_id
+                    current = [nome, data_nascimento, responsavel, mes_referencia, []]
+                _add_specialty(current[4], esp)
+            if current is not None:
+                yield current[0], data_loader.make_patient(*current)
+        finally:
+            db.close()
+
+
+def iter_patients(
+    path: str,
+    presorted: bool = False,
+    chunk_size: int = data_loader.CHUNK_SIZE,
+    sheet: str | None = None,
+    spill_dir: str | None = None,
+) -> Iterator[Patient]:
+    """Percorre os pacientes da planilha, um de cada vez, sem carregá-la inteira.
+
+    Os registros são iguais aos de ``group_patients``. O cabeçalho é validado
+    já nesta chamada (``ValueError`` se faltar coluna). Com
+    ``presorted=True`` as linhas de cada paciente devem ser contíguas; se
+    não forem, é gerado ``ValueError`` ao encontrar o paciente repetido.
+    """
+    chunks = _normalized_chunks(path, chunk_size, sheet)
+    first = next(chunks, None)
+
+    def all_chunks() -> Iterator[Any]:
+        if first is not None:
+            yield first
+            yield from chunks
+
+    if presorted:
+        return _group_presorted(all_chunks())
+    return _group_spilled(all_chunks(), spill_dir)
+
+
+def directory_sink(output_dir: str) -> Callable[[ReportResult], None]:
+    """Grava cada relatório gerado em memória como arquivo em ``output_dir``."""
+
+    def write(result: ReportResult) -> None:
+        if result.ok and result.data is not None and result.filename:
+            path = os.path.join(output_dir, result.filename)
+            with atomic_open(path) as f:
+                f.write(result.data)
+            result.path = path
+
+    return write
+
+
+class WriteBehind:
+    """Grava os resultados em uma thread separada, atrás de uma fila limitada.
+
+    ``submit`` bloqueia quando há ``max_pending`` relatórios esperando
+    gravação, o que limita a memória. Os resultados gravados saem, na ordem,
+    por ``completed``; falhas de gravação viram resultados com erro.
+    """
+
+    _DONE = object()
+
+    def __init__(self, sink: Callable[[ReportResult], None], max_pending: int = DEFAULT_MAX_PENDING) -> None:
+        self.sink = sink
+        self._pending: queue.Queue[Any] = queue.Queue(maxsize=max_pending)
+        self._completed: queue.Queue[ReportResult] = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            result = self._pending.get()
+            if result is self._DONE:
+                return
+            start = time.perf_counter()
+            try:
+                self.sink(result)
+            except Exception as e:
+                result.ok, result.path, result.error = False, None, f"Erro ao gravar: {e}"
+            result.phases[WRITE] = result.phases.get(WRITE, 0.0) + time.perf_counter() - start
+            # O conteúdo já foi gravado; não precisa mais ficar em memória.
+            result.data = None
+            self._completed.put(result)
+
+    def submit(self, result: ReportResult) -> None:
+        self._pending.put(result)
+
+    def completed(self) -> Iterator[ReportResult]:
+        """Resultados já gravados (sem bloquear)."""
+        while True:
+            try:
+                yield self._completed.get_nowait()
+            except queue.Empty:
+                return
+
+    def close(self) -> Iterator[ReportResult]:
+        """Espera a gravação dos pendentes e devolve os resultados restantes."""
+        self._pending.put(self._DONE)
+        self._thread.join()
+        return self.completed()
+
+
+def stream_reports(
+    patients: Iterator[Patient],
+    report_type: str,
+    sink: Callable[[ReportResult], None],
+    workers: int | None = None,
+    engine: str = DEFAULT_ENGINE,
+    max_pending: int = DEFAULT_MAX_PENDING,
+) -> Iterator[ReportResult]:
+    """Gera e grava (via ``sink``) os relatórios de ``patients`` à medida que chegam.
+
+    Devolve um resultado por paciente, na ordem, depois de gravado.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Motor de geração desconhecido: {engine}")
+    tasks = ((str(nome), pdata, report_type, None, engine) for nome, pdata in patients)
+    writer = WriteBehind(sink, max_pending)
+    try:
+        with ReportPool(workers) as pool:
+            for result in pool.imap(tasks):
+                writer.submit(result)
+                yield from writer.completed()
+    finally:
+        remaining = writer.close()
+    yield from remaining
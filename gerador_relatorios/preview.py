@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import ttk
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class PreviewModel:
+    """Entrega as linhas da planilha para a pré-visualização, página a página.
+
+    Só as páginas efetivamente exibidas são convertidas em tuplas, e apenas
+    as ``max_pages`` mais recentes ficam em memória.
+    """
+
+    def __init__(self, page_size: int = 200, max_pages: int = 8) -> None:
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self._data: pd.DataFrame | None = None
+        self._pages: OrderedDict[int, list[tuple[Any, ...]]] = OrderedDict()
+
+    def set_data(self, data: pd.DataFrame | None) -> None:
+        self._data = data
+        self._pages.clear()
+
+    def __len__(self) -> int:
+        return 0 if self._data is None else len(self._data)
+
+    def _page(self, number: int) -> list[tuple[Any, ...]]:
+        # Importado aqui: a interface abre sem carregar o pandas.
+        from .data_loader import NOT_INFORMED, REQUIRED_COLUMNS
+
+        page = self._pages.get(number)
+        if page is not None:
+            self._pages.move_to_end(number)
+            return page
+        assert self._data is not None
+        start = number * self.page_size
+        chunk = self._data.iloc[start:start + self.page_size][REQUIRED_COLUMNS]
+        chunk = chunk.assign(ESPECIALIDADE=chunk["ESPECIALIDADE"].fillna(NOT_INFORMED))
+        page = list(chunk.itertuples(index=False, name=None))
+        self._pages[number] = page
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+        return page
+
+    def rows(self, start: int, count: int) -> list[tuple[Any, ...]]:
+        """Retorna até ``count`` linhas a partir de ``start``."""
+        end = min(start + count, len(self))
+        result: list[tuple[Any, ...]] = []
+        index = max(start, 0)
+        while index < end:
+            number, offset = divmod(index, self.page_size)
+            page = self._page(number)
+            take = page[offset:offset + end - index]
+            result.extend(take)
+            index += len(take)
+        return result
+
+
+class VirtualTreeview:
+    """Treeview que materializa apenas as linhas visíveis.
+
+    A barra de rolagem vertical controla o deslocamento dentro do
+    ``PreviewModel``; o Treeview mantém um número fixo de itens (o que cabe
+    na tela) cujos valores são trocados a cada rolagem.
+    """
+
+    def __init__(
+        self,
+        tree: ttk.Treeview,
+        scrollbar: ttk.Scrollbar,
+        model: PreviewModel | None = None,
+        on_total: Callable[[int], None] | None = None,
+    ) -> None:
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.model = model or PreviewModel()
+        self.on_total = on_total
+        self.offset = 0
+        self.visible_rows = max(int(tree.cget("height")), 1)
+
+        scrollbar.configure(command=self._on_scrollbar)
+        tree.configure(yscrollcommand="")
+        tree.bind("<Configure>", self._on_configure, add="+")
+        tree.bind("<MouseWheel>", self._on_mousewheel, add="+")
+        tree.bind("<Button-4>", lambda e: self.scroll(-3), add="+")
+        tree.bind("<Button-5>", lambda e: self.scroll(3), add="+")
+        tree.bind("<Prior>", lambda e: self.scroll(-self.visible_rows), add="+")
+        tree.bind("<Next>", lambda e: self.scroll(self.visible_rows), add="+")
+
+    def set_data(self, data: pd.DataFrame | None) -> None:
+        self.model.set_data(data)
+        self.offset = 0
+        self.refresh()
+        # Ajusta o número de linhas à altura real do widget após o desenho.
+        self.tree.after_idle(self._on_configure, None)
+        if self.on_total is not None:
+            self.on_total(len(self.model))
+
+    def clear(self) -> None:
+        self.set_data(None)
+
+    def _max_offset(self) -> int:
+        return max(len(self.model) - self.visible_rows, 0)
+
+    def scroll(self, rows: int) -> None:
+        self.scroll_to(self.offset + rows)
+
+    def scroll_to(self, offset: int) -> None:
+        offset = min(max(offset, 0), self._max_offset())
+        if offset != self.offset:
+            self.offset = offset
+            self.refresh()
+
+    def refresh(self) -> None:
+        rows = self.model.rows(self.offset, self.visible_rows)
+        items = self.tree.get_children()
+        for index, values in enumerate(rows):
+            if index < len(items):
+                self.tree.item(items[index], values=values)
+            else:
+                self.tree.insert("", tk.END, values=values)
+        if len(items) > len(rows):
+            self.tree.delete(*items[len(rows):])
+
+        total = len(self.model)
+        if total:
+            self.scrollbar.set(self.offset / total, min(self.offset + self.visible_rows, total) / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _on_scrollbar(self, *args: str) -> None:
+        if args[0] == "moveto":
+            self.scroll_to(round(float(args[1]) * len(self.model)))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            self.scroll(step * self.visible_rows if args[2] == "pages" else step)
+
+    def _on_mousewheel(self, event: tk.Event) -> str:
+        # Windows envia múltiplos de 120; macOS envia valores pequenos.
+        delta = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.scroll(-delta * 3)
+        return "break"
+
+    def _on_configure(self, event: tk.Event | None) -> None:
+        items = self.tree.get_children()
+        if not items:
+            return
+        bbox = self.tree.bbox(items[0])
+        if not bbox:
+            return
+        _, top, _, row_height = bbox
+        rows = max((self.tree.winfo_height() - top) // max(row_height, 1), 1)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.offset = min(self.offset, self._max_offset())
+            self.refresh()
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import io
 import os
-from typing import Dict, Any
+from typing import Collection
 from docx import Document
 from docx.shared import Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
@@ -9,7 +10,12 @@ from docx.oxml.shared import OxmlElement, qn
 from math import ceil
 from docx.enum.table import WD_TABLE_ALIGNMENT
 
-from .utils import resource_path
+from .fragments import get_fragment_cache
+from .metrics import BUILD, SAVE, phase
+from .models import PatientData, as_record
+from .specialties import categories_of
+from .template_cache import new_document
+from .utils import atomic_open
 
 SIGNATURES: dict[str, list[tuple[str, dict[str, bool]]]] = {
     "PSICOTERAPIA": [
@@ -80,33 +86,47 @@ def add_table_borders(table) -> None:
             tcPr.append(tcBorders)
 
 
-def create_header_table(doc: Document, patient_data: Dict[str, Any], convenio: str = "FUSEX"):
-    table = doc.add_table(rows=6, cols=1)
+def specialties_label(especialidades: Collection[str]) -> str:
+    """Texto do campo "Especialidade" do cabeçalho."""
+    return ", ".join(list(set(especialidades)))
+
+
+def _header_skeleton(doc: Document, labels: tuple[str, ...]):
+    table = doc.add_table(rows=len(labels), cols=1)
     add_table_borders(table)
+    for i, label in enumerate(labels):
+        paragraph = table.cell(i, 0).paragraphs[0]
+        paragraph.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+        if label is not None:
+            title_run = paragraph.add_run(label + ": ")
+            title_run.bold = True
+    return table
+
 
-    especialidades_unicas = list(set(patient_data["especialidades"]))
-    especialidades_str = ", ".join(especialidades_unicas)
+def create_header_table(doc: Document, patient_data: PatientData, convenio: str = "FUSEX"):
+    record = as_record(patient_data)
+    especialidades_str = specialties_label(record.especialidades)
 
     header_data = [
-        f"Nome: {patient_data['info']['nome']}",
-        f"Data de Nascimento: {patient_data['info']['data_nascimento']}",
-        f"Responsável: {patient_data['info']['responsavel']}",
+        f"Nome: {record.nome}",
+        f"Data de Nascimento: {record.data_nascimento}",
+        f"Responsável: {record.responsavel}",
         f"Convênio: {convenio}",
         f"Especialidade: {especialidades_str}",
-        f"Mês de referência: {patient_data['info']['mes_referencia']}",
+        f"Mês de referência: {record.mes_referencia}",
     ]
 
-    for i, data in enumerate(header_data):
-        cell = table.cell(i, 0)
-        paragraph = cell.paragraphs[0]
-        paragraph.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-        if ":" in data:
-            parts = data.split(":", 1)
-            title_run = paragraph.add_run(parts[0] + ": ")
-            title_run.bold = True
-            paragraph.add_run(parts[1])
-        else:
-            run = paragraph.add_run(data)
+    # A moldura (bordas e rótulos em negrito) vem do cache de fragmentos;
+    # aqui só entram os valores do paciente.
+    rows = [data.split(":", 1) if ":" in data else [None, data] for data in header_data]
+    labels = tuple(label for label, _ in rows)
+    table = get_fragment_cache().table(
+        doc, ("cabecalho", labels), lambda: _header_skeleton(doc, labels)
+    )
+
+    for row, (label, value) in zip(table.rows, rows):
+        run = row.cells[0].paragraphs[0].add_run(value)
+        if label is None:
             run.bold = True
 
     doc.add_paragraph()
@@ -175,7 +195,7 @@ def add_signature_section(doc: Document, signature_type: str = "tipico"):
 
 def build_signature_block_grid(
     doc: Document,
-    specialties: list[str],
+    specialties: Collection[str],
     cols: int = 2,
     font_size: int = 12
 ) -> None:
@@ -184,17 +204,24 @@ def build_signature_block_grid(
       1) uma linha em branco
       2) tabela com `cols` colunas e linhas suficientes para todas as especialidades,
          preenchendo cada célula com o bloco de assinatura correspondente.
+
+    `specialties` são especialidades canônicas (chaves de SIGNATURES), como as
+    de `specialties.categories_of`.
     """
     # 1) espaço antes
     doc.add_paragraph()
 
-    # 3) monta lista de blocos só para as especialidades que batem
-    upper_sps = [s.upper() for s in specialties]
-    blocks = [
-        SIGNATURES[esp]
-        for esp in SIGNATURES
-        if esp in upper_sps
-    ]
+    # 3) monta lista de blocos só para as especialidades do paciente
+    selected = tuple(esp for esp in SIGNATURES if esp in specialties)
+    get_fragment_cache().table(
+        doc,
+        ("assinaturas", selected, cols, font_size),
+        lambda: _signature_table(doc, selected, cols, font_size),
+    )
+
+
+def _signature_table(doc: Document, selected: tuple[str, ...], cols: int, font_size: int):
+    blocks = [SIGNATURES[esp] for esp in selected]
 
     # 4) se nada bateu, usa um fallback único
     if not blocks:
@@ -229,6 +256,7 @@ def build_signature_block_grid(
             if style.get("italic"):
                 run.italic = True
             p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    return table
 
 
 def add_unordered_list_with_styling(
@@ -260,18 +288,15 @@ def add_unordered_list_with_styling(
 
 # Geradores de relatórios templates
 
-def generate_pne_report(patient_data: Dict[str, Any], output_dir: str) -> None:
-    try:
-        papel_timbrado = resource_path("papel timbrado.docx")
-        doc = Document(papel_timbrado)
-    except Exception:
-        doc = Document()
-        header_p = doc.add_paragraph()
-        header_p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        run = header_p.add_run("CLÍNICA MÉDICA - PNE")
-        run.bold = True
-        run.font.size = Pt(16)
-        doc.add_paragraph()
+def report_filename(patient_data: PatientData, report_type: str = "PNE") -> str:
+    """Nome do arquivo .docx do relatório do paciente."""
+    prefix = "Relatório_PNE" if report_type == "PNE" else "Relatório_Típico"
+    return f"{prefix}_{as_record(patient_data).nome.replace(' ', '_')}.docx"
+
+
+def build_pne_document(patient_data: PatientData) -> Document:
+    patient_data = as_record(patient_data)
+    doc = new_document("CLÍNICA MÉDICA - PNE")
 
     create_header_table(doc, patient_data, "Fusex PNE")
 
@@ -285,16 +310,16 @@ def generate_pne_report(patient_data: Dict[str, Any], output_dir: str) -> None:
         "nutricional é essencial para abordar questões alimentares específicas.",
     )
 
-    especialidades_encontradas = [esp.upper() for esp in patient_data["especialidades"]]
+    categorias = categories_of(patient_data)
 
-    if any("NUTRI" in esp or "NUTRIÇÃO" in esp for esp in especialidades_encontradas):
+    if "NUTRIÇÃO" in categorias:
         add_section_title(doc, "Evolução", Pt(16), Pt(8))
         add_section_text(
             doc,
             "Desde o início do acompanhamento em terapia alimentar, observa-se progresso gradual na aceitação de novos alimentos, bem como aumento da tolerância a diferentes texturas, cores e temperaturas. O paciente tem apresentado maior disponibilidade para explorar o ambiente alimentar de forma positiva, com redução de comportamentos de recusa extrema ou esquiva. Em contextos estruturados e com suporte terapêutico, verifica-se participação mais ativa durante exposições alimentares e maior engajamento nas atividades propostas. Em casos infantis, o uso de estratégias lúdicas, modelagem e reforçamento positivo tem sido eficaz na promoção de avanços. Em pacientes adolescentes e adultos, nota-se maior consciência sobre suas dificuldades e disposição para experimentar novas abordagens comportamentais e cognitivas ligadas à alimentação.",
         )
     
-    if any("FISIO" in esp or "FISIOTERAPIA" in esp for esp in especialidades_encontradas):
+    if "FISIOTERAPIA" in categorias:
         add_section_title(doc, "FISIOTERAPIA", Pt(16), Pt(8))
         add_section_text(
             doc,
@@ -322,7 +347,7 @@ def generate_pne_report(patient_data: Dict[str, Any], output_dir: str) -> None:
             "Nos atendimentos infantis, a fisioterapia tem sido conduzida por meio de estratégias lúdicas, modelagem motora e reforço positivo, respeitando as particularidades de cada criança e priorizando o desenvolvimento funcional."
         )
 
-    if any("ABA" in esp or "TERAPIA ABA" in esp for esp in especialidades_encontradas):
+    if "ABA" in categorias:
         add_specialty_section(
             doc,
             "Terapia ABA",
@@ -335,7 +360,7 @@ def generate_pne_report(patient_data: Dict[str, Any], output_dir: str) -> None:
             is_evolution=True,
         )
 
-    if any("PSICOTERAPIA" in esp for esp in especialidades_encontradas):
+    if "PSICOTERAPIA" in categorias:
         add_specialty_section(
             doc,
             "Psicoterapia",
@@ -347,7 +372,7 @@ def generate_pne_report(patient_data: Dict[str, Any], output_dir: str) -> None:
             is_evolution=True,
         )
 
-    if any("TERAPIA OCUPACIONAL" in esp or "OCUPACIONAL" in esp for esp in especialidades_encontradas):
+    if "TERAPIA OCUPACIONAL" in categorias:
         add_specialty_section(
             doc,
             "Terapia Ocupacional",
@@ -359,7 +384,7 @@ def generate_pne_report(patient_data: Dict[str, Any], output_dir: str) -> None:
             is_evolution=True,
         )
 
-    if any("FONOAUDIOLOGIA" in esp or "FONO" in esp for esp in especialidades_encontradas):
+    if "FONOAUDIOLOGIA" in categorias:
         add_specialty_section(
             doc,
             "Fonoaudiologia",
@@ -371,7 +396,7 @@ def generate_pne_report(patient_data: Dict[str, Any], output_dir: str) -> None:
             is_evolution=True,
         )
 
-    if any("PSICOMOTRICIDADE" in esp or "PSICOMOTOR" in esp for esp in especialidades_encontradas):
+    if "PSICOMOTRICIDADE" in categorias:
         add_specialty_section(
             doc,
             "Psicomotricidade",
@@ -383,7 +408,7 @@ def generate_pne_report(patient_data: Dict[str, Any], output_dir: str) -> None:
             is_evolution=True,
         )
 
-    if any("PSICOPEDAGOGIA" in esp or "PEDAGOG" in esp for esp in especialidades_encontradas):
+    if "PSICOPEDAGOGIA" in categorias:
         add_specialty_section(
             doc,
             "Psicopedagogia",
@@ -397,7 +422,7 @@ def generate_pne_report(patient_data: Dict[str, Any], output_dir: str) -> None:
 
     add_section_title(doc, "Programação Terapêutica Atual", Pt(30), Pt(12))
 
-    if any("FISIO" in esp or "FISIOTERAPIA" in esp for esp in especialidades_encontradas):
+    if "FISIOTERAPIA" in categorias:
         add_specialty_section(
             doc,
             "Fisioterapia",
@@ -405,7 +430,7 @@ def generate_pne_report(patient_data: Dict[str, Any], output_dir: str) -> None:
         )
         
 
-    if any("ABA" in esp or "TERAPIA ABA" in esp for esp in especialidades_encontradas):
+    if "ABA" in categorias:
         add_section_title(doc, "Terapia ABA", Pt(16), Pt(8))
         add_section_text(
             doc,
@@ -416,7 +441,7 @@ def generate_pne_report(patient_data: Dict[str, Any], output_dir: str) -> None:
             "naturalístico e treino de habilidades sociais.",
         )
 
-    if any("PSICOTERAPIA" in esp for esp in especialidades_encontradas):
+    if "PSICOTERAPIA" in categorias:
         add_section_title(doc, "Psicoterapia", Pt(16), Pt(8))
         add_section_text(
             doc,
@@ -426,7 +451,7 @@ def generate_pne_report(patient_data: Dict[str, Any], output_dir: str) -> None:
             "(brincadeiras simbólicas, recursos visuais, técnicas cognitivas, entre outras).",
         )
 
-    if any("TERAPIA OCUPACIONAL" in esp or "OCUPACIONAL" in esp for esp in especialidades_encontradas):
+    if "TERAPIA OCUPACIONAL" in categorias:
         add_section_title(doc, "Terapia Ocupacional", Pt(16), Pt(8))
         add_section_text(
             doc,
@@ -436,7 +461,7 @@ def generate_pne_report(patient_data: Dict[str, Any], output_dir: str) -> None:
             "conforme a faixa etária, para favorecer o desempenho ocupacional global.",
         )
 
-    if any("FONOAUDIOLOGIA" in esp or "FONO" in esp for esp in especialidades_encontradas):
+    if "FONOAUDIOLOGIA" in categorias:
         add_section_title(doc, "Fonoaudiologia", Pt(16), Pt(8))
         add_section_text(
             doc,
@@ -446,7 +471,7 @@ def generate_pne_report(patient_data: Dict[str, Any], output_dir: str) -> None:
             "considera o nível atual de linguagem e o contexto escolar, familiar e social da paciente.",
         )
 
-    if any("PSICOMOTRICIDADE" in esp or "PSICOMOTOR" in esp for esp in especialidades_encontradas):
+    if "PSICOMOTRICIDADE" in categorias:
         add_section_title(doc, "Psicomotricidade", Pt(16), Pt(8))
         add_section_text(
             doc,
@@ -456,7 +481,7 @@ def generate_pne_report(patient_data: Dict[str, Any], output_dir: str) -> None:
             "aprimorar a integração sensório-motora.",
         )
 
-    if any("PSICOPEDAGOGIA" in esp or "PEDAGOG" in esp for esp in especialidades_encontradas):
+    if "PSICOPEDAGOGIA" in categorias:
         add_section_title(doc, "Psicopedagogia", Pt(16), Pt(8))
         add_section_text(
             doc,
@@ -466,14 +491,14 @@ def generate_pne_report(patient_data: Dict[str, Any], output_dir: str) -> None:
             "da autoestima escolar e o apoio no planejamento e organização do tempo.",
         )
     
-    if any("NUTRI" in esp or "NUTRIÇÃO" in esp for esp in especialidades_encontradas):
+    if "NUTRIÇÃO" in categorias:
         add_section_text(
             doc,
             "A intervenção segue com o objetivo de ampliar o repertório alimentar, reduzir a ansiedade associada à alimentação e favorecer a construção de uma relação mais funcional e saudável com os alimentos. As estratégias utilizadas incluem: exposição gradual a novos alimentos, dessensibilização sistemática, treino de habilidades de enfrentamento, uso de reforçadores, orientação nutricional (em parceria com outros profissionais) e envolvimento familiar. O planejamento terapêutico é individualizado, levando em consideração as preferências, o histórico alimentar e os fatores sensoriais e emocionais que impactam a alimentação do paciente. O vínculo terapêutico tem sido essencial para a manutenção do engajamento e para a superação de resistências naturais do processo.",
         )
 
     add_section_title(doc, "Considerações Finais", Pt(30), Pt(12))
-    if not(any("NUTRI" in esp or "NUTRIÇÃO" in esp for esp in especialidades_encontradas)):
+    if "NUTRIÇÃO" not in categorias:
         add_section_text(
             doc,
             "A paciente segue em acompanhamento com evolução positiva. O trabalho "
@@ -497,31 +522,30 @@ def generate_pne_report(patient_data: Dict[str, Any], output_dir: str) -> None:
     add_fixed_signature_section(doc, "Brasília, data da assinatura digital.")
 
     # add_signature_section(doc, "pne")
-    build_signature_block_grid(doc, patient_data["especialidades"], cols=2)
+    build_signature_block_grid(doc, categorias, cols=2)
 
-    filename = f"Relatório_PNE_{patient_data['info']['nome'].replace(' ', '_')}.docx"
-    filepath = os.path.join(output_dir, filename)
-    doc.save(filepath)
+    return doc
 
 
-def generate_tipico_report(patient_data: Dict[str, Any], output_dir: str) -> None:
-    if any("NUTRI" in esp or "NUTRIÇÃO" in esp for esp in patient_data["especialidades"]):
+def generate_pne_report(patient_data: PatientData, output_dir: str) -> str:
+    with phase(BUILD):
+        doc = build_pne_document(patient_data)
+    filepath = os.path.join(output_dir, report_filename(patient_data, "PNE"))
+    with phase(SAVE), atomic_open(filepath) as f:
+        doc.save(f)
+    return filepath
+
+
+def build_tipico_document(patient_data: PatientData) -> Document:
+    patient_data = as_record(patient_data)
+    categorias = categories_of(patient_data)
+    if "NUTRIÇÃO" in categorias:
         raise ValueError("Fusex Típico não contempla NUTRIÇÃO.")
     
-    if any("FISIO" in esp or "FISIOTERAPIA" in esp for esp in patient_data["especialidades"]):
+    if "FISIOTERAPIA" in categorias:
         raise ValueError("Fusex Típico não contempla FISIOTERAPIA.")
     
-    try:
-        papel_timbrado = resource_path("papel timbrado.docx")
-        doc = Document(papel_timbrado)
-    except Exception:
-        doc = Document()
-        header_p = doc.add_paragraph()
-        header_p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        run = header_p.add_run("CLÍNICA MÉDICA")
-        run.bold = True
-        run.font.size = Pt(16)
-        doc.add_paragraph()
+    doc = new_document("CLÍNICA MÉDICA")
 
     create_header_table(doc, patient_data, "FUSEX")
 
@@ -558,9 +582,8 @@ def generate_tipico_report(patient_data: Dict[str, Any], output_dir: str) -> Non
     )
 
     add_section_title(doc, "Programação Terapêutica Atual")
-    especialidades_encontradas = [esp.upper() for esp in patient_data["especialidades"]]
 
-    if any("PSICOTERAPIA" in esp.upper() for esp in patient_data["especialidades"]):
+    if "PSICOTERAPIA" in categorias:
         add_section_text(
             doc,
             "A psicoterapia segue com o objetivo de promover o autoconhecimento, "
@@ -576,7 +599,7 @@ def generate_tipico_report(patient_data: Dict[str, Any], output_dir: str) -> Non
             "e ajustes nas intervenções conforme a resposta do(a) paciente.",
         )
 
-    if any("ABA" in esp or "TERAPIA ABA" in esp for esp in especialidades_encontradas):
+    if "ABA" in categorias:
         add_section_title(doc, "Terapia ABA", Pt(16), Pt(8))
         add_section_text(
             doc,
@@ -587,7 +610,7 @@ def generate_tipico_report(patient_data: Dict[str, Any], output_dir: str) -> Non
             "naturalístico e treino de habilidades sociais.",
         )
 
-    if any("TERAPIA OCUPACIONAL" in esp or "OCUPACIONAL" in esp for esp in especialidades_encontradas):
+    if "TERAPIA OCUPACIONAL" in categorias:
         add_section_title(doc, "Terapia Ocupacional", Pt(16), Pt(8))
         add_section_text(
             doc,
@@ -597,7 +620,7 @@ def generate_tipico_report(patient_data: Dict[str, Any], output_dir: str) -> Non
             "conforme a faixa etária, para favorecer o desempenho ocupacional global.",
         )
 
-    if any("FONOAUDIOLOGIA" in esp or "FONO" in esp for esp in especialidades_encontradas):
+    if "FONOAUDIOLOGIA" in categorias:
         add_section_title(doc, "Fonoaudiologia", Pt(16), Pt(8))
         add_section_text(
             doc,
@@ -607,7 +630,7 @@ def generate_tipico_report(patient_data: Dict[str, Any], output_dir: str) -> Non
             "considera o nível atual de linguagem e o contexto escolar, familiar e social da paciente.",
         )
 
-    if any("PSICOMOTRICIDADE" in esp or "PSICOMOTOR" in esp for esp in especialidades_encontradas):
+    if "PSICOMOTRICIDADE" in categorias:
         add_section_title(doc, "Psicomotricidade", Pt(16), Pt(8))
         add_section_text(
             doc,
@@ -617,7 +640,7 @@ def generate_tipico_report(patient_data: Dict[str, Any], output_dir: str) -> Non
             "aprimorar a integração sensório-motora.",
         )
 
-    if any("PSICOPEDAGOGIA" in esp or "PEDAGOG" in esp for esp in especialidades_encontradas):
+    if "PSICOPEDAGOGIA" in categorias:
         add_section_title(doc, "Psicopedagogia", Pt(16), Pt(8))
         add_section_text(
             doc,
@@ -640,8 +663,39 @@ def generate_tipico_report(patient_data: Dict[str, Any], output_dir: str) -> Non
     add_fixed_signature_section(doc, "Brasília, data da assinatura digital.")
 
     # add_signature_section(doc, "tipico")
-    build_signature_block_grid(doc, patient_data["especialidades"], cols=2)
+    build_signature_block_grid(doc, categorias, cols=2)
+
+    return doc
+
+
+def generate_tipico_report(patient_data: PatientData, output_dir: str) -> str:
+    with phase(BUILD):
+        doc = build_tipico_document(patient_data)
+    filepath = os.path.join(output_dir, report_filename(patient_data, "TIPICO"))
+    with phase(SAVE), atomic_open(filepath) as f:
+        doc.save(f)
+    return filepath
+
+
+def build_document(patient_data: PatientData, report_type: str = "PNE") -> Document:
+    """Monta (sem salvar) o documento do tipo escolhido ("PNE" ou "TIPICO")."""
+    with phase(BUILD):
+        if report_type == "PNE":
+            return build_pne_document(patient_data)
+        return build_tipico_document(patient_data)
+
+
+def document_bytes(patient_data: PatientData, report_type: str = "PNE") -> bytes:
+    """Gera o relatório em memória e retorna o conteúdo do arquivo .docx."""
+    doc = build_document(patient_data, report_type)
+    buffer = io.BytesIO()
+    with phase(SAVE):
+        doc.save(buffer)
+    return buffer.getvalue()
+
 
-    filename = f"Relatório_Típico_{patient_data['info']['nome'].replace(' ', '_')}.docx"
-    filepath = os.path.join(output_dir, filename)
-    doc.save(filepath)
+def generate_report(patient_data: PatientData, output_dir: str, report_type: str = "PNE") -> str:
+    """Gera o relatório do tipo escolhido ("PNE" ou "TIPICO") e retorna o caminho do arquivo."""
+    if report_type == "PNE":
+        return generate_pne_report(patient_data, output_dir)
+    return generate_tipico_report(patient_data, output_dir)
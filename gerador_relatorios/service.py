@@ -0,0 +1,374 @@
+"""Serviço HTTP local que gera um relatório por requisição.
+
+Uso::
+
+    python -m gerador_relatorios.service --porta 8765 --workers 2
+
+Endpoints:
+
+* ``POST /relatorio?tipo=PNE`` - corpo JSON no formato de ``patient_data``
+  (``{"info": {"nome": ..., ...}, "especialidades": [...]}``); responde com
+  o .docx gerado;
+* ``GET /stats`` - contadores, latência p50/p95 e relatórios por segundo;
+* ``GET /saude`` - verificação simples.
+
+O papel timbrado e os workers são carregados ao iniciar. Há no máximo
+``--fila`` relatórios em andamento ou aguardando um worker; além disso o
+serviço responde ``503`` com ``Retry-After`` em vez de acumular pedidos.
+Só a biblioteca padrão é usada (``http.server``).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import BrokenExecutor, CancelledError, Future, ProcessPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Sequence
+from urllib.parse import parse_qs, quote, urlsplit
+
+from . import data_loader
+from .batch import DEFAULT_ENGINE, ENGINES, ReportResult, default_workers, init_worker, render_task
+from .metrics import percentile
+from .models import PatientRecord
+from .template_cache import get_template_cache
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Pedidos aceitos por worker (em geração ou aguardando) antes de responder 503.
+PENDING_PER_WORKER = 2
+RETRY_AFTER_SECONDS = 1
+MAX_BODY_BYTES = 1024 * 1024
+# Latências guardadas para o cálculo dos percentis.
+LATENCY_WINDOW = 1000
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+REPORT_TYPES = ("PNE", "TIPICO")
+
+
+class ServiceBusy(Exception):
+    """Todos os lugares da fila estão ocupados."""
+
+
+class ServiceError(Exception):
+    """Falha inesperada do serviço ao gerar um relatório (não dos dados enviados)."""
+
+
+def parse_patient(payload: Any) -> PatientRecord:
+    """Valida o JSON recebido e monta o registro do paciente (``ValueError`` se inválido)."""
+    if not isinstance(payload, dict) or not isinstance(payload.get("info"), dict):
+        raise ValueError('O corpo deve ser um objeto com "info" e "especialidades".')
+    info = payload["info"]
+    nome = info.get("nome")
+    if not isinstance(nome, str) or not nome.strip():
+        raise ValueError('"info.nome" é obrigatório.')
+    especialidades = payload.get("especialidades", [])
+    if not isinstance(especialidades, list) or not all(isinstance(e, str) for e in especialidades):
+        raise ValueError('"especialidades" deve ser uma lista de textos.')
+    fields = {}
+    for field, default in (
+        ("data_nascimento", data_loader.MISSING_BIRTH_DATE),
+        ("responsavel", data_loader.NOT_INFORMED),
+        ("mes_referencia", data_loader.NOT_INFORMED),
+    ):
+        value = info.get(field)
+        fields[field] = default if value is None or value == "" else str(value)
+    return data_loader.make_patient(
+        nome,
+        fields["data_nascimento"],
+        fields["responsavel"],
+        fields["mes_referencia"],
+        list(dict.fromkeys(especialidades)),
+    )
+
+
+def content_length(value: str | None) -> int:
+    """Tamanho do corpo informado no cabeçalho ``Content-Length`` (``ValueError`` se inválido)."""
+    try:
+        length = int(value or 0)
+    except ValueError:
+        length = -1
+    if length < 0:
+        raise ValueError(f"Content-Length inválido: {value}")
+    return length
+
+
+class ReportService:
+    """Gera relatórios sob demanda com um pool de workers já aquecido.
+
+    Com ``workers=1`` os relatórios são gerados na própria thread da
+    requisição; senão em um pool de processos. ``render`` gera
+    ``ServiceBusy`` quando já há ``max_pending`` pedidos em andamento ou
+    quando um worker morreu (o pool é recriado e o pedido pode ser repetido)
+    e ``ServiceError`` para qualquer outra falha inesperada.
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        max_pending: int | None = None,
+        engine: str = DEFAULT_ENGINE,
+    ) -> None:
+        if engine not in ENGINES:
+            raise ValueError(f"Motor de geração desconhecido: {engine}")
+        self.workers = workers if workers is not None else default_workers()
+        if self.workers < 1:
+            raise ValueError("O número de workers deve ser pelo menos 1.")
+        self.max_pending = max_pending if max_pending is not None else self.workers * PENDING_PER_WORKER
+        self.engine = engine
+        self.slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor: ProcessPoolExecutor | None = None
+        self._futures: set[Future[ReportResult]] = set()
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._started = time.monotonic()
+        self.requests = self.generated = self.failures = self.rejected = self.in_flight = 0
+
+    def start(self) -> "ReportService":
+        """Carrega o papel timbrado e inicia os workers."""
+        get_template_cache().warm()
+        if self.workers > 1:
+            self._executor = self._new_executor()
+            # O pool cria os processos sob demanda; uma tarefa vazia por worker
+            # faz com que todos já estejam prontos antes do primeiro pedido.
+            for future in [self._executor.submit(init_worker) for _ in range(self.workers)]:
+                future.result()
+        self._started = time.monotonic()
+        return self
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+        )
+
+    def _replace_executor(self, broken: ProcessPoolExecutor) -> None:
+        """Troca o pool quebrado (um worker morreu) por um novo, uma única vez."""
+        with self._lock:
+            if self._executor is not broken:
+                # Já foi trocado por outra requisição, ou o serviço foi encerrado.
+                return
+            self._executor = self._new_executor()
+        broken.shutdown(wait=False)
+
+    def close(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            # `shutdown(cancel_futures=True)` só existe a partir do Python 3.9.
+            with self._lock:
+                futures = list(self._futures)
+            for future in futures:
+                future.cancel()
+            executor.shutdown()
+
+    def __enter__(self) -> "ReportService":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def render(self, patient_data: PatientRecord, report_type: str) -> ReportResult:
+        with self._lock:
+            self.requests += 1
+        if not self.slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise ServiceBusy()
+        with self._lock:
+            self.in_flight += 1
+        executor = self._executor
+        try:
+            task = (patient_data.nome, patient_data, report_type, None, self.engine)
+            if executor is None:
+                result = render_task(task)
+            else:
+                future = executor.submit(render_task, task)
+                with self._lock:
+                    self._futures.add(future)
+                try:
+                    result = future.result()
+                finally:
+                    with self._lock:
+                        self._futures.discard(future)
+        except CancelledError:
+            # O serviço está sendo encerrado.
+            raise ServiceBusy() from None
+        except BrokenExecutor:
+            # Um worker morreu: o pool não aceita mais tarefas e é recriado.
+            self._replace_executor(executor)
+            with self._lock:
+                self.failures += 1
+            raise ServiceBusy() from None
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+            raise ServiceError(str(e) or type(e).__name__) from e
+        finally:
+            self.slots.release()
+            with self._lock:
+                self.in_flight -= 1
+        with self._lock:
+            if result.ok:
+                self.generated += 1
+                self._latencies.append(result.elapsed)
+            else:
+                self.failures += 1
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            latencies = list(self._latencies)
+            uptime = time.monotonic() - self._started
+            return {
+                "workers": self.workers,
+                "fila_maxima": self.max_pending,
+                "em_andamento": self.in_flight,
+                "requisicoes": self.requests,
+                "gerados": self.generated,
+                "erros": self.failures,
+                "recusados": self.rejected,
+                "ativo_s": uptime,
+                "relatorios_por_segundo": self.generated / uptime if uptime > 0 else 0.0,
+                "latencia_ms": {
+                    "p50": percentile(latencies, 0.5) * 1000,
+                    "p95": percentile(latencies, 0.95) * 1000,
+                },
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "ReportServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict[str, str] | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: Any, headers: dict[str, str] | None = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self._send(status, body, "application/json; charset=utf-8", headers)
+
+    def do_GET(self) -> None:
+        path = urlsplit(self.path).path
+        if path == "/stats":
+            self._send_json(HTTPStatus.OK, self.server.service.stats())
+        elif path == "/saude":
+            self._send_json(HTTPStatus.OK, {"ok": True})
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {"erro": "Endereço não encontrado."})
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        if url.path != "/relatorio":
+            self._send_json(HTTPStatus.NOT_FOUND, {"erro": "Endereço não encontrado."})
+            return
+        report_type = parse_qs(url.query).get("tipo", ["PNE"])[0].upper()
+        body = None
+        try:
+            length = content_length(self.headers.get("Content-Length"))
+            if length > MAX_BODY_BYTES:
+                self.close_connection = True
+                self._send_json(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"erro": "Corpo da requisição muito grande."})
+                return
+            body = self.rfile.read(length)
+            if report_type not in REPORT_TYPES:
+                raise ValueError(f"Tipo de relatório inválido: {report_type}")
+            patient_data = parse_patient(json.loads(body or b"null"))
+        except ValueError as e:
+            if body is None:
+                # O corpo não foi lido; a conexão não pode ser reaproveitada.
+                self.close_connection = True
+            self._send_json(HTTPStatus.BAD_REQUEST, {"erro": str(e)})
+            return
+
+        try:
+            result = self.server.service.render(patient_data, report_type)
+        except ServiceBusy:
+            self._send_json(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                {"erro": "Serviço ocupado, tente novamente."},
+                {"Retry-After": str(RETRY_AFTER_SECONDS)},
+            )
+            return
+        except ServiceError as e:
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"erro": f"Erro interno ao gerar o relatório: {e}"})
+            return
+        if not result.ok or result.data is None:
+            self._send_json(HTTPStatus.UNPROCESSABLE_ENTITY, {"erro": result.error})
+            return
+        self._send(
+            HTTPStatus.OK,
+            result.data,
+            DOCX_CONTENT_TYPE,
+            {"Content-Disposition": f"attachment; filename*=UTF-8''{quote(result.filename or 'relatorio.docx')}"},
+        )
+
+
+class ReportServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], service: ReportService, verbose: bool = False) -> None:
+        super().__init__(address, _Handler)
+        self.service = service
+        self.verbose = verbose
+
+
+def make_server(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    service: ReportService | None = None,
+    verbose: bool = False,
+) -> ReportServer:
+    """Cria o servidor (``port=0`` escolhe uma porta livre); o serviço deve já estar iniciado."""
+    return ReportServer((host, port), service or ReportService().start(), verbose)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="gerador_relatorios.service",
+        description="Serviço HTTP local que gera um relatório por requisição.",
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"endereço (padrão: {DEFAULT_HOST})")
+    parser.add_argument("-p", "--porta", type=int, default=DEFAULT_PORT, help=f"porta (padrão: {DEFAULT_PORT})")
+    parser.add_argument("-w", "--workers", type=int, default=default_workers())
+    parser.add_argument("--fila", type=int, help="pedidos simultâneos aceitos (padrão: 2 por worker)")
+    parser.add_argument("--motor", choices=ENGINES, default=DEFAULT_ENGINE)
+    parser.add_argument("-v", "--verbose", action="store_true", help="registra cada requisição")
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        service = ReportService(args.workers, args.fila, args.motor)
+    except ValueError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 2
+    with service:
+        with make_server(args.host, args.porta, service, args.verbose) as server:
+            host, port = server.server_address[:2]
+            print(f"🌐 Serviço de relatórios em http://{host}:{port} ({service.workers} workers)", flush=True)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import os
+import pickle
+import tempfile
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+_SUFFIX = ".pkl"
+_HASH_BLOCK = 1024 * 1024
+_KEY_FILE = ".chave"
+_KEY_BYTES = 32
+_MAC_BYTES = hashlib.sha256().digest_size
+
+
+def default_cache_dir() -> str:
+    base = (
+        os.environ.get("LOCALAPPDATA")
+        or os.environ.get("XDG_CACHE_HOME")
+        or os.path.join(os.path.expanduser("~"), ".cache")
+    )
+    return os.path.join(base, "gerador_relatorios", "planilhas")
+
+
+class SheetCache:
+    """Cache em disco das planilhas já carregadas e normalizadas.
+
+    A chave é o hash SHA-256 do conteúdo do arquivo somado à versão do
+    carregador (``data_loader.LOADER_VERSION``), então editar a planilha ou
+    mudar a normalização invalida a entrada. Os DataFrames são gravados com
+    pickle (que preserva os blocos de colunas do pandas) e o diretório é
+    limitado a ``max_bytes``, descartando primeiro as entradas usadas há mais
+    tempo.
+
+    Ler um pickle pode executar código, então cada entrada começa com o
+    HMAC-SHA256 do conteúdo, feito com uma chave aleatória guardada no
+    próprio diretório (legível só pelo usuário); entradas que não conferem
+    são descartadas sem serem lidas. Isso impede que um arquivo colocado ou
+    alterado no cache seja carregado, mas parte do princípio de que o
+    diretório do cache é do usuário: quem consegue ler a chave ali já pode
+    executar código como ele.
+    """
+
+    def __init__(self, directory: str | None = None, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self._key: bytes | None = None
+
+    def _secret(self, create: bool) -> bytes | None:
+        """Chave do HMAC das entradas; criada (com ``create``) na primeira gravação."""
+        if self._key is not None:
+            return self._key
+        path = os.path.join(self.directory, _KEY_FILE)
+        try:
+            with open(path, "rb") as f:
+                key = f.read()
+        except FileNotFoundError:
+            if not create:
+                return None
+            key = os.urandom(_KEY_BYTES)
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o600)
+            except FileExistsError:
+                # Outro processo criou a chave ao mesmo tempo.
+                return self._secret(create)
+            with os.fdopen(fd, "wb") as f:
+                f.write(key)
+        if len(key) != _KEY_BYTES:
+            return None
+        self._key = key
+        return key
+
+    def key_for(self, path: str, sheet: str | None = None) -> str:
+        from .data_loader import LOADER_VERSION
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+                digest.update(block)
+        digest.update(f"|v{LOADER_VERSION}|{sheet or ''}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def get(self, key: str) -> pd.DataFrame | None:
+        entry = self._entry_path(key)
+        try:
+            with open(entry, "rb") as f:
+                content = f.read()
+            secret = self._secret(create=False)
+        except OSError:
+            return None
+        mac, payload = content[:_MAC_BYTES], content[_MAC_BYTES:]
+        if secret is None or not hmac.compare_digest(mac, hmac.new(secret, payload, hashlib.sha256).digest()):
+            # Entrada de outra chave, alterada ou cortada: não é lida.
+            self._remove(entry)
+            return None
+        try:
+            data = pickle.loads(payload)
+        except Exception:
+            # Entrada ilegível (versão do pandas...).
+            self._remove(entry)
+            return None
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return data
+
+    def put(self, key: str, data: pd.DataFrame) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            secret = self._secret(create=True)
+            if secret is None:
+                return
+            payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(hmac.new(secret, payload, hashlib.sha256).digest())
+                    f.write(payload)
+                os.replace(tmp_path, self._entry_path(key))
+            except BaseException:
+                self._remove(tmp_path)
+                raise
+        except OSError:
+            # Sem permissão ou sem espaço: o cache é apenas uma otimização.
+            return
+        self.evict()
+
+    def entries(self) -> list[tuple[float, int, str]]:
+        """Lista ``(último uso, tamanho, caminho)`` das entradas, da mais antiga para a mais recente."""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        entries = []
+        for name in names:
+            if not name.endswith(_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+        return entries
+
+    def evict(self) -> None:
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self) -> None:
+        for _, _, path in self.entries():
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,76 @@
+"""Classificação dos valores de ESPECIALIDADE da planilha em especialidades canônicas.
+
+As especialidades canônicas são as chaves de ``reports.SIGNATURES``. Cada
+valor da planilha é comparado sem acentos e sem diferença entre maiúsculas e
+minúsculas com os trechos de ``PATTERNS`` ("Nutricao", "nutrição" e
+"NUTRIÇÃO" dão no mesmo), e o resultado fica memorizado: em um lote, cada
+valor distinto é classificado uma única vez.
+"""
+from __future__ import annotations
+
+import unicodedata
+from functools import lru_cache
+from typing import Any, Iterable, Mapping
+
+# Na ordem em que as assinaturas aparecem no relatório.
+SPECIALTIES = (
+    "PSICOTERAPIA",
+    "ABA",
+    "TERAPIA OCUPACIONAL",
+    "FONOAUDIOLOGIA",
+    "PSICOMOTRICIDADE",
+    "PSICOPEDAGOGIA",
+    "NUTRIÇÃO",
+    "FISIOTERAPIA",
+)
+
+# Trechos que identificam cada especialidade no texto da planilha.
+PATTERNS: dict[str, tuple[str, ...]] = {
+    "PSICOTERAPIA": ("PSICOTERAPIA",),
+    "ABA": ("ABA",),
+    "TERAPIA OCUPACIONAL": ("OCUPACIONAL",),
+    "FONOAUDIOLOGIA": ("FONO",),
+    "PSICOMOTRICIDADE": ("PSICOMOTRICIDADE", "PSICOMOTOR"),
+    "PSICOPEDAGOGIA": ("PEDAGOG",),
+    "NUTRIÇÃO": ("NUTRI",),
+    "FISIOTERAPIA": ("FISIO",),
+}
+
+
+def fold(text: str) -> str:
+    """Remove acentos e converte para maiúsculas."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).upper().strip()
+
+
+_FOLDED_PATTERNS = tuple(
+    (specialty, tuple(fold(p) for p in PATTERNS[specialty])) for specialty in SPECIALTIES
+)
+
+
+@lru_cache(maxsize=4096)
+def classify(raw: str) -> frozenset[str]:
+    """Especialidades canônicas citadas em um valor de ESPECIALIDADE."""
+    folded = fold(raw)
+    return frozenset(
+        specialty
+        for specialty, patterns in _FOLDED_PATTERNS
+        if any(p in folded for p in patterns)
+    )
+
+
+def classify_all(values: Iterable[Any]) -> frozenset[str]:
+    """União das especialidades canônicas de vários valores."""
+    return frozenset().union(*(classify(str(value)) for value in values))
+
+
+def categories_of(patient_data: Mapping[str, Any]) -> frozenset[str]:
+    """Especialidades canônicas do paciente.
+
+    Usa ``patient_data["categorias"]`` quando já calculado em
+    ``data_loader.group_patients``; senão classifica as especialidades.
+    """
+    categories = patient_data.get("categorias")
+    if categories is None:
+        categories = classify_all(patient_data["especialidades"])
+    return categories
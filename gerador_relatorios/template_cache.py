@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import copy
+import os
+import threading
+from typing import Any
+
+from docx import Document
+from docx.document import Document as DocumentObject
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.shared import Pt
+
+from .metrics import TEMPLATE, phase
+from .utils import resource_path
+
+TEMPLATE_FILE = "papel timbrado.docx"
+
+
+def _clone_document(master: DocumentObject) -> DocumentObject:
+    """Cria uma cópia independente do documento mestre.
+
+    Apenas a parte principal (``word/document.xml``) é copiada; estilos,
+    cabeçalhos, rodapés e imagens do papel timbrado são somente leitura
+    durante a geração e por isso são compartilhados entre as cópias.
+    """
+    main_part = master.part
+    memo: dict[int, Any] = {
+        id(part): part
+        for part in main_part.package.iter_parts()
+        if part is not main_part
+    }
+    clone_part = copy.deepcopy(main_part, memo)
+    # Um objeto ``Document`` novo sobre a parte copiada, em vez de copiar o
+    # do mestre: o corpo que ele guarda em cache apontaria para uma cópia
+    # solta da árvore, e o conteúdo adicionado não chegaria ao arquivo salvo.
+    return DocumentObject(clone_part.element, clone_part)
+
+
+def _fallback_document(title: str) -> DocumentObject:
+    doc = Document()
+    header_p = doc.add_paragraph()
+    header_p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    run = header_p.add_run(title)
+    run.bold = True
+    run.font.size = Pt(16)
+    doc.add_paragraph()
+    return doc
+
+
+class TemplateCache:
+    """Mantém o papel timbrado carregado em memória e entrega cópias baratas.
+
+    O arquivo é lido uma única vez e relido apenas quando seu ``mtime`` ou
+    tamanho mudam. Se o arquivo não existir (ou não puder ser aberto), é
+    usado um documento simples com o título informado em ``fallback_title``.
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        self._key: tuple[str, int, int] | None = None
+        self._master: DocumentObject | None = None
+        self._fallbacks: dict[str, DocumentObject] = {}
+        self.loads = 0
+
+    @property
+    def path(self) -> str:
+        return self._path if self._path is not None else resource_path(TEMPLATE_FILE)
+
+    def _stat_key(self) -> tuple[str, int, int] | None:
+        path = self.path
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (path, st.st_mtime_ns, st.st_size)
+
+    def fingerprint(self) -> tuple[str, int, int] | None:
+        """Identifica a versão atual do papel timbrado (``None`` se ausente)."""
+        return self._stat_key()
+
+    def _get_master(self) -> DocumentObject | None:
+        key = self._stat_key()
+        if key is None:
+            return None
+        with self._lock:
+            if key != self._key:
+                try:
+                    master = Document(key[0])
+                except Exception:
+                    master = None
+                self._master = master
+                self._key = key
+                self.loads += 1
+            return self._master
+
+    def _get_fallback(self, title: str) -> DocumentObject:
+        with self._lock:
+            master = self._fallbacks.get(title)
+            if master is None:
+                master = self._fallbacks[title] = _fallback_document(title)
+            return master
+
+    def new_document(self, fallback_title: str) -> DocumentObject:
+        """Retorna um novo documento baseado no papel timbrado."""
+        with phase(TEMPLATE):
+            master = self._get_master()
+            if master is None:
+                master = self._get_fallback(fallback_title)
+            return _clone_document(master)
+
+    def warm(self) -> None:
+        """Carrega o papel timbrado antecipadamente (usado pelos workers)."""
+        self._get_master()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._key = None
+            self._master = None
+            self._fallbacks.clear()
+
+
+_default_cache = TemplateCache()
+
+
+def get_template_cache() -> TemplateCache:
+    return _default_cache
+
+
+def new_document(fallback_title: str) -> DocumentObject:
+    """Atalho para ``get_template_cache().new_document(...)``."""
+    return _default_cache.new_document(fallback_title)
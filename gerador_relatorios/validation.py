@@ -0,0 +1,140 @@
+"""Validação do lote inteiro antes de gerar qualquer relatório.
+
+``validate_batch`` confere todos os pacientes agrupados de uma vez e devolve
+a lista completa de problemas, para que o lote não comece a ser gerado (e
+deixe arquivos pela metade na pasta) quando vai falhar de qualquer forma:
+
+* especialidades que o tipo de relatório não contempla (NUTRIÇÃO e
+  FISIOTERAPIA no Típico) - erro;
+* pacientes sem nome - erro;
+* pacientes diferentes que gerariam o mesmo arquivo (a comparação ignora
+  maiúsculas/minúsculas, como no Windows) - erro;
+* nomes cujo arquivo (``reports.report_filename``) não pode ser criado no
+  Windows: caracteres ``\\ / : * ? " < > |``, final em ponto ou espaço ou
+  nomes reservados como ``CON`` e ``LPT1`` - erro;
+* especialidades sem assinatura em ``reports.SIGNATURES`` - aviso (o
+  relatório é gerado sem elas).
+
+Cada combinação distinta de especialidades é verificada uma única vez, não
+uma vez por paciente.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Mapping
+
+from .data_loader import MISSING_NAME
+from .models import PatientData, as_record
+from .reports import report_filename
+from .specialties import SPECIALTIES, classify
+
+ERROR = "erro"
+WARNING = "aviso"
+
+FORBIDDEN_SPECIALTY = "especialidade_nao_contemplada"
+UNKNOWN_SPECIALTY = "especialidade_desconhecida"
+EMPTY_NAME = "nome_vazio"
+FILENAME_COLLISION = "arquivo_repetido"
+INVALID_FILENAME = "nome_de_arquivo_invalido"
+
+INVALID_FILENAME_CHARS = frozenset('\\/:*?"<>|')
+RESERVED_FILENAMES = frozenset(
+    ["CON", "PRN", "AUX", "NUL"] + [f"COM{i}" for i in range(1, 10)] + [f"LPT{i}" for i in range(1, 10)]
+)
+
+# Especialidades que cada tipo de relatório não contempla (ver `reports`).
+FORBIDDEN_SPECIALTIES: dict[str, frozenset[str]] = {
+    "PNE": frozenset(),
+    "TIPICO": frozenset({"NUTRIÇÃO", "FISIOTERAPIA"}),
+}
+REPORT_NAMES = {"PNE": "PNE", "TIPICO": "Típico"}
+
+
+@dataclass(frozen=True)
+class ValidationIssue:
+    """Um problema encontrado em um paciente do lote."""
+
+    nome: str
+    kind: str
+    severity: str
+    message: str
+
+    @property
+    def is_error(self) -> bool:
+        return self.severity == ERROR
+
+    def __str__(self) -> str:
+        return f"{self.nome or '(sem nome)'}: {self.message}"
+
+
+def filename_problem(filename: str) -> str | None:
+    """Motivo pelo qual ``filename`` não pode ser criado no Windows, ou ``None``."""
+    invalid = sorted({c for c in filename if c in INVALID_FILENAME_CHARS or ord(c) < 32})
+    if invalid:
+        return "caracteres não permitidos em nomes de arquivo: " + " ".join(repr(c) for c in invalid)
+    if filename.endswith((".", " ")):
+        return "nomes de arquivo não podem terminar em ponto ou espaço"
+    if filename.split(".", 1)[0].rstrip(" ").upper() in RESERVED_FILENAMES:
+        return "nome reservado pelo Windows"
+    return None
+
+
+def validate_batch(patients: Mapping[str, PatientData], report_type: str) -> list[ValidationIssue]:
+    """Confere todos os pacientes e devolve os problemas, na ordem do lote."""
+    forbidden = FORBIDDEN_SPECIALTIES.get(report_type, frozenset())
+    report_name = REPORT_NAMES.get(report_type, report_type)
+    issues: list[ValidationIssue] = []
+    # Resultado por combinação de especialidades: (não contempladas, desconhecidas).
+    checked: dict[tuple[str, ...], tuple[list[str], list[str]]] = {}
+    filenames: dict[str, list[str]] = {}
+
+    for patient in patients.values():
+        record = as_record(patient)
+        nome = record.nome
+        if not nome.strip() or nome == MISSING_NAME:
+            issues.append(ValidationIssue(nome, EMPTY_NAME, ERROR, "paciente sem nome na planilha."))
+
+        result = checked.get(record.especialidades)
+        if result is None:
+            blocked = [s for s in SPECIALTIES if s in record.categorias and s in forbidden]
+            unknown = [esp for esp in record.especialidades if not classify(esp)]
+            result = checked[record.especialidades] = (blocked, unknown)
+        blocked, unknown = result
+        for specialty in blocked:
+            issues.append(ValidationIssue(
+                nome, FORBIDDEN_SPECIALTY, ERROR, f"o relatório {report_name} não contempla {specialty}."
+            ))
+        for esp in unknown:
+            issues.append(ValidationIssue(
+                nome, UNKNOWN_SPECIALTY, WARNING, f"especialidade não reconhecida '{esp}' (fica fora do relatório)."
+            ))
+
+        filename = report_filename(record, report_type)
+        problem = filename_problem(filename)
+        if problem is not None:
+            issues.append(ValidationIssue(
+                nome, INVALID_FILENAME, ERROR, f"o arquivo '{filename}' não pode ser criado ({problem})."
+            ))
+        filenames.setdefault(filename.casefold(), []).append(nome)
+
+    for names in filenames.values():
+        if len(names) > 1:
+            for nome in names:
+                others = ", ".join(f"'{other}'" for other in names if other != nome)
+                issues.append(ValidationIssue(
+                    nome, FILENAME_COLLISION, ERROR, f"geraria o mesmo arquivo que {others}."
+                ))
+    return issues
+
+
+def has_errors(issues: list[ValidationIssue]) -> bool:
+    return any(issue.is_error for issue in issues)
+
+
+def format_issues(issues: list[ValidationIssue], limit: int | None = None) -> str:
+    """Lista legível dos problemas (no máximo ``limit`` linhas)."""
+    shown = issues if limit is None else issues[:limit]
+    lines = [f"{'❌' if issue.is_error else '⚠️'} {issue}" for issue in shown]
+    if len(shown) < len(issues):
+        lines.append(f"... e mais {len(issues) - len(shown)} problema(s).")
+    return "\n".join(lines)
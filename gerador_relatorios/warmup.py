@@ -0,0 +1,45 @@
+"""Pré-carregamento das dependências pesadas em segundo plano.
+
+A interface não importa pandas, python-docx nem openpyxl ao abrir: a janela
+aparece primeiro e ``start_warmup`` importa esses módulos (e carrega o papel
+timbrado) em uma thread, enquanto o usuário escolhe a planilha. Se o usuário
+for mais rápido, a importação feita sob demanda simplesmente espera a da
+thread terminar.
+"""
+from __future__ import annotations
+
+import importlib
+import threading
+
+# Na ordem em que são necessários: leitura da planilha e depois geração.
+HEAVY_MODULES = (
+    "pandas",
+    "openpyxl",
+    "gerador_relatorios.data_loader",
+    "docx",
+    "gerador_relatorios.batch",
+    "gerador_relatorios.manifest",
+)
+
+
+def warm_up() -> None:
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+    from .template_cache import get_template_cache
+
+    get_template_cache().warm()
+
+
+def start_warmup() -> threading.Thread:
+    """Inicia ``warm_up`` em uma thread daemon (erros são ignorados aqui e
+    reaparecem quando o módulo for usado de fato)."""
+
+    def target() -> None:
+        try:
+            warm_up()
+        except Exception:
+            pass
+
+    thread = threading.Thread(target=target, name="warmup", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,270 @@
+"""Observação de pasta: gera os relatórios das planilhas à medida que chegam.
+
+Uso::
+
+    python -m gerador_relatorios.watch entrada/ --saida relatorios/ --tipo PNE
+
+A pasta é consultada a cada ``--intervalo`` segundos. Uma planilha só é
+processada depois de ficar ``--estabilidade`` segundos sem mudar de tamanho
+nem de data de modificação (pode ainda estar sendo copiada); arquivos
+temporários do Excel (``~$...``) são ignorados e planilhas com erros de
+validação (``validation``) são informadas sem gerar nada. Os relatórios de
+cada planilha vão para ``<saida>/<nome da planilha>/`` em modo incremental:
+quando a planilha é alterada, só os pacientes novos ou modificados são
+gerados de novo. O papel timbrado e os processos de geração continuam carregados entre
+uma planilha e outra, então não há custo de inicialização por arquivo.
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Sequence, TextIO, Tuple
+
+from . import data_loader
+from .batch import DEFAULT_ENGINE, ENGINES, ReportPool, default_workers
+from .manifest import IncrementalPlan
+from .sheet_cache import SheetCache
+from .validation import format_issues, has_errors, validate_batch
+
+WORKBOOK_EXTENSIONS = (".xlsx", ".xlsm", ".xls")
+DEFAULT_INTERVAL = 2.0
+DEFAULT_SETTLE = 3.0
+
+# (mtime_ns, tamanho) do arquivo.
+Signature = Tuple[int, int]
+
+
+def is_workbook(name: str) -> bool:
+    """Planilha a processar (ignora temporários do Excel e arquivos ocultos)."""
+    return name.lower().endswith(WORKBOOK_EXTENSIONS) and not name.startswith(("~$", "."))
+
+
+class FolderWatcher:
+    """Detecta planilhas novas ou alteradas em uma pasta, por consulta periódica.
+
+    ``poll`` devolve as planilhas prontas: as que não mudaram desde a
+    consulta anterior e estão estáveis há ``settle`` segundos (contados
+    desde que foram vistas assim, ou pela data de modificação) e que ainda
+    não foram devolvidas com esse mesmo tamanho e data.
+    """
+
+    def __init__(self, directory: str, settle: float = DEFAULT_SETTLE, clock: Callable[[], float] = time.monotonic) -> None:
+        self.directory = directory
+        self.settle = settle
+        self._clock = clock
+        self._seen: dict[str, tuple[Signature, float]] = {}
+        self._done: dict[str, Signature] = {}
+
+    def _scan(self) -> dict[str, tuple[Signature, float]]:
+        found: dict[str, tuple[Signature, float]] = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not is_workbook(entry.name):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                found[entry.path] = ((st.st_mtime_ns, st.st_size), st.st_mtime)
+        return found
+
+    def poll(self) -> list[str]:
+        now = self._clock()
+        wall = time.time()
+        ready = []
+        found = self._scan()
+        for path, (signature, mtime) in sorted(found.items()):
+            previous = self._seen.get(path)
+            if previous is None or previous[0] != signature:
+                self._seen[path] = (signature, now)
+                if previous is not None or wall - mtime < self.settle:
+                    continue
+            elif now - previous[1] < self.settle and wall - mtime < self.settle:
+                continue
+            if self._done.get(path) != signature:
+                self._done[path] = signature
+                ready.append(path)
+        for path in list(self._seen):
+            if path not in found:
+                del self._seen[path]
+                self._done.pop(path, None)
+        return ready
+
+
+@dataclass
+class WorkbookRun:
+    """Resultado do processamento de uma planilha."""
+
+    path: str
+    output_dir: str
+    generated: int = 0
+    failures: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+    error: str | None = None
+
+
+class WatchService:
+    """Processa as planilhas que chegam em ``input_dir`` com um pool persistente."""
+
+    def __init__(
+        self,
+        input_dir: str,
+        output_dir: str,
+        report_type: str = "PNE",
+        workers: int | None = None,
+        engine: str = DEFAULT_ENGINE,
+        settle: float = DEFAULT_SETTLE,
+        cache: SheetCache | None = None,
+        out: TextIO | None = None,
+    ) -> None:
+        if engine not in ENGINES:
+            raise ValueError(f"Motor de geração desconhecido: {engine}")
+        self.output_dir = output_dir
+        self.report_type = report_type
+        self.engine = engine
+        self.cache = cache
+        self.out = out or sys.stdout
+        self.watcher = FolderWatcher(input_dir, settle)
+        self.pool = ReportPool(workers)
+
+    def __enter__(self) -> "WatchService":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.pool.close()
+
+    def _log(self, message: str) -> None:
+        print(f"[{datetime.now():%H:%M:%S}] {message}", file=self.out, flush=True)
+
+    def output_for(self, path: str) -> str:
+        return os.path.join(self.output_dir, os.path.splitext(os.path.basename(path))[0])
+
+    def process(self, path: str) -> WorkbookRun:
+        """Gera (de forma incremental) os relatórios de uma planilha.
+
+        Qualquer erro fica em ``run.error``: uma planilha com problema não
+        pode derrubar o serviço que observa a pasta.
+        """
+        run = WorkbookRun(path, self.output_for(path))
+        started = time.perf_counter()
+        try:
+            self._generate(path, run)
+        except Exception as e:
+            run.error = str(e) or type(e).__name__
+        run.elapsed = time.perf_counter() - started
+        return run
+
+    def _generate(self, path: str, run: WorkbookRun) -> None:
+        data = data_loader.load_excel(path, cache=self.cache)
+        patients = data_loader.group_patients(data)
+        issues = validate_batch(patients, self.report_type)
+        if has_errors(issues):
+            run.error = "a planilha tem problemas; nenhum relatório foi gerado:\n" + format_issues(issues)
+            return
+        os.makedirs(run.output_dir, exist_ok=True)
+        plan = IncrementalPlan(patients, self.report_type, run.output_dir)
+        run.skipped = len(plan.unchanged)
+        tasks = (
+            (nome, pdata, self.report_type, run.output_dir, self.engine)
+            for nome, pdata in plan.to_render.items()
+        )
+        try:
+            for result in self.pool.imap(tasks):
+                plan.record(result)
+                if result.ok:
+                    run.generated += 1
+                else:
+                    run.failures += 1
+        finally:
+            plan.save()
+
+    def run_once(self) -> list[WorkbookRun]:
+        """Processa as planilhas prontas no momento."""
+        runs = []
+        for path in self.watcher.poll():
+            self._log(f"📥 {os.path.basename(path)}")
+            run = self.process(path)
+            if run.error is not None:
+                self._log(f"❌ {os.path.basename(path)}: {run.error}")
+            else:
+                self._log(
+                    f"{'✅' if not run.failures else '⚠️'} {os.path.basename(path)}: "
+                    f"{run.generated} gerados, {run.failures} com erro, {run.skipped} inalterados "
+                    f"em {run.elapsed:.2f}s -> {run.output_dir}"
+                )
+            runs.append(run)
+        return runs
+
+    def serve_forever(self, interval: float = DEFAULT_INTERVAL, stop: threading.Event | None = None) -> None:
+        """Consulta a pasta a cada ``interval`` segundos até ``stop`` ser sinalizado."""
+        stop = stop or threading.Event()
+        self._log(f"👀 Observando {self.watcher.directory} (Ctrl+C para encerrar)")
+        while not stop.is_set():
+            self.run_once()
+            stop.wait(interval)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="gerador_relatorios.watch",
+        description="Observa uma pasta e gera os relatórios de cada planilha que chegar.",
+    )
+    parser.add_argument("entrada", help="pasta onde as planilhas são depositadas")
+    parser.add_argument("-o", "--saida", required=True, help="pasta dos relatórios (uma subpasta por planilha)")
+    parser.add_argument("-t", "--tipo", choices=("PNE", "TIPICO"), default="PNE", type=str.upper)
+    parser.add_argument("-w", "--workers", type=int, default=default_workers())
+    parser.add_argument("--motor", choices=ENGINES, default=DEFAULT_ENGINE)
+    parser.add_argument("--intervalo", type=float, default=DEFAULT_INTERVAL, help="segundos entre consultas à pasta")
+    parser.add_argument(
+        "--estabilidade",
+        type=float,
+        default=DEFAULT_SETTLE,
+        help="segundos sem alteração antes de processar uma planilha",
+    )
+    parser.add_argument("--uma-vez", action="store_true", help="processa as planilhas presentes e encerra")
+    parser.add_argument("--sem-cache", action="store_true", help="não usa o cache em disco de planilhas")
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if not os.path.isdir(args.entrada):
+        print(f"Erro: pasta não encontrada: {args.entrada}", file=sys.stderr)
+        return 2
+    if args.workers < 1:
+        print("Erro: --workers deve ser pelo menos 1.", file=sys.stderr)
+        return 2
+    with WatchService(
+        args.entrada,
+        args.saida,
+        args.tipo,
+        workers=args.workers,
+        engine=args.motor,
+        settle=args.estabilidade,
+        cache=None if args.sem_cache else SheetCache(),
+    ) as service:
+        if args.uma_vez:
+            runs = service.run_once()
+            return 1 if any(r.error or r.failures for r in runs) else 0
+        try:
+            service.serve_forever(args.intervalo)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
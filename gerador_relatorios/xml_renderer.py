@@ -0,0 +1,173 @@
+"""Geração rápida de relatórios escrevendo o WordprocessingML diretamente.
+
+Para cada tipo de relatório e conjunto de especialidades canônicas
+(``specialties``) o documento é
+montado uma única vez pelo caminho normal do python-docx (``reports``), com
+marcadores no lugar dos dados do paciente. O ``word/document.xml`` resultante
+é o "esqueleto" compilado: gerar um relatório passa a ser apenas substituir
+os marcadores pelos valores escapados e gravar o pacote junto com as demais
+partes do papel timbrado, que não mudam e são comprimidas uma única vez
+(``docx_writer``).
+"""
+from __future__ import annotations
+
+import io
+import os
+import re
+import threading
+import zipfile
+from collections import OrderedDict
+from typing import Any, Dict
+from xml.sax.saxutils import escape
+
+from . import reports
+from .docx_writer import DOCUMENT_PART, PackageWriter
+from .metrics import BUILD, SAVE, phase
+from .models import PatientData, PatientRecord, as_record
+from .specialties import categories_of
+from .template_cache import get_template_cache
+from .utils import atomic_open
+
+FIELDS = ("nome", "data_nascimento", "responsavel", "mes_referencia")
+# Texto do campo "Especialidade" do cabeçalho (``reports.specialties_label``).
+SPECIALTIES_FIELD = "especialidades"
+MAX_SKELETONS = 256
+
+# Marcadores em caracteres de uso privado do Unicode (válidos em XML e que
+# não aparecem em planilhas).
+_OPEN, _CLOSE = "\ue000", "\ue001"
+_FIELD_RE = re.compile(re.escape(_OPEN.encode("utf-8")) + rb"(\w+)" + re.escape(_CLOSE.encode("utf-8")))
+# Valores que o python-docx grava de forma especial (tabulações e quebras de
+# linha viram <w:tab/>/<w:br/>) ou recusa (caracteres inválidos em XML)
+# seguem pelo caminho normal.
+_UNSAFE_TEXT = re.compile("[\x00-\x1f\ud800-\udfff\ufffe\uffff" + _OPEN + _CLOSE + "]")
+
+
+def _placeholder(field: str) -> str:
+    return f"{_OPEN}{field}{_CLOSE}"
+
+
+def _placeholder_patient(categories: frozenset[str]) -> PatientRecord:
+    return PatientRecord(*(_placeholder(field) for field in FIELDS), [_placeholder(SPECIALTIES_FIELD)], categories)
+
+
+def _field_values(patient_data: PatientData) -> Dict[str, str]:
+    record = as_record(patient_data)
+    values = {field: getattr(record, field) for field in FIELDS}
+    values[SPECIALTIES_FIELD] = reports.specialties_label(record.especialidades)
+    return values
+
+
+class _Skeleton:
+    __slots__ = ("parts",)
+
+    def __init__(self, document_xml: bytes) -> None:
+        # Alterna trechos literais e nomes de campo: [lit, campo, lit, campo, ..., lit]
+        pieces = _FIELD_RE.split(document_xml)
+        self.parts = [p if i % 2 == 0 else p.decode("ascii") for i, p in enumerate(pieces)]
+
+    def render(self, info: Dict[str, str]) -> bytes:
+        parts = self.parts
+        out = [parts[0]]
+        for i in range(1, len(parts), 2):
+            out.append(escape(info[parts[i]]).encode("utf-8"))
+            out.append(parts[i + 1])
+        return b"".join(out)
+
+
+class _TemplateState:
+    """Partes do pacote e esqueletos compilados para uma versão do papel timbrado."""
+
+    def __init__(self) -> None:
+        self.writer: PackageWriter | None = None
+        self.skeletons: OrderedDict[frozenset[str], _Skeleton] = OrderedDict()
+
+
+class XmlReportRenderer:
+    def __init__(self, max_skeletons: int = MAX_SKELETONS) -> None:
+        self.max_skeletons = max_skeletons
+        self._lock = threading.Lock()
+        self._states: dict[tuple[Any, str], _TemplateState] = {}
+        self.compilations = 0
+
+    def _state(self, report_type: str) -> _TemplateState:
+        key = (get_template_cache().fingerprint(), report_type)
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                # Papel timbrado mudou: descarta tudo que foi compilado antes.
+                self._states = {k: v for k, v in self._states.items() if k[0] == key[0]}
+                state = self._states[key] = _TemplateState()
+            return state
+
+    def _compile(self, state: _TemplateState, categories: frozenset[str], report_type: str) -> _Skeleton:
+        doc = reports.build_document(_placeholder_patient(categories), report_type)
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        with zipfile.ZipFile(buffer) as package:
+            entries = [(name, package.read(name)) for name in package.namelist()]
+        skeleton = _Skeleton(dict(entries)[DOCUMENT_PART])
+        with self._lock:
+            if state.writer is None:
+                state.writer = PackageWriter(entries)
+            state.skeletons[categories] = skeleton
+            while len(state.skeletons) > self.max_skeletons:
+                state.skeletons.popitem(last=False)
+            self.compilations += 1
+        return skeleton
+
+    def can_render(self, patient_data: PatientData) -> bool:
+        return not any(_UNSAFE_TEXT.search(value) for value in _field_values(patient_data).values())
+
+    def document_xml(self, patient_data: PatientData, report_type: str = "PNE") -> bytes:
+        """Gera o ``word/document.xml`` do relatório do paciente."""
+        with phase(BUILD):
+            state = self._state(report_type)
+            key = categories_of(patient_data)
+            with self._lock:
+                skeleton = state.skeletons.get(key)
+                if skeleton is not None:
+                    state.skeletons.move_to_end(key)
+            if skeleton is None:
+                skeleton = self._compile(state, key, report_type)
+            return skeleton.render(_field_values(patient_data))
+
+    def _package(self, patient_data: PatientData, report_type: str) -> tuple[PackageWriter, bytes]:
+        document_xml = self.document_xml(patient_data, report_type)
+        writer = self._state(report_type).writer
+        assert writer is not None
+        return writer, document_xml
+
+    def render(self, patient_data: PatientData, report_type: str = "PNE") -> bytes:
+        """Gera o pacote .docx completo do relatório do paciente."""
+        if not self.can_render(patient_data):
+            return reports.document_bytes(patient_data, report_type)
+        writer, document_xml = self._package(patient_data, report_type)
+        with phase(SAVE):
+            return writer.to_bytes({DOCUMENT_PART: document_xml})
+
+    def write(self, patient_data: PatientData, output_dir: str, report_type: str = "PNE") -> str:
+        """Grava o relatório na pasta e retorna o caminho do arquivo."""
+        if not self.can_render(patient_data):
+            return reports.generate_report(patient_data, output_dir, report_type)
+        # Monta o XML antes de abrir o arquivo: um erro aqui não deixa arquivo vazio.
+        writer, document_xml = self._package(patient_data, report_type)
+        filepath = os.path.join(output_dir, reports.report_filename(patient_data, report_type))
+        with phase(SAVE), atomic_open(filepath) as f:
+            writer.write(f, {DOCUMENT_PART: document_xml})
+        return filepath
+
+
+_default_renderer = XmlReportRenderer()
+
+
+def get_renderer() -> XmlReportRenderer:
+    return _default_renderer
+
+
+def render_report(patient_data: PatientData, report_type: str = "PNE") -> bytes:
+    return _default_renderer.render(patient_data, report_type)
+
+
+def write_report(patient_data: PatientData, output_dir: str, report_type: str = "PNE") -> str:
+    return _default_renderer.write(patient_data, output_dir, report_type)
@@ -1,12 +1,21 @@
-from gerador_relatorios.gui import MedicalReportGenerator
-import tkinter as tk
+import multiprocessing
+import sys
 
 
 def main() -> None:
+    import tkinter as tk
+
+    from gerador_relatorios.gui import MedicalReportGenerator
+
     root = tk.Tk()
     app = MedicalReportGenerator(root)
     root.mainloop()
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1:
+        from gerador_relatorios.cli import main as cli_main
+
+        sys.exit(cli_main())
     main()
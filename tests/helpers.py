@@ -0,0 +1,11 @@
+def patient(nome='Ana Lima', especialidades=('PSICOTERAPIA',), responsavel='Resp'):
+    """Dados mínimos de um paciente, no formato devolvido por ``load_excel``."""
+    return {
+        'info': {
+            'nome': nome,
+            'data_nascimento': '01/01/2000',
+            'responsavel': responsavel,
+            'mes_referencia': 'Jan/2025',
+        },
+        'especialidades': list(especialidades),
+    }
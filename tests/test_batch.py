@@ -0,0 +1,47 @@
+import sys, os; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from gerador_relatorios import batch
+from helpers import patient
+
+
+def sample_patients():
+    return {
+        'Ana': patient('Ana', ['PSICOTERAPIA']),
+        'Bruno': patient('Bruno', ['NUTRIÇÃO']),
+        'Carla': patient('Carla', ['FONOAUDIOLOGIA']),
+    }
+
+
+def test_generate_batch_in_process_reports_errors(tmp_path):
+    results = list(batch.generate_batch(sample_patients(), 'TIPICO', str(tmp_path), workers=1))
+
+    assert [r.nome for r in results] == ['Ana', 'Bruno', 'Carla']
+    assert [r.ok for r in results] == [True, False, True]
+    assert 'NUTRIÇÃO' in results[1].error
+    assert os.path.exists(results[0].path)
+    assert os.path.exists(results[2].path)
+
+
+def test_generate_batch_with_process_pool_keeps_order(tmp_path):
+    patients = {f'P{i}': patient(f'P{i}', ['PSICOTERAPIA']) for i in range(6)}
+    tasks = ((nome, pdata, 'PNE', str(tmp_path), 'xml') for nome, pdata in patients.items())
+    with batch.ReportPool(2, max_tasks_per_child=None, max_worker_memory_mb=0.001) as pool:
+        results = list(pool.imap(tasks))
+
+    # Todo worker passa do limite de memória e é substituído após cada relatório.
+    assert pool.recycles == len(patients)
+    assert [r.nome for r in results] == list(patients)
+    assert all(r.ok for r in results)
+    assert all(r.elapsed > 0 for r in results)
+    assert sorted(os.listdir(tmp_path)) == sorted(f'Relatório_PNE_P{i}.docx' for i in range(6))
+
+
+def test_report_pool_recycles_workers_after_max_tasks(tmp_path):
+    patients = {f'P{i}': patient(f'P{i}', ['PSICOTERAPIA']) for i in range(6)}
+    with batch.ReportPool(2, max_tasks_per_child=2, max_worker_memory_mb=None) as pool:
+        tasks = ((nome, pdata, 'PNE', str(tmp_path), 'xml') for nome, pdata in patients.items())
+        first = [r.nome for r in pool.imap(tasks)]
+        tasks = ((nome, pdata, 'PNE', None, 'xml') for nome, pdata in patients.items())
+        second = [r.nome for r in pool.imap(tasks)]
+
+    assert first == second == list(patients)
+    assert pool.recycles > 0
@@ -0,0 +1,26 @@
+import sys, os; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import json
+from benchmarks import run, synthetic
+from gerador_relatorios import data_loader
+
+
+def test_synthetic_rows_look_like_real_sheets():
+    df = synthetic.synthetic_rows(300, 'TIPICO', seed=1)
+    assert list(df.columns) == data_loader.REQUIRED_COLUMNS
+    assert len(df) == 300
+    assert df['NOME'].nunique() < 300
+    assert df['RESPONSÁVEL'].isna().any()
+    assert not df['ESPECIALIDADE'].dropna().str.upper().str.contains('NUTRI|FISIO').any()
+
+
+def test_benchmark_writes_json(tmp_path):
+    out = tmp_path / 'bench.json'
+    code = run.main(['--linhas', '60', '--amostra', '3', '--dados', str(tmp_path), '-o', str(out)])
+    assert code == 0
+    results = json.loads(out.read_text(encoding='utf-8'))
+    case = results['resultados'][0]
+    assert case['linhas'] == 60
+    assert case['fases']['montar_docx']['n'] == 3
+    assert set(case['fases']) == {'carregar', 'agrupar', 'montar_docx', 'salvar_docx', 'motor_xml'}
+    assert results['inicializacao_s'] > 0
+    assert run.compare(results, results)
@@ -0,0 +1,39 @@
+import sys, os; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import io
+import zipfile
+import pytest
+from docx import Document
+from gerador_relatorios.batch import generate_batch
+from gerador_relatorios.bundle import INDEX_FILE, BundleWriter
+from helpers import patient
+
+
+def test_bundle_streams_reports_and_index(tmp_path):
+    patients = {
+        'Ana Lima': patient('Ana Lima', ['PSICOTERAPIA']),
+        'Bruno': patient('Bruno', ['NUTRIÇÃO']),
+        'ana lima': patient('ana lima', ['FONOAUDIOLOGIA']),
+    }
+    path = tmp_path / 'lote.zip'
+
+    with BundleWriter(str(path)) as bundle:
+        for result in generate_batch(patients, 'TIPICO', None, workers=1):
+            assert result.path is None
+            bundle.add(result)
+
+    assert os.listdir(tmp_path) == ['lote.zip']
+    with zipfile.ZipFile(path) as package:
+        assert package.namelist() == ['Relatório_Típico_Ana_Lima.docx', 'Relatório_Típico_ana_lima_2.docx', INDEX_FILE]
+        Document(io.BytesIO(package.read('Relatório_Típico_Ana_Lima.docx')))
+        index = package.read(INDEX_FILE).decode('utf-8-sig').splitlines()
+    assert index[0] == 'nome;arquivo;status;tamanho;erro'
+    assert index[1].startswith('Ana Lima;Relatório_Típico_Ana_Lima.docx;OK;')
+    assert index[2].startswith('Bruno;;ERRO;0;')
+
+
+def test_bundle_removed_on_error(tmp_path):
+    path = tmp_path / 'lote.zip'
+    with pytest.raises(RuntimeError):
+        with BundleWriter(str(path)):
+            raise RuntimeError('falhou')
+    assert os.listdir(tmp_path) == []
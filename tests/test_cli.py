@@ -0,0 +1,127 @@
+import sys, os; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import json
+import subprocess
+import pandas as pd
+from gerador_relatorios import cli
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def write_sheet(path):
+    pd.DataFrame({
+        'NOME': ['Ana Lima', 'Ana Lima', 'Bruno'],
+        'DATA DE NASCIMENTO': ['01/01/2000', '01/01/2000', '02/02/2010'],
+        'RESPONSÁVEL': ['Resp', 'Resp', None],
+        'ESPECIALIDADE': ['PSICOTERAPIA', 'FONOAUDIOLOGIA', 'NUTRIÇÃO'],
+        'MÊS DE REFERÊNCIA': ['Jan/2025', 'Jan/2025', 'Jan/2025'],
+    }).to_excel(path, index=False)
+
+
+def test_cli_generates_reports(tmp_path, capsys):
+    sheet = tmp_path / 'planilha.xlsx'
+    write_sheet(sheet)
+    out_dir = tmp_path / 'saida'
+
+    code = cli.main([str(sheet), '--tipo', 'pne', '--saida', str(out_dir), '--workers', '1', '--sem-cache'])
+
+    assert code == cli.EXIT_OK
+    assert sorted(os.listdir(out_dir)) == ['Relatório_PNE_Ana_Lima.docx', 'Relatório_PNE_Bruno.docx']
+    assert 'rel/s' in capsys.readouterr().out
+
+
+def test_cli_partial_failure_exit_code(tmp_path, capsys):
+    sheet = tmp_path / 'planilha.xlsx'
+    write_sheet(sheet)
+    out_dir = tmp_path / 'saida'
+
+    code = cli.main([str(sheet), '-t', 'TIPICO', '-o', str(out_dir), '-w', '1', '--sem-cache', '--sem-validacao'])
+
+    assert code == cli.EXIT_PARTIAL_FAILURE
+    assert sorted(os.listdir(out_dir)) == ['.relatorios_journal.jsonl', 'Relatório_Típico_Ana_Lima.docx']
+    assert 'ERRO Bruno' in capsys.readouterr().out
+
+    # A nova execução retoma o lote: só o paciente com erro é tentado de novo.
+    code = cli.main([str(sheet), '-t', 'TIPICO', '-o', str(out_dir), '-w', '1', '--sem-cache', '--sem-validacao'])
+    assert code == cli.EXIT_PARTIAL_FAILURE
+    output = capsys.readouterr().out
+    assert '1 relatório(s) já gerado(s)' in output
+    assert 'Ana Lima' not in output
+
+
+def test_cli_validates_before_generating(tmp_path, capsys):
+    sheet = tmp_path / 'planilha.xlsx'
+    write_sheet(sheet)
+    out_dir = tmp_path / 'saida'
+
+    code = cli.main([str(sheet), '-t', 'TIPICO', '-o', str(out_dir), '-w', '1', '--sem-cache'])
+
+    assert code == cli.EXIT_INVALID_INPUT
+    assert not out_dir.exists()
+    assert 'Bruno: o relatório Típico não contempla NUTRIÇÃO' in capsys.readouterr().err
+
+
+def test_cli_invalid_input(tmp_path):
+    sheet = tmp_path / 'ruim.xlsx'
+    pd.DataFrame({'NOME': ['A']}).to_excel(sheet, index=False)
+    assert cli.main([str(sheet), '-o', str(tmp_path), '--sem-cache']) == cli.EXIT_INVALID_INPUT
+
+
+def test_cli_does_not_import_tkinter():
+    code = "import sys, gerador_relatorios.cli; sys.exit('tkinter' in sys.modules)"
+    assert subprocess.run([sys.executable, '-c', code], cwd=ROOT).returncode == 0
+
+
+def test_cli_zip_bundle(tmp_path, capsys):
+    sheet = tmp_path / 'planilha.xlsx'
+    write_sheet(sheet)
+    out_dir = tmp_path / 'saida'
+
+    code = cli.main([str(sheet), '-o', str(out_dir), '-w', '1', '--zip', '--sem-cache'])
+
+    assert code == cli.EXIT_OK
+    assert os.listdir(out_dir) == ['Relatórios_PNE.zip']
+    assert cli.main([str(sheet), '-o', str(out_dir), '--zip', '--incremental', '--sem-cache']) == cli.EXIT_INVALID_INPUT
+
+
+def test_cli_metrics_and_profile(tmp_path, capsys):
+    sheet = tmp_path / 'planilha.xlsx'
+    write_sheet(sheet)
+    out_dir = tmp_path / 'saida'
+    metrics_file = tmp_path / 'metricas.json'
+
+    code = cli.main([str(sheet), '-o', str(out_dir), '--metricas', str(metrics_file), '--perfil', '-q', '--sem-cache'])
+
+    assert code == cli.EXIT_OK
+    summary = json.loads(metrics_file.read_text(encoding='utf-8'))
+    assert summary['relatorios'] == 2
+    assert set(summary['fases_do_lote_s']) == {'carregar', 'agrupar'}
+    assert summary['captura']['tracemalloc_pico_mb'] > 0
+    assert (out_dir / 'perfil.prof').exists()
+    assert 'cumulative' in capsys.readouterr().out
+
+
+def test_cli_stream_mode(tmp_path, capsys):
+    sheet = tmp_path / 'planilha.xlsx'
+    write_sheet(sheet)
+    out_dir = tmp_path / 'saida'
+
+    code = cli.main([str(sheet), '-o', str(out_dir), '-w', '1', '--fluxo', '--ordenada'])
+
+    assert code == cli.EXIT_OK
+    assert sorted(os.listdir(out_dir)) == ['Relatório_PNE_Ana_Lima.docx', 'Relatório_PNE_Bruno.docx']
+    assert '[2] OK' in capsys.readouterr().out
+    assert cli.main([str(sheet), '-o', str(out_dir), '--fluxo', '--incremental']) == cli.EXIT_INVALID_INPUT
+
+
+def test_cli_multiple_workbooks(tmp_path, capsys):
+    first = tmp_path / 'unidade1.xlsx'
+    write_sheet(first)
+    second = tmp_path / 'unidade2.xlsx'
+    pd.DataFrame({'NOME': ['Carla']}).to_excel(second, index=False)
+    out_dir = tmp_path / 'saida'
+
+    code = cli.main([str(first), str(second), '-o', str(out_dir), '-w', '1', '--sem-cache'])
+
+    assert code == cli.EXIT_PARTIAL_FAILURE
+    assert len(os.listdir(out_dir)) == 2
+    assert 'unidade2.xlsx não foi carregada' in capsys.readouterr().err
@@ -1,4 +1,5 @@
 import sys, os; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pytest
 import pandas as pd
 import tempfile
 import os
@@ -29,3 +30,138 @@ def test_load_excel_missing_column(tmp_path):
         assert False, 'Expected ValueError'
     except ValueError:
         pass
+
+
+def legacy_group_patients(data):
+    from collections import defaultdict
+    patient_data = defaultdict(lambda: {"info": {}, "especialidades": []})
+    for _, row in data.iterrows():
+        nome = row["NOME"]
+        if not patient_data[nome]["info"]:
+            data_nasc = row["DATA DE NASCIMENTO"]
+            try:
+                if pd.notna(data_nasc):
+                    if hasattr(data_nasc, "strftime"):
+                        data_nasc = data_nasc.strftime("%d/%m/%Y")
+                    else:
+                        data_nasc = str(data_nasc)
+                        if "/" in data_nasc:
+                            data_nasc = data_nasc.split(" ")[0]
+                else:
+                    data_nasc = "Data não informada"
+            except Exception:
+                data_nasc = str(data_nasc) if pd.notna(data_nasc) else "Data não informada"
+            patient_data[nome]["info"] = {
+                "nome": str(row["NOME"]),
+                "data_nascimento": data_nasc,
+                "responsavel": str(row["RESPONSÁVEL"]) if pd.notna(row["RESPONSÁVEL"]) else "Não informado",
+                "mes_referencia": str(row["MÊS DE REFERÊNCIA"]) if pd.notna(row["MÊS DE REFERÊNCIA"]) else "Não informado",
+            }
+        if pd.notna(row["ESPECIALIDADE"]):
+            especialidade = str(row["ESPECIALIDADE"])
+            if especialidade not in patient_data[nome]["especialidades"]:
+                patient_data[nome]["especialidades"].append(especialidade)
+    return patient_data
+
+
+def test_group_patients_matches_row_by_row_grouping():
+    df = pd.DataFrame({
+        'NOME': ['Ana', 'Bruno', 'Ana', 'Carla', 'Bruno', 'Ana'],
+        'DATA DE NASCIMENTO': [pd.Timestamp('2010-03-15'), '22/08/2015 00:00:00', None, None, '01/01/2000', None],
+        'RESPONSÁVEL': ['Maria', None, 'Outra', 'José', 'X', None],
+        'ESPECIALIDADE': ['Psicoterapia', 'Fonoaudiologia', 'Terapia ABA', None, 'Fonoaudiologia', 'Psicoterapia'],
+        'MÊS DE REFERÊNCIA': ['Jan/2025', 'Jan/2025', 'Fev/2025', None, 'Jan/2025', 'Jan/2025'],
+    })
+
+    grouped = {nome: record.as_dict() for nome, record in data_loader.group_patients(data_loader.normalize_columns(df)).items()}
+    categorias = {nome: pdata.pop('categorias') for nome, pdata in grouped.items()}
+
+    assert grouped == dict(legacy_group_patients(df))
+    assert categorias == {'Ana': {'PSICOTERAPIA', 'ABA'}, 'Bruno': {'FONOAUDIOLOGIA'}, 'Carla': set()}
+    assert list(grouped) == ['Ana', 'Bruno', 'Carla']
+    assert grouped['Ana']['especialidades'] == ['Psicoterapia', 'Terapia ABA']
+    assert grouped['Carla']['especialidades'] == []
+
+
+def test_normalize_columns_formats_dates_and_fills_defaults():
+    df = pd.DataFrame({
+        'NOME': ['A', None, 'C', 'D'],
+        'DATA DE NASCIMENTO': [pd.Timestamp('2010-03-15'), '22/08/2015 00:00:00', None, 'sem data'],
+        'RESPONSÁVEL': [None, 'B', 'C', 'D'],
+        'ESPECIALIDADE': ['X', None, 'Y', 'Z'],
+        'MÊS DE REFERÊNCIA': ['Jan/2025', None, 'Jan/2025', 'Jan/2025'],
+    })
+    normalized = data_loader.normalize_columns(df)
+
+    assert normalized['DATA DE NASCIMENTO'].tolist() == ['15/03/2010', '22/08/2015', 'Data não informada', 'sem data']
+    assert normalized['NOME'].tolist() == ['A', 'Nome não informado', 'C', 'D']
+    assert normalized['RESPONSÁVEL'].tolist() == ['Não informado', 'B', 'C', 'D']
+    assert normalized['MÊS DE REFERÊNCIA'].tolist()[1] == 'Não informado'
+    assert normalized['ESPECIALIDADE'].isna().tolist() == [False, True, False, False]
+
+    dates = pd.Series(pd.to_datetime(['2001-02-03', None]))
+    assert data_loader.format_birth_dates(dates).tolist() == ['03/02/2001', 'Data não informada']
+
+
+def test_load_excel_streams_required_columns_only(tmp_path):
+    df = pd.DataFrame({
+        'EXTRA 1': range(5),
+        'NOME': ['A', 'B', 'C', 'D', 'E'],
+        'DATA DE NASCIMENTO': pd.to_datetime(['2000-01-01', '2001-02-03', None, '2003-04-05', '2004-05-06']),
+        'EXTRA 2': ['x'] * 5,
+        'RESPONSÁVEL': ['R', None, 'R', 'R', 'R'],
+        'ESPECIALIDADE': ['C', 'D', None, 'F', 'G'],
+        'MÊS DE REFERÊNCIA': ['Jan/2025'] * 5,
+    })
+    file_path = tmp_path / 'wide.xlsx'
+    df.to_excel(file_path, index=False)
+
+    seen = []
+    loaded = data_loader.load_excel(str(file_path), progress=seen.append, chunk_size=2)
+
+    assert seen == [2, 4, 5]
+    assert list(loaded.columns) == data_loader.REQUIRED_COLUMNS
+    assert loaded['DATA DE NASCIMENTO'].tolist() == [
+        '01/01/2000', '03/02/2001', 'Data não informada', '05/04/2003', '06/05/2004'
+    ]
+    assert loaded['RESPONSÁVEL'].tolist()[1] == 'Não informado'
+    assert list(loaded.index) == list(range(5))
+
+
+def sheet(names, esp='PSICOTERAPIA'):
+    return pd.DataFrame({
+        'NOME': names,
+        'DATA DE NASCIMENTO': ['01/01/2000'] * len(names),
+        'RESPONSÁVEL': ['Resp'] * len(names),
+        'ESPECIALIDADE': [esp] * len(names),
+        'MÊS DE REFERÊNCIA': ['Jan/2025'] * len(names),
+    })
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_load_many_tags_sources_and_reports_errors(tmp_path, workers):
+    unit1 = tmp_path / 'unidade1.xlsx'
+    with pd.ExcelWriter(unit1) as writer:
+        sheet(['Ana', 'Bruno']).to_excel(writer, sheet_name='Janeiro', index=False)
+        sheet(['Ana'], 'ABA').to_excel(writer, sheet_name='Fevereiro', index=False)
+        pd.DataFrame({'Total': [3]}).to_excel(writer, sheet_name='Resumo', index=False)
+    unit2 = tmp_path / 'unidade2.xlsx'
+    sheet(['Carla']).to_excel(unit2, index=False)
+    broken = tmp_path / 'quebrada.xlsx'
+    broken.write_bytes(b'nada')
+
+    data, errors = data_loader.load_many([str(unit1), str(unit2), str(broken)], all_sheets=True, workers=workers)
+
+    assert data['NOME'].tolist() == ['Ana', 'Bruno', 'Ana', 'Carla']
+    assert data[data_loader.SOURCE_COLUMN].tolist() == [
+        'unidade1.xlsx [Janeiro]', 'unidade1.xlsx [Janeiro]', 'unidade1.xlsx [Fevereiro]', 'unidade2.xlsx [Sheet1]',
+    ]
+    assert sorted(e.source for e in errors) == ['quebrada.xlsx', 'unidade1.xlsx [Resumo]']
+    assert data_loader.group_patients(data)['Ana']['especialidades'] == ['PSICOTERAPIA', 'ABA']
+
+
+def test_load_many_all_sources_failed(tmp_path):
+    bad = tmp_path / 'ruim.xlsx'
+    pd.DataFrame({'NOME': ['A']}).to_excel(bad, index=False)
+    with pytest.raises(ValueError, match='ruim.xlsx'):
+        data_loader.load_many([str(bad)])
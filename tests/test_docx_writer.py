@@ -0,0 +1,38 @@
+import sys, os; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import io
+import zipfile
+import pytest
+from docx import Document
+from gerador_relatorios import reports
+from gerador_relatorios.docx_writer import DOCUMENT_PART, PackageWriter
+from helpers import patient
+
+
+def template_entries():
+    buffer = io.BytesIO()
+    reports.build_document(patient('Ana'), 'PNE').save(buffer)
+    with zipfile.ZipFile(buffer) as package:
+        return [(name, package.read(name)) for name in package.namelist()]
+
+
+def test_package_writer_reuses_static_parts():
+    entries = template_entries()
+    writer = PackageWriter(entries)
+    document_xml = dict(entries)[DOCUMENT_PART].replace(b'Ana', b'Bruno')
+
+    data = writer.to_bytes({DOCUMENT_PART: document_xml})
+
+    with zipfile.ZipFile(io.BytesIO(data)) as package:
+        assert package.testzip() is None
+        assert package.namelist() == [name for name, _ in entries]
+        assert package.read(DOCUMENT_PART) == document_xml
+        for name, content in entries:
+            if name != DOCUMENT_PART:
+                assert package.read(name) == content
+    body = Document(io.BytesIO(data)).element.body
+    assert 'Bruno' in ''.join(body.itertext())
+
+
+def test_package_writer_requires_dynamic_parts():
+    with pytest.raises(ValueError, match=DOCUMENT_PART):
+        PackageWriter(template_entries()).to_bytes({})
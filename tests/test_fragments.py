@@ -0,0 +1,38 @@
+import sys, os; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from docx import Document
+from docx.oxml.ns import qn
+from gerador_relatorios.fragments import FragmentCache, usable_width
+
+
+def build(doc, text):
+    table = doc.add_table(rows=1, cols=1)
+    table.cell(0, 0).paragraphs[0].add_run(text)
+    return table
+
+
+def test_fragment_cache_reuses_independent_copies():
+    cache = FragmentCache(max_fragments=1)
+    first, second = Document(), Document()
+
+    cache.table(first, 'a', lambda: build(first, 'A')).cell(0, 0).paragraphs[0].add_run('!')
+    table = cache.table(second, 'a', lambda: build(second, 'errado'))
+
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert table.cell(0, 0).text == 'A'
+    assert second.tables[0].cell(0, 0).text == 'A'
+    assert first.tables[0].cell(0, 0).text == 'A!'
+
+    cache.table(second, 'b', lambda: build(second, 'B'))
+    cache.table(second, 'a', lambda: build(second, 'A2'))
+    assert cache.misses == 3
+    assert [t.cell(0, 0).text for t in second.tables] == ['A', 'B', 'A2']
+    # As cópias entram antes do w:sectPr, que continua sendo o último elemento.
+    assert second.element.body[-1].tag == qn('w:sectPr')
+
+
+def test_usable_width_follows_margins():
+    doc = Document()
+    section = doc.sections[-1]
+    assert usable_width(doc) == section.page_width - section.left_margin - section.right_margin
+    section.left_margin += 100000
+    assert usable_width(doc) == section.page_width - section.left_margin - section.right_margin
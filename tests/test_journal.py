@@ -0,0 +1,82 @@
+import sys, os; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pytest
+from gerador_relatorios.batch import generate_batch
+from gerador_relatorios.journal import JOURNAL_FILE, BatchJournal, load_journal
+from gerador_relatorios.utils import atomic_open
+from helpers import patient
+
+
+def run(patients, out_dir, stop_after=None):
+    """Gera o lote com diário; ``stop_after`` simula uma interrupção."""
+    journal = BatchJournal(out_dir, 'PNE')
+    rendered = []
+    with journal:
+        for result in generate_batch(journal.pending(patients), 'PNE', out_dir, workers=1):
+            journal.record(result)
+            rendered.append(result.nome)
+            if len(rendered) == stop_after:
+                return journal, rendered
+    journal.finish()
+    return journal, rendered
+
+
+def test_interrupted_batch_resumes_from_journal(tmp_path):
+    out_dir = str(tmp_path)
+    patients = {nome: patient(nome) for nome in ('Ana', 'Bruno', 'Carla')}
+
+    _, rendered = run(patients, out_dir, stop_after=2)
+    assert rendered == ['Ana', 'Bruno']
+    assert os.path.exists(tmp_path / JOURNAL_FILE)
+
+    patients['Bruno'] = patient('Bruno', responsavel='Outro')
+    journal, rendered = run(patients, out_dir)
+    assert journal.resumed == 1
+    assert rendered == ['Bruno', 'Carla']
+    assert not os.path.exists(tmp_path / JOURNAL_FILE)
+
+
+def test_journal_regenerates_missing_files_and_ignores_torn_lines(tmp_path):
+    out_dir = str(tmp_path)
+    patients = {nome: patient(nome) for nome in ('Ana', 'Bruno', 'Carla')}
+    run(patients, out_dir, stop_after=2)
+    with open(tmp_path / JOURNAL_FILE, 'a', encoding='utf-8') as f:
+        f.write('{"nome": "Carl')
+
+    journal, rendered = run(patients, out_dir, stop_after=1)
+    assert journal.resumed == 2
+    assert rendered == ['Carla']
+    # A entrada nova não pode ser colada na linha cortada.
+    assert sorted(load_journal(str(tmp_path / JOURNAL_FILE))) == ['Ana', 'Bruno', 'Carla']
+
+    os.remove(tmp_path / 'Relatório_PNE_Ana.docx')
+    journal, rendered = run(patients, out_dir)
+    assert journal.resumed == 2
+    assert rendered == ['Ana']
+
+
+def test_restart_discards_journal(tmp_path):
+    out_dir = str(tmp_path)
+    patients = {'Ana': patient('Ana')}
+    run(patients, out_dir, stop_after=1)
+
+    journal = BatchJournal(out_dir, 'PNE', resume=False)
+    assert list(journal.pending(patients)) == ['Ana']
+    assert not os.path.exists(tmp_path / JOURNAL_FILE)
+
+
+def test_atomic_open_leaves_nothing_on_error(tmp_path):
+    path = tmp_path / 'relatorio.docx'
+    path.write_bytes(b'antigo')
+
+    with pytest.raises(RuntimeError):
+        with atomic_open(str(path)) as f:
+            f.write(b'pela metade')
+            raise RuntimeError('interrompido')
+
+    assert path.read_bytes() == b'antigo'
+    assert os.listdir(tmp_path) == ['relatorio.docx']
+
+    with atomic_open(str(path)) as f:
+        f.write(b'novo')
+    assert path.read_bytes() == b'novo'
+    assert os.listdir(tmp_path) == ['relatorio.docx']
@@ -0,0 +1,67 @@
+import sys, os; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import time
+import pandas as pd
+from gerador_relatorios.loading import BackgroundLoad, MultiLoad
+
+
+def test_background_load_returns_dataframe(tmp_path, monkeypatch):
+    monkeypatch.setenv('LOCALAPPDATA', str(tmp_path / 'cache'))
+    file_path = tmp_path / 'test.xlsx'
+    pd.DataFrame({
+        'NOME': ['A', 'B'],
+        'DATA DE NASCIMENTO': ['01/01/2000', '02/02/2002'],
+        'RESPONSÁVEL': ['R', 'S'],
+        'ESPECIALIDADE': ['C', 'D'],
+        'MÊS DE REFERÊNCIA': ['Jan/2025', 'Jan/2025'],
+    }).to_excel(file_path, index=False)
+
+    task = BackgroundLoad(str(file_path)).start()
+    assert task.wait(10)
+    assert task.error is None
+    assert task.rows == 2
+    assert list(task.result['NOME']) == ['A', 'B']
+
+
+def test_background_load_reports_errors(tmp_path):
+    task = BackgroundLoad(str(tmp_path / 'inexistente.xlsx')).start()
+    assert task.wait(10)
+    assert task.result is None
+    assert task.error is not None
+
+
+def test_background_load_cancel_drops_result():
+    def slow_loader(path, progress):
+        for rows in range(0, 1000, 10):
+            progress(rows)
+            time.sleep(0.01)
+        return 'resultado'
+
+    task = BackgroundLoad('x.xlsx', loader=slow_loader).start()
+    time.sleep(0.05)
+    task.cancel()
+    assert task.wait(5)
+    assert task.cancelled
+    assert task.result is None
+    assert task.error is None
+    assert 0 < task.rows < 1000
+
+
+def test_background_multi_load_keeps_source_errors(tmp_path, monkeypatch):
+    monkeypatch.setenv('LOCALAPPDATA', str(tmp_path / 'cache'))
+    good = tmp_path / 'boa.xlsx'
+    pd.DataFrame({
+        'NOME': ['A'],
+        'DATA DE NASCIMENTO': ['01/01/2000'],
+        'RESPONSÁVEL': ['R'],
+        'ESPECIALIDADE': ['C'],
+        'MÊS DE REFERÊNCIA': ['Jan/2025'],
+    }).to_excel(good, index=False)
+    bad = tmp_path / 'ruim.xlsx'
+    pd.DataFrame({'NOME': ['B']}).to_excel(bad, index=False)
+
+    multi = MultiLoad([str(good), str(bad)])
+    task = BackgroundLoad(str(good), loader=multi).start()
+    assert task.wait(10)
+    assert task.error is None
+    assert list(task.result['ORIGEM']) == ['boa.xlsx']
+    assert [e.source for e in multi.errors] == ['ruim.xlsx']
@@ -0,0 +1,59 @@
+import sys, os; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from gerador_relatorios import manifest
+from gerador_relatorios.batch import generate_batch
+from gerador_relatorios.manifest import IncrementalPlan
+from helpers import patient
+
+
+def run(patients, out_dir):
+    plan = IncrementalPlan(patients, 'PNE', out_dir)
+    rendered = []
+    for result in generate_batch(plan.to_render, 'PNE', out_dir, workers=1):
+        plan.record(result)
+        rendered.append(result.nome)
+    plan.save()
+    return plan, rendered
+
+
+def test_incremental_renders_only_changed_patients(tmp_path):
+    out_dir = str(tmp_path)
+    patients = {'Ana': patient('Ana'), 'Bruno': patient('Bruno'), 'Carla': patient('Carla')}
+
+    plan, rendered = run(patients, out_dir)
+    assert plan.added == ['Ana', 'Bruno', 'Carla']
+    assert rendered == ['Ana', 'Bruno', 'Carla']
+
+    plan, rendered = run(patients, out_dir)
+    assert rendered == []
+    assert plan.unchanged == ['Ana', 'Bruno', 'Carla']
+
+    patients['Bruno'] = patient('Bruno', responsavel='Outro')
+    del patients['Carla']
+    patients['Davi'] = patient('Davi')
+    plan, rendered = run(patients, out_dir)
+    assert rendered == ['Bruno', 'Davi']
+    assert (plan.added, plan.changed, plan.removed) == (['Davi'], ['Bruno'], ['Carla'])
+
+
+def test_incremental_rerenders_missing_files_and_type_changes(tmp_path):
+    out_dir = str(tmp_path)
+    patients = {'Ana': patient('Ana')}
+    run(patients, out_dir)
+
+    os.remove(tmp_path / 'Relatório_PNE_Ana.docx')
+    plan, rendered = run(patients, out_dir)
+    assert plan.changed == ['Ana']
+    assert rendered == ['Ana']
+
+    assert IncrementalPlan(patients, 'TIPICO', out_dir).changed == ['Ana']
+
+
+def test_incremental_rerenders_when_render_version_changes(tmp_path, monkeypatch):
+    out_dir = str(tmp_path)
+    patients = {'Ana': patient('Ana')}
+    run(patients, out_dir)
+
+    monkeypatch.setattr(manifest, 'RENDER_VERSION', manifest.RENDER_VERSION + 1)
+    plan, rendered = run(patients, out_dir)
+    assert plan.changed == ['Ana']
+    assert rendered == ['Ana']
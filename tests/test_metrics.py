@@ -0,0 +1,38 @@
+import sys, os; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import time
+from gerador_relatorios import metrics
+from gerador_relatorios.batch import generate_batch
+
+
+def test_nested_phases_are_exclusive():
+    with metrics.timing() as timer:
+        with metrics.phase('fora'):
+            time.sleep(0.02)
+            with metrics.phase('dentro'):
+                time.sleep(0.02)
+    assert 0.015 < timer.phases['fora'] < 0.035
+    assert timer.phases['dentro'] >= 0.015
+    # Fora de `timing` nada é medido.
+    with metrics.phase('fora'):
+        pass
+
+
+def test_batch_reports_phases_and_summary(tmp_path):
+    patients = {
+        nome: {
+            'info': {'nome': nome, 'data_nascimento': '01/01/2000', 'responsavel': 'R', 'mes_referencia': 'Jan'},
+            'especialidades': ['PSICOTERAPIA'],
+        }
+        for nome in ('Ana', 'Bruno', 'Carla')
+    }
+    batch = metrics.BatchMetrics()
+    for result in generate_batch(patients, 'PNE', str(tmp_path), workers=1, engine='docx'):
+        assert {metrics.TEMPLATE, metrics.BUILD, metrics.SAVE} <= set(result.phases)
+        batch.add(result)
+
+    summary = batch.summary()
+    assert summary['relatorios'] == 3
+    assert summary['relatorios_por_segundo'] > 0
+    assert summary['por_relatorio_s']['p95'] >= summary['por_relatorio_s']['p50']
+    assert summary['fases_por_relatorio_s'][metrics.SAVE]['total'] > 0
+    assert 'rel/s' in batch.format_summary()
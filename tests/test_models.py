@@ -0,0 +1,48 @@
+import sys, os; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pickle
+import pytest
+from gerador_relatorios.manifest import record_hash
+from gerador_relatorios.models import PatientRecord, as_record
+from gerador_relatorios.reports import report_filename
+from gerador_relatorios.xml_renderer import render_report
+
+LEGACY = {
+    'info': {'nome': 'Ana Lima', 'data_nascimento': '01/01/2000', 'responsavel': 'Resp', 'mes_referencia': 'Jan/2025'},
+    'especialidades': ['PSICOTERAPIA', 'Terapia ABA'],
+    'categorias': frozenset({'PSICOTERAPIA', 'ABA'}),
+}
+
+
+def test_record_round_trip_and_legacy_access():
+    record = PatientRecord.from_dict(LEGACY)
+    assert record.as_dict() == LEGACY
+    assert record['info']['nome'] == 'Ana Lima'
+    assert record.get('categorias') == {'PSICOTERAPIA', 'ABA'}
+    assert record.get('outro') is None
+    assert as_record(record) is record
+    with pytest.raises(AttributeError):
+        record.nome = 'Outro'
+    with pytest.raises(AttributeError):
+        record.extra = 1
+
+
+def test_repeated_values_are_shared():
+    a = PatientRecord('Ana', '01/01/2000', ''.join(['Não ', 'informado']), 'Jan/2025', ['ABA', 'PSICOTERAPIA'])
+    b = PatientRecord('Bruno', '02/02/2002', ''.join(['Não ', 'informado']), 'Jan/2025', ['ABA', 'PSICOTERAPIA'])
+    assert a.responsavel is b.responsavel
+    assert a.especialidades is b.especialidades
+    assert a.categorias is b.categorias
+
+
+def test_pickle_is_compact():
+    record = PatientRecord.from_dict(LEGACY)
+    data = pickle.dumps(record)
+    assert pickle.loads(data) == record
+    assert len(data) < len(pickle.dumps(LEGACY))
+
+
+def test_generators_accept_both_shapes():
+    record = PatientRecord.from_dict(LEGACY)
+    assert report_filename(record) == report_filename(LEGACY) == 'Relatório_PNE_Ana_Lima.docx'
+    assert record_hash(record, 'PNE', 'padrao') == record_hash(LEGACY, 'PNE', 'padrao')
+    assert render_report(record) == render_report(LEGACY)
@@ -0,0 +1,55 @@
+import sys, os; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pandas as pd
+import pytest
+from benchmarks.synthetic import write_workbook
+from gerador_relatorios import data_loader
+from gerador_relatorios.metrics import WRITE
+from gerador_relatorios.pipeline import directory_sink, iter_patients, stream_reports
+
+
+@pytest.mark.parametrize('chunk_size', [7, 5000])
+def test_iter_patients_matches_group_patients(tmp_path, chunk_size):
+    path = write_workbook(str(tmp_path / 'fusex.xlsx'), 120, seed=3)
+    expected = data_loader.group_patients(data_loader.load_excel(path))
+
+    streamed = dict(iter_patients(path, chunk_size=chunk_size, spill_dir=str(tmp_path)))
+
+    assert list(streamed) == list(expected)
+    assert streamed == expected
+
+
+def test_iter_patients_presorted(tmp_path):
+    data = pd.DataFrame({
+        'NOME': ['Ana', 'Ana', 'Bruno', 'Bruno', 'Ana'],
+        'DATA DE NASCIMENTO': ['01/01/2000'] * 5,
+        'RESPONSÁVEL': ['Resp'] * 5,
+        'ESPECIALIDADE': ['PSICOTERAPIA', 'ABA', 'FONOAUDIOLOGIA', None, 'NUTRIÇÃO'],
+        'MÊS DE REFERÊNCIA': ['Jan/2025'] * 5,
+    })
+    path = tmp_path / 'ordenada.xlsx'
+    data.iloc[:4].to_excel(path, index=False)
+    patients = dict(iter_patients(str(path), presorted=True, chunk_size=3))
+    assert patients == data_loader.group_patients(data_loader.load_excel(str(path)))
+
+    data.to_excel(path, index=False)
+    with pytest.raises(ValueError, match='ordenada'):
+        list(iter_patients(str(path), presorted=True))
+
+
+def test_iter_patients_missing_column(tmp_path):
+    path = tmp_path / 'ruim.xlsx'
+    pd.DataFrame({'NOME': ['A']}).to_excel(path, index=False)
+    with pytest.raises(ValueError):
+        iter_patients(str(path))
+
+
+def test_stream_reports_writes_files(tmp_path):
+    path = write_workbook(str(tmp_path / 'fusex.xlsx'), 20, seed=1)
+    output = tmp_path / 'saida'
+    output.mkdir()
+
+    results = list(stream_reports(iter_patients(path), 'PNE', directory_sink(str(output)), workers=1, max_pending=2))
+
+    assert results and all(r.ok for r in results)
+    assert all(r.data is None and WRITE in r.phases for r in results)
+    assert sorted(os.listdir(output)) == sorted(os.path.basename(r.path) for r in results)
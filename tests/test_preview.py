@@ -0,0 +1,32 @@
+import sys, os; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pandas as pd
+from gerador_relatorios.preview import PreviewModel
+
+
+def make_data(n):
+    return pd.DataFrame({
+        'NOME': [f'P{i}' for i in range(n)],
+        'DATA DE NASCIMENTO': ['01/01/2000'] * n,
+        'RESPONSÁVEL': ['R'] * n,
+        'ESPECIALIDADE': [None if i % 2 else 'X' for i in range(n)],
+        'MÊS DE REFERÊNCIA': ['Jan/2025'] * n,
+    })
+
+
+def test_preview_model_pages_rows_on_demand():
+    model = PreviewModel(page_size=10, max_pages=2)
+    model.set_data(make_data(95))
+
+    rows = model.rows(8, 5)
+    assert [r[0] for r in rows] == ['P8', 'P9', 'P10', 'P11', 'P12']
+    assert rows[1][3] == 'Não informado'
+    assert [r[0] for r in model.rows(92, 10)] == ['P92', 'P93', 'P94']
+    assert len(model) == 95
+    assert len(model._pages) == 2
+
+
+def test_preview_model_empty():
+    model = PreviewModel()
+    assert model.rows(0, 12) == []
+    model.set_data(make_data(0))
+    assert model.rows(0, 12) == []
@@ -1,4 +1,5 @@
 import sys, os; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from docx import Document
 from gerador_relatorios import reports
 
 
@@ -26,3 +27,17 @@ def test_generate_tipico_report(tmp_path):
     reports.generate_tipico_report(data, str(tmp_path))
     expected = tmp_path / 'Relatório_Típico_Teste.docx'
     assert expected.exists()
+
+
+def test_saved_report_keeps_content(tmp_path):
+    data = minimal_patient()
+    reports.generate_pne_report(data, str(tmp_path))
+    doc = Document(tmp_path / 'Relatório_PNE_Teste.docx')
+
+    texts = [p.text for p in doc.paragraphs]
+    assert 'Considerações Finais' in texts
+    assert any('Psicoterapia' in t for t in texts)
+    assert len(doc.tables) >= 2
+    header = [cell.text for row in doc.tables[0].rows for cell in row.cells]
+    assert 'Nome:  Teste' in header
+    assert any('PSICOTERAPIA' in t for t in header)
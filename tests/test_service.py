@@ -0,0 +1,147 @@
+import sys, os; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import http.client
+import io
+import json
+import threading
+import urllib.error
+import urllib.request
+import zipfile
+import pytest
+from docx import Document
+from gerador_relatorios import service as service_module
+from gerador_relatorios.service import (
+    DOCX_CONTENT_TYPE, ReportService, ServiceBusy, content_length, make_server, parse_patient,
+)
+
+PATIENT = {
+    'info': {'nome': 'Ana Lima', 'data_nascimento': '01/01/2000', 'responsavel': 'Resp', 'mes_referencia': 'Jan/2025'},
+    'especialidades': ['PSICOTERAPIA', 'NUTRIÇÃO'],
+}
+
+
+@pytest.fixture
+def server():
+    with ReportService(workers=1, max_pending=1) as service:
+        with make_server(port=0, service=service) as httpd:
+            thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+            thread.start()
+            yield httpd
+            httpd.shutdown()
+
+
+def url(httpd, path):
+    host, port = httpd.server_address[:2]
+    return f'http://{host}:{port}{path}'
+
+
+def post(httpd, path, payload):
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+    request = urllib.request.Request(url(httpd, path), data=body, headers={'Content-Type': 'application/json'})
+    return urllib.request.urlopen(request, timeout=10)
+
+
+def test_parse_patient_defaults_and_validation():
+    patient = parse_patient({'info': {'nome': 'Ana'}, 'especialidades': ['ABA', 'ABA']})
+    assert patient['info']['responsavel'] == 'Não informado'
+    assert patient['especialidades'] == ['ABA']
+    assert patient['categorias'] == {'ABA'}
+    with pytest.raises(ValueError):
+        parse_patient({'info': {'nome': ''}})
+    with pytest.raises(ValueError):
+        parse_patient(['Ana'])
+
+
+def test_service_returns_docx_and_stats(server):
+    with post(server, '/relatorio?tipo=pne', PATIENT) as response:
+        assert response.headers['Content-Type'] == DOCX_CONTENT_TYPE
+        assert 'Relat%C3%B3rio_PNE_Ana_Lima.docx' in response.headers['Content-Disposition']
+        data = response.read()
+    Document(io.BytesIO(data))
+    with zipfile.ZipFile(io.BytesIO(data)) as package:
+        assert 'Ana Lima' in package.read('word/document.xml').decode('utf-8')
+
+    with pytest.raises(urllib.error.HTTPError) as error:
+        post(server, '/relatorio?tipo=TIPICO', PATIENT)
+    assert error.value.code == 422
+
+    with pytest.raises(urllib.error.HTTPError) as error:
+        post(server, '/relatorio', b'{nao e json')
+    assert error.value.code == 400
+
+    with urllib.request.urlopen(url(server, '/stats'), timeout=10) as response:
+        stats = json.load(response)
+    assert (stats['requisicoes'], stats['gerados'], stats['erros'], stats['recusados']) == (2, 1, 1, 0)
+    assert stats['latencia_ms']['p95'] > 0
+
+
+def test_service_rejects_invalid_content_length(server):
+    assert content_length('12') == 12
+    assert content_length(None) == 0
+    for value in ('abc', '-1'):
+        with pytest.raises(ValueError):
+            content_length(value)
+
+    host, port = server.server_address[:2]
+    for value in ('abc', '-1'):
+        connection = http.client.HTTPConnection(host, port, timeout=10)
+        try:
+            connection.putrequest('POST', '/relatorio')
+            connection.putheader('Content-Length', value)
+            connection.endheaders()
+            response = connection.getresponse()
+            assert response.status == 400
+            assert 'Content-Length' in json.load(response)['erro']
+        finally:
+            connection.close()
+
+
+def test_service_rejects_when_full(server):
+    service = server.service
+    assert service.slots.acquire(blocking=False)
+    try:
+        with pytest.raises(urllib.error.HTTPError) as error:
+            post(server, '/relatorio', PATIENT)
+        assert error.value.code == 503
+        assert error.value.headers['Retry-After'] == '1'
+    finally:
+        service.slots.release()
+    assert service.stats()['recusados'] == 1
+    with post(server, '/relatorio', PATIENT) as response:
+        assert response.status == 200
+
+
+def test_service_reports_unexpected_errors_as_500(server, monkeypatch):
+    def broken(task):
+        raise RuntimeError('falha inesperada')
+
+    monkeypatch.setattr(service_module, 'render_task', broken)
+    with pytest.raises(urllib.error.HTTPError) as error:
+        post(server, '/relatorio', PATIENT)
+    assert error.value.code == 500
+    assert 'falha inesperada' in json.load(error.value)['erro']
+    monkeypatch.undo()
+    # O lugar na fila foi devolvido e o serviço continua atendendo.
+    with post(server, '/relatorio', PATIENT) as response:
+        assert response.status == 200
+
+
+def test_service_process_pool():
+    patient = parse_patient(PATIENT)
+    with ReportService(workers=2) as service:
+        results = [service.render(patient, 'PNE') for _ in range(3)]
+    assert all(r.ok and r.data for r in results)
+    assert service.stats()['gerados'] == 3
+
+
+def test_service_replaces_broken_process_pool():
+    patient = parse_patient(PATIENT)
+    with ReportService(workers=2) as service:
+        broken = service._executor
+        # Um worker que morre deixa o ProcessPoolExecutor inutilizável.
+        with pytest.raises(Exception):
+            broken.submit(os._exit, 1).result()
+        with pytest.raises(ServiceBusy):
+            service.render(patient, 'PNE')
+        assert service._executor is not broken
+        assert service.render(patient, 'PNE').ok
+    assert service.stats()['erros'] == 1
@@ -0,0 +1,89 @@
+import sys, os; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pickle
+import pandas as pd
+from gerador_relatorios import data_loader
+from gerador_relatorios.sheet_cache import SheetCache
+
+
+def write_sheet(path, nome='A'):
+    pd.DataFrame({
+        'NOME': [nome],
+        'DATA DE NASCIMENTO': ['01/01/2000'],
+        'RESPONSÁVEL': ['B'],
+        'ESPECIALIDADE': ['C'],
+        'MÊS DE REFERÊNCIA': ['Jan/2025'],
+    }).to_excel(path, index=False)
+
+
+def test_load_excel_uses_cache_on_repeat(tmp_path, monkeypatch):
+    sheet = tmp_path / 'planilha.xlsx'
+    write_sheet(sheet)
+    cache = SheetCache(str(tmp_path / 'cache'))
+
+    first = data_loader.load_excel(str(sheet), cache=cache)
+
+    def fail(*args, **kwargs):
+        raise AssertionError('a planilha não deveria ser lida novamente')
+
+    monkeypatch.setattr(data_loader, 'iter_excel_chunks', fail)
+    second = data_loader.load_excel(str(sheet), cache=cache)
+    assert second.equals(first)
+
+
+def test_cache_key_changes_with_content(tmp_path):
+    sheet = tmp_path / 'planilha.xlsx'
+    cache = SheetCache(str(tmp_path / 'cache'))
+    write_sheet(sheet, 'A')
+    key_a = cache.key_for(str(sheet))
+    write_sheet(sheet, 'B')
+    assert cache.key_for(str(sheet)) != key_a
+    assert cache.key_for(str(sheet), 'Planilha2') != cache.key_for(str(sheet))
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    df = pd.DataFrame({'NOME': ['x' * 1000] * 50})
+    cache = SheetCache(str(tmp_path / 'cache'), max_bytes=10 ** 9)
+    cache.put('a', df)
+    size = cache.entries()[0][1]
+    cache.put('b', df)
+    os.utime(cache._entry_path('a'), (1, 1))
+    os.utime(cache._entry_path('b'), (2, 2))
+    assert cache.get('a') is not None  # "a" passa a ser o mais recente
+
+    cache.max_bytes = size * 2
+    cache.put('c', df)
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.get('c') is not None
+
+
+class Planted:
+    def __init__(self, marker):
+        self.marker = marker
+
+    def __reduce__(self):
+        # Ao ser lido, cria o arquivo ``marker``.
+        return (open, (self.marker, 'w'))
+
+
+def test_cache_ignores_entries_without_a_valid_signature(tmp_path):
+    cache = SheetCache(str(tmp_path / 'cache'))
+    df = pd.DataFrame({'NOME': ['Ana']})
+    cache.put('a', df)
+    assert cache.get('a').equals(df)
+
+    entry = cache._entry_path('a')
+    with open(entry, 'rb') as f:
+        content = bytearray(f.read())
+    content[-1] ^= 1
+    with open(entry, 'wb') as f:
+        f.write(content)
+    assert cache.get('a') is None
+    assert not os.path.exists(entry)
+
+    # Um pickle colocado no cache por outro programa não é executado.
+    marker = tmp_path / 'executado'
+    with open(cache._entry_path('b'), 'wb') as f:
+        pickle.dump(Planted(str(marker)), f)
+    assert cache.get('b') is None
+    assert not marker.exists()
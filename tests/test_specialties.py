@@ -0,0 +1,39 @@
+import sys, os; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pytest
+from gerador_relatorios import reports
+from gerador_relatorios.specialties import SPECIALTIES, categories_of, classify, classify_all
+from helpers import patient
+
+
+def test_registry_matches_signatures():
+    assert tuple(reports.SIGNATURES) == SPECIALTIES
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('NUTRIÇÃO', {'NUTRIÇÃO'}),
+    ('nutricao', {'NUTRIÇÃO'}),
+    ('Terapia ABA', {'ABA'}),
+    ('Terapia Ocupacional', {'TERAPIA OCUPACIONAL'}),
+    ('fono', {'FONOAUDIOLOGIA'}),
+    ('Psicomotricidade', {'PSICOMOTRICIDADE'}),
+    ('PSICOPEDAGOGIA', {'PSICOPEDAGOGIA'}),
+    ('Fisioterapia / Psicoterapia', {'FISIOTERAPIA', 'PSICOTERAPIA'}),
+    ('Outra', set()),
+])
+def test_classify_folds_accents_and_case(raw, expected):
+    assert classify(raw) == expected
+
+
+def test_categories_of_prefers_precomputed():
+    assert categories_of({'especialidades': ['fono', 'ABA']}) == {'FONOAUDIOLOGIA', 'ABA'}
+    assert categories_of({'especialidades': ['fono'], 'categorias': frozenset({'ABA'})}) == {'ABA'}
+    assert classify_all([]) == frozenset()
+
+
+def test_generators_use_classification():
+    data = patient('Ana', ['nutricao'])
+    with pytest.raises(ValueError, match='NUTRIÇÃO'):
+        reports.build_tipico_document(data)
+
+    doc = reports.build_pne_document(data)
+    assert 'RAIANE ALVES ROCHA' in ''.join(doc.element.body.itertext())
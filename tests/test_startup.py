@@ -0,0 +1,23 @@
+import sys, os; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+HEAVY = ('pandas', 'docx', 'openpyxl', 'lxml')
+
+
+def test_gui_import_defers_heavy_modules():
+    code = (
+        "import sys, gerador_relatorios.gui; "
+        f"print([m for m in {HEAVY!r} if m in sys.modules])"
+    )
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == '[]'
+
+
+def test_warmup_loads_heavy_modules():
+    code = (
+        "import sys; from gerador_relatorios.warmup import start_warmup; start_warmup().join(); "
+        f"print(all(m in sys.modules for m in {HEAVY!r}))"
+    )
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == 'True'
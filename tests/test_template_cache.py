@@ -0,0 +1,51 @@
+import sys, os; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from docx import Document
+from gerador_relatorios.template_cache import TemplateCache
+
+
+def test_template_loaded_once_and_cloned(tmp_path):
+    template = tmp_path / 'papel.docx'
+    base = Document()
+    base.add_paragraph('Cabeçalho')
+    base.save(template)
+
+    cache = TemplateCache(str(template))
+    first = cache.new_document('X')
+    second = cache.new_document('X')
+    first.add_paragraph('somente no primeiro')
+
+    assert cache.loads == 1
+    assert [p.text for p in first.paragraphs] == ['Cabeçalho', 'somente no primeiro']
+    assert [p.text for p in second.paragraphs] == ['Cabeçalho']
+
+    out = tmp_path / 'saida.docx'
+    first.save(out)
+    assert [p.text for p in Document(out).paragraphs] == ['Cabeçalho', 'somente no primeiro']
+
+
+def test_template_reloaded_when_file_changes(tmp_path):
+    template = tmp_path / 'papel.docx'
+    Document().save(template)
+    cache = TemplateCache(str(template))
+    cache.new_document('X')
+
+    changed = Document()
+    changed.add_paragraph('Novo')
+    changed.save(template)
+    os.utime(template, ns=(0, 123456789))
+
+    doc = cache.new_document('X')
+    assert cache.loads == 2
+    assert [p.text for p in doc.paragraphs] == ['Novo']
+
+
+def test_fallback_when_template_missing(tmp_path):
+    cache = TemplateCache(str(tmp_path / 'inexistente.docx'))
+    doc = cache.new_document('CLÍNICA MÉDICA')
+    assert cache.fingerprint() is None
+    assert doc.paragraphs[0].text == 'CLÍNICA MÉDICA'
+
+    doc.add_paragraph('Paciente')
+    out = tmp_path / 'saida.docx'
+    doc.save(out)
+    assert [p.text for p in Document(out).paragraphs] == ['CLÍNICA MÉDICA', '', 'Paciente']
@@ -0,0 +1,62 @@
+import sys, os; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from gerador_relatorios.data_loader import MISSING_NAME, make_patient
+from gerador_relatorios.validation import (
+    EMPTY_NAME, FILENAME_COLLISION, FORBIDDEN_SPECIALTY, INVALID_FILENAME, UNKNOWN_SPECIALTY, filename_problem,
+    format_issues, has_errors, validate_batch,
+)
+
+
+def patient(nome, especialidades):
+    return make_patient(nome, '01/01/2000', 'Resp', 'Jan/2025', especialidades)
+
+
+def batch(*patients):
+    return {p.nome: p for p in patients}
+
+
+def test_valid_batch_has_no_issues():
+    patients = batch(patient('Ana', ['PSICOTERAPIA', 'Fono']), patient('Bruno', ['NUTRIÇÃO']))
+    assert validate_batch(patients, 'PNE') == []
+
+
+def test_reports_every_problem_at_once():
+    patients = batch(
+        patient('Ana Lima', ['PSICOTERAPIA', 'Nutricao', 'FISIO']),
+        patient('ana lima', ['ABA']),
+        patient(MISSING_NAME, ['Musicoterapia']),
+        patient('Carla', ['Nutricao', 'FISIO', 'PSICOTERAPIA']),
+    )
+    issues = validate_batch(patients, 'TIPICO')
+
+    assert [(i.nome, i.kind) for i in issues] == [
+        ('Ana Lima', FORBIDDEN_SPECIALTY),
+        ('Ana Lima', FORBIDDEN_SPECIALTY),
+        (MISSING_NAME, EMPTY_NAME),
+        (MISSING_NAME, UNKNOWN_SPECIALTY),
+        ('Carla', FORBIDDEN_SPECIALTY),
+        ('Carla', FORBIDDEN_SPECIALTY),
+        ('Ana Lima', FILENAME_COLLISION),
+        ('ana lima', FILENAME_COLLISION),
+    ]
+    assert has_errors(issues)
+    assert "geraria o mesmo arquivo que 'ana lima'" in issues[6].message
+    assert format_issues(issues, limit=2).endswith('... e mais 6 problema(s).')
+
+
+def test_unknown_specialty_is_only_a_warning():
+    issues = validate_batch(batch(patient('Ana', ['Musicoterapia', 'ABA'])), 'PNE')
+    assert [i.kind for i in issues] == [UNKNOWN_SPECIALTY]
+    assert not has_errors(issues)
+
+
+def test_names_that_cannot_become_files_are_errors():
+    patients = batch(patient('Ana/Lima', ['ABA']), patient('Bruno: "B"?', ['ABA']), patient('Carla', ['ABA']))
+    issues = validate_batch(patients, 'PNE')
+    assert [(i.nome, i.kind) for i in issues] == [('Ana/Lima', INVALID_FILENAME), ('Bruno: "B"?', INVALID_FILENAME)]
+    assert "'Relatório_PNE_Ana/Lima.docx'" in issues[0].message
+
+    assert filename_problem('Relatório_PNE_Ana.docx') is None
+    assert filename_problem('CON.docx') == filename_problem('lpt1') == 'nome reservado pelo Windows'
+    assert filename_problem('Ana.') is not None
+    assert filename_problem('Ana ') is not None
+    assert filename_problem('Ana\tLima') is not None
@@ -0,0 +1,128 @@
+import sys, os; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import io
+import threading
+import time
+import pandas as pd
+from gerador_relatorios import watch
+from gerador_relatorios.manifest import MANIFEST_FILE
+
+
+def write_sheet(path, names):
+    pd.DataFrame({
+        'NOME': names,
+        'DATA DE NASCIMENTO': ['01/01/2000'] * len(names),
+        'RESPONSÁVEL': ['Resp'] * len(names),
+        'ESPECIALIDADE': ['PSICOTERAPIA'] * len(names),
+        'MÊS DE REFERÊNCIA': ['Jan/2025'] * len(names),
+    }).to_excel(path, index=False)
+
+
+def age(path, seconds):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns - int(seconds * 1e9)))
+
+
+def test_watcher_debounces_and_skips_temporary_files(tmp_path):
+    now = [0.0]
+    watcher = watch.FolderWatcher(str(tmp_path), settle=5, clock=lambda: now[0])
+    sheet = tmp_path / 'unidade.xlsx'
+    write_sheet(sheet, ['Ana'])
+    (tmp_path / '~$unidade.xlsx').write_bytes(b'lock')
+    (tmp_path / 'notas.txt').write_text('x')
+
+    assert watcher.poll() == []
+    now[0] = 3
+    assert watcher.poll() == []
+    now[0] = 6
+    assert watcher.poll() == [str(sheet)]
+    assert watcher.poll() == []
+
+    write_sheet(sheet, ['Ana', 'Bruno'])
+    age(sheet, -1)
+    now[0] = 7
+    assert watcher.poll() == []
+    now[0] = 13
+    assert watcher.poll() == [str(sheet)]
+
+
+def test_watcher_accepts_old_files_immediately(tmp_path):
+    sheet = tmp_path / 'antiga.xlsx'
+    write_sheet(sheet, ['Ana'])
+    age(sheet, 60)
+    assert watch.FolderWatcher(str(tmp_path), settle=5).poll() == [str(sheet)]
+
+
+def test_service_writes_per_input_folders_incrementally(tmp_path):
+    entrada = tmp_path / 'entrada'
+    entrada.mkdir()
+    saida = tmp_path / 'saida'
+    first = entrada / 'unidade1.xlsx'
+    write_sheet(first, ['Ana', 'Bruno'])
+    second = entrada / 'unidade2.xlsx'
+    write_sheet(second, ['Carla'])
+    age(first, 60)
+    age(second, 60)
+
+    with watch.WatchService(str(entrada), str(saida), workers=1, settle=5, out=io.StringIO()) as service:
+        runs = service.run_once()
+        assert [(r.generated, r.failures) for r in runs] == [(2, 0), (1, 0)]
+        assert sorted(os.listdir(saida / 'unidade1')) == [MANIFEST_FILE, 'Relatório_PNE_Ana.docx', 'Relatório_PNE_Bruno.docx']
+        assert sorted(os.listdir(saida / 'unidade2')) == [MANIFEST_FILE, 'Relatório_PNE_Carla.docx']
+
+        write_sheet(first, ['Ana', 'Bruno', 'Daniel'])
+        age(first, 30)
+        assert service.run_once() == []
+        (run,) = service.run_once()
+        assert (run.generated, run.skipped) == (1, 2)
+
+
+def test_main_once(tmp_path, capsys):
+    entrada = tmp_path / 'entrada'
+    entrada.mkdir()
+    (entrada / 'ruim.xlsx').write_bytes(b'nada')
+    age(entrada / 'ruim.xlsx', 60)
+    assert watch.main([str(entrada), '-o', str(tmp_path / 'saida'), '-w', '1', '--uma-vez', '--sem-cache']) == 1
+    assert 'ruim.xlsx' in capsys.readouterr().out
+    assert watch.main([str(tmp_path / 'nada'), '-o', str(tmp_path)]) == 2
+
+
+def test_service_skips_invalid_workbook(tmp_path):
+    entrada = tmp_path / 'entrada'
+    entrada.mkdir()
+    sheet = entrada / 'unidade.xlsx'
+    write_sheet(sheet, ['Ana', 'ana'])
+    age(sheet, 60)
+    with watch.WatchService(str(entrada), str(tmp_path / 'saida'), workers=1, out=io.StringIO()) as service:
+        (run,) = service.run_once()
+    assert 'mesmo arquivo' in run.error
+    assert not (tmp_path / 'saida').exists()
+
+
+def test_service_keeps_polling_after_unexpected_error(tmp_path):
+    entrada = tmp_path / 'entrada'
+    entrada.mkdir()
+    saida = tmp_path / 'saida'
+    saida.mkdir()
+    # A pasta de saída da planilha já existe como arquivo: os.makedirs falha.
+    (saida / 'unidade1').write_text('x')
+    write_sheet(entrada / 'unidade1.xlsx', ['Ana'])
+    age(entrada / 'unidade1.xlsx', 60)
+    out = io.StringIO()
+    stop = threading.Event()
+    with watch.WatchService(str(entrada), str(saida), workers=1, settle=0, out=out) as service:
+        (run,) = service.run_once()
+        assert run.error
+        thread = threading.Thread(target=service.serve_forever, args=(0.05, stop))
+        thread.start()
+        try:
+            write_sheet(entrada / 'unidade2.xlsx', ['Bruno'])
+            age(entrada / 'unidade2.xlsx', 60)
+            report = saida / 'unidade2' / 'Relatório_PNE_Bruno.docx'
+            deadline = time.monotonic() + 30
+            while not report.exists() and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            stop.set()
+            thread.join()
+    assert report.exists()
+    assert '❌ unidade1.xlsx' in out.getvalue()
@@ -0,0 +1,64 @@
+import sys, os; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import io
+import zipfile
+import pytest
+from gerador_relatorios import reports, xml_renderer
+import helpers
+
+
+def patient(nome='Ana & <Lima>', especialidades=('PSICOTERAPIA', 'Terapia ABA', 'FONOAUDIOLOGIA')):
+    # Caracteres que precisam de escape em XML no nome e no responsável.
+    return helpers.patient(nome, especialidades, responsavel='Maria "Mãe"')
+
+
+def package_parts(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as package:
+        return [(name, package.read(name)) for name in package.namelist()]
+
+
+def docx_bytes(patient_data, report_type):
+    buffer = io.BytesIO()
+    reports.build_document(patient_data, report_type).save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('report_type, especialidades', [
+    ('PNE', ('PSICOTERAPIA', 'Terapia ABA', 'NUTRIÇÃO', 'FISIOTERAPIA')),
+    ('PNE', ('FONOAUDIOLOGIA',)),
+    ('TIPICO', ('PSICOTERAPIA', 'PSICOPEDAGOGIA')),
+])
+def test_xml_renderer_matches_python_docx(report_type, especialidades):
+    data = patient(especialidades=especialidades)
+    renderer = xml_renderer.XmlReportRenderer()
+
+    assert package_parts(renderer.render(data, report_type)) == package_parts(docx_bytes(data, report_type))
+
+    other = patient(nome='Bruno', especialidades=especialidades)
+    assert package_parts(renderer.render(other, report_type)) == package_parts(docx_bytes(other, report_type))
+    assert renderer.compilations == 1
+
+
+def test_xml_renderer_keeps_report_errors():
+    with pytest.raises(ValueError, match='NUTRIÇÃO'):
+        xml_renderer.XmlReportRenderer().render(patient(especialidades=['NUTRIÇÃO']), 'TIPICO')
+
+
+def test_xml_renderer_falls_back_for_line_breaks(tmp_path):
+    data = patient()
+    data['info']['responsavel'] = 'Maria\nJosé'
+    renderer = xml_renderer.XmlReportRenderer()
+    assert not renderer.can_render(data)
+
+    path = renderer.write(data, str(tmp_path), 'PNE')
+    assert os.path.exists(path)
+    assert renderer.compilations == 0
+
+
+def test_xml_renderer_shares_skeleton_per_category_set():
+    renderer = xml_renderer.XmlReportRenderer()
+    first = patient(especialidades=['Psicoterapia', 'Fono'])
+    second = patient(nome='Bruno', especialidades=['PSICOTERAPIA', 'FONOAUDIOLOGIA'])
+
+    for data in (first, second):
+        assert package_parts(renderer.render(data, 'PNE')) == package_parts(docx_bytes(data, 'PNE'))
+    assert renderer.compilations == 1